@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# announcement_store.py
+"""
+SQLite store for announcements, one row per announcement.
+
+Rows are keyed by fingerprint (a hash of title, date and attachments) and indexed
+by parsed date, so history can grow well past one scrape's worth of pages.
+An FTS5 index over title and message_text backs /api/ktu/search.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+DB_FILE = os.getenv("DB_FILE", "ktu_announcements.db")
+
+DATE_FORMATS = ("%d %b %Y", "%d %B %Y", "%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%d.%m.%Y", "%b %d, %Y")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS announcements (
+    fingerprint TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    date TEXT,
+    date_iso TEXT,
+    link TEXT,
+    message_html TEXT,
+    message_text TEXT,
+    attachments TEXT,
+    first_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_announcements_date ON announcements(date_iso DESC);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS announcements_fts
+USING fts5(title, message_text, tokenize='unicode61');
+"""
+
+_fts5 = None  # whether this SQLite build has FTS5; detected on first connect
+
+def fingerprint(item):
+    """Stable id for an announcement: hash of title, date and attachment ids"""
+    parts = [item.get("title", ""), item.get("date", "")]
+    parts.extend(att.get("href", "") for att in item.get("attachments") or [])
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()[:16]
+
+def parse_date(text):
+    """Parse a KTU display date into a sortable YYYY-MM-DD string (None if unknown)"""
+    text = (text or "").strip()
+    if not text:
+        return None
+    # ISO timestamps from the API: keep the date part
+    match = re.match(r"(\d{4}-\d{2}-\d{2})", text)
+    if match:
+        return match.group(1)
+    text = re.sub(r"\s+", " ", text)
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+def connect(path=None):
+    """Open the store, creating the schema on first use"""
+    global _fts5
+    conn = sqlite3.connect(path or DB_FILE, timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    if _fts5 is not False:
+        try:
+            conn.executescript(FTS_SCHEMA)
+            _fts5 = True
+        except sqlite3.OperationalError:
+            print("SQLite has no FTS5 support - search falls back to LIKE")
+            _fts5 = False
+    return conn
+
+def save_announcements(announcements, path=None):
+    """Insert or update announcements; returns the number of new rows"""
+    conn = connect(path)
+    now = time.time()
+    added = 0
+    try:
+        with conn:
+            for item in announcements:
+                fp = item.get("fingerprint") or fingerprint(item)
+                exists = conn.execute(
+                    "SELECT 1 FROM announcements WHERE fingerprint = ?", (fp,)
+                ).fetchone()
+                conn.execute(
+                    """INSERT INTO announcements
+                       (fingerprint, title, date, date_iso, link, message_html, message_text, attachments, first_seen)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(fingerprint) DO UPDATE SET
+                           title = excluded.title, date = excluded.date, date_iso = excluded.date_iso,
+                           link = excluded.link, message_html = excluded.message_html,
+                           message_text = excluded.message_text, attachments = excluded.attachments""",
+                    (fp, item.get("title", ""), item.get("date", ""), parse_date(item.get("date")),
+                     item.get("link", ""), item.get("message_html", ""), item.get("message_text", ""),
+                     json.dumps(item.get("attachments") or [], ensure_ascii=False), now)
+                )
+                if _fts5:
+                    # FTS rows share the announcement's rowid
+                    rowid = conn.execute(
+                        "SELECT rowid FROM announcements WHERE fingerprint = ?", (fp,)
+                    ).fetchone()[0]
+                    conn.execute("DELETE FROM announcements_fts WHERE rowid = ?", (rowid,))
+                    conn.execute(
+                        "INSERT INTO announcements_fts (rowid, title, message_text) VALUES (?, ?, ?)",
+                        (rowid, item.get("title", ""), item.get("message_text", ""))
+                    )
+                if not exists:
+                    added += 1
+    finally:
+        conn.close()
+    return added
+
+def fts_query(q):
+    """Turn free text into a safe FTS5 query: every word must match (as a prefix)"""
+    words = re.findall(r"\w+", q, flags=re.UNICODE)
+    return " ".join('"{}"*'.format(w.replace('"', '""')) for w in words)
+
+def row_to_dict(row):
+    return {
+        "fingerprint": row["fingerprint"],
+        "title": row["title"],
+        "date": row["date"],
+        "date_iso": row["date_iso"],
+        "link": row["link"],
+        "message_text": row["message_text"],
+        "attachments": json.loads(row["attachments"] or "[]")
+    }
+
+def search(q, limit=20, path=None):
+    """Full-text search over title and message_text, best matches first"""
+    conn = connect(path)
+    try:
+        if _fts5:
+            match = fts_query(q)
+            if not match:
+                return []
+            rows = conn.execute(
+                """SELECT a.*, snippet(announcements_fts, 1, '<b>', '</b>', '...', 16) AS snippet
+                   FROM announcements_fts
+                   JOIN announcements a ON a.rowid = announcements_fts.rowid
+                   WHERE announcements_fts MATCH ?
+                   ORDER BY bm25(announcements_fts, 10.0, 1.0), a.date_iso DESC
+                   LIMIT ?""",
+                (match, limit)
+            ).fetchall()
+        else:
+            like = f"%{q}%"
+            rows = conn.execute(
+                """SELECT *, NULL AS snippet FROM announcements
+                   WHERE title LIKE ? OR message_text LIKE ?
+                   ORDER BY date_iso DESC LIMIT ?""",
+                (like, like, limit)
+            ).fetchall()
+    finally:
+        conn.close()
+
+    results = []
+    for row in rows:
+        record = row_to_dict(row)
+        record["snippet"] = row["snippet"]
+        results.append(record)
+    return results
+
+def unindexed(announcements, path=None):
+    """The announcements whose fingerprint is not in the store yet"""
+    by_fp = {item.get("fingerprint") or fingerprint(item): item for item in announcements}
+    if not by_fp:
+        return []
+    conn = connect(path)
+    try:
+        stored = {row[0] for row in conn.execute(
+            f"SELECT fingerprint FROM announcements WHERE fingerprint IN ({','.join('?' * len(by_fp))})",
+            list(by_fp)
+        )}
+    finally:
+        conn.close()
+    return [dict(item, fingerprint=fp) for fp, item in by_fp.items() if fp not in stored]
+
+def search_items(announcements, q, limit=20):
+    """search() over in-memory records: every word must start a word of the title or message_text"""
+    words = [w.lower() for w in re.findall(r"\w+", q, flags=re.UNICODE)]
+    if not words:
+        return []
+    results = []
+    for item in announcements:
+        tokens = re.findall(r"\w+", f"{item.get('title', '')} {item.get('message_text', '')}".lower(), flags=re.UNICODE)
+        if all(any(t.startswith(w) for t in tokens) for w in words):
+            results.append({
+                "fingerprint": item.get("fingerprint") or fingerprint(item),
+                "title": item.get("title", ""),
+                "date": item.get("date", ""),
+                "date_iso": parse_date(item.get("date")),
+                "link": item.get("link", ""),
+                "message_text": item.get("message_text", ""),
+                "attachments": item.get("attachments") or [],
+                "snippet": None
+            })
+    results.sort(key=lambda r: r["date_iso"] or "", reverse=True)
+    return results[:limit]
+
+def rekey(normalize, path=None):
+    """Re-key rows an older API client stored with ISO dates; returns the number of rows changed
+
+    normalize maps such a record to the page format. A row whose new
+    fingerprint is already stored is dropped (keeping the earlier first_seen).
+    """
+    conn = connect(path)
+    changed = 0
+    try:
+        with conn:
+            rows = conn.execute(
+                "SELECT rowid, * FROM announcements WHERE date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]T*'"
+            ).fetchall()
+            for row in rows:
+                record = normalize(dict(row_to_dict(row), message_html=row["message_html"]))
+                fp = fingerprint(record)
+                if conn.execute("SELECT 1 FROM announcements WHERE fingerprint = ?", (fp,)).fetchone():
+                    conn.execute("UPDATE announcements SET first_seen = MIN(first_seen, ?) WHERE fingerprint = ?",
+                                 (row["first_seen"], fp))
+                    conn.execute("DELETE FROM announcements WHERE rowid = ?", (row["rowid"],))
+                    if _fts5:
+                        conn.execute("DELETE FROM announcements_fts WHERE rowid = ?", (row["rowid"],))
+                else:
+                    conn.execute(
+                        "UPDATE announcements SET fingerprint = ?, date = ?, message_html = ?, message_text = ? "
+                        "WHERE rowid = ?",
+                        (fp, record["date"], record["message_html"], record["message_text"], row["rowid"])
+                    )
+                changed += 1
+    finally:
+        conn.close()
+    return changed
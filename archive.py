@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# archive.py
+"""
+Segmented on-disk archive of every announcement ever seen.
+
+The live snapshot only covers the first MAX_PAGES pages. Everything the
+leader publishes, and everything the historical backfill (backfill.py)
+walks through, is also added here, split by announcement month:
+
+  archive/2025-11.json   {"segment", "count", "announcements": [...]}, newest first
+  archive/undated.json   announcements whose date could not be parsed
+  archive/index.json     {"format", "count", "segments": {"2025-11": {"count", "first", "last", "sha256", "size"}}}
+
+Segments are rewritten atomically, only when something in them changed.
+The server never loads the archive into memory: /api/ktu/archive serves
+the index and /api/ktu/archive/<segment> streams one segment file from disk.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import snapshot_files
+from announcement_store import fingerprint, parse_date
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+INDEX_FILE = "index.json"
+UNDATED = "undated"
+SEGMENT_RE = re.compile(r"^(\d{4}-\d{2}|undated)$")
+FORMAT = 2  # 2: records in the page format (see ktu_api_client.normalize_record)
+
+_lock = threading.Lock()  # the backfill and snapshot publishing both write (leader only)
+
+def segment_of(item):
+    date_iso = parse_date(item.get("date"))
+    return date_iso[:7] if date_iso else UNDATED
+
+def segment_path(segment):
+    return os.path.join(ARCHIVE_DIR, f"{segment}.json")
+
+def read_segment(segment):
+    """Announcements in a segment (empty if it does not exist)"""
+    try:
+        with open(segment_path(segment), "r", encoding="utf-8") as f:
+            return json.load(f)["announcements"]
+    except (OSError, ValueError, KeyError):
+        return []
+
+def read_index():
+    try:
+        with open(os.path.join(ARCHIVE_DIR, INDEX_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"segments": {}}
+
+def sort_key(item):
+    return parse_date(item.get("date")) or ""
+
+def write_segment(index, segment, items):
+    """Write a segment (newest first) and update its index entry; call with _lock held"""
+    items = sorted(items, key=sort_key, reverse=True)
+    content = snapshot_files.encode({"segment": segment, "count": len(items), "announcements": items})
+    snapshot_files.write_atomic(segment_path(segment), content)
+    dates = [d for d in (parse_date(item.get("date")) for item in items) if d]
+    index["segments"][segment] = {
+        "count": len(items),
+        "first": min(dates) if dates else None,
+        "last": max(dates) if dates else None,
+        "sha256": hashlib.sha256(content).hexdigest(),
+        "size": len(content)
+    }
+
+def write_index(index):
+    """Sort the segments (newest month first, undated last), recount and write the index"""
+    index["segments"] = dict(sorted(
+        index["segments"].items(), key=lambda kv: (kv[0] != UNDATED, kv[0]), reverse=True
+    ))
+    index["count"] = sum(meta["count"] for meta in index["segments"].values())
+    snapshot_files.write_atomic(os.path.join(ARCHIVE_DIR, INDEX_FILE), json.dumps(index).encode("utf-8"))
+
+def add(announcements):
+    """Merge announcements into their segments; returns the number that were new or changed"""
+    by_segment = {}
+    for item in announcements:
+        if item.get("title"):
+            item = dict(item, fingerprint=item.get("fingerprint") or fingerprint(item))
+            by_segment.setdefault(segment_of(item), []).append(item)
+    if not by_segment:
+        return 0
+
+    updated = 0
+    with _lock:
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        index = read_index()
+        index.setdefault("format", 1 if index["segments"] else FORMAT)  # an older archive waits for migrate()
+        for segment, items in by_segment.items():
+            existing = {item["fingerprint"]: item for item in read_segment(segment)}
+            changed = [item for item in items if existing.get(item["fingerprint"]) != item]
+            if not changed:
+                continue
+            for item in changed:
+                existing[item["fingerprint"]] = item
+            write_segment(index, segment, existing.values())
+            updated += len(changed)
+        if updated:
+            write_index(index)
+    return updated
+
+def migrate():
+    """Rewrite segments from before FORMAT 2 in the page record format, once; returns records dropped as duplicates
+
+    Older API clients archived ISO dates, which gave every announcement a
+    second fingerprint next to the one the page engine produces.
+    """
+    import ktu_api_client
+
+    with _lock:
+        index = read_index()
+        if index.get("format", 1) >= FORMAT or not index["segments"]:
+            return 0
+        dropped = 0
+        for segment in list(index["segments"]):
+            items = read_segment(segment)
+            merged = {}
+            for item in items:
+                item = ktu_api_client.normalize_record(item)
+                fp = item.get("fingerprint") or fingerprint(item)
+                merged.setdefault(fp, dict(item, fingerprint=fp))
+            if list(merged.values()) != items:
+                write_segment(index, segment, merged.values())
+                dropped += len(items) - len(merged)
+        index["format"] = FORMAT
+        write_index(index)
+    return dropped
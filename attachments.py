@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# attachments.py
+"""
+Resolve announcement attachments to real files and keep them on local disk.
+
+Scraped attachments only carry the KTU button value (href "#attachment-<id>").
+Each id is downloaded once from the KTU API through a bounded worker pool,
+stored under the SHA-256 of its contents (ATTACHMENT_DIR/ab/abcdef...), and
+recorded in the SQLite store so later scrapes skip it. The server streams
+the files from disk at /api/ktu/attachments/<id>.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import announcement_store
+import ktu_api_client
+
+ATTACHMENT_DIR = os.getenv("ATTACHMENT_DIR", "attachments")
+ATTACHMENT_PATH = "/getAttachment"  # KTU API endpoint that returns the file for an encryptId
+ATTACHMENT_WORKERS = int(os.getenv("ATTACHMENT_WORKERS", "4"))
+ATTACHMENT_MAX_BYTES = int(os.getenv("ATTACHMENT_MAX_MB", "50")) * 1024 * 1024
+DOWNLOAD_TIMEOUT = 60  # seconds per file
+CHUNK_SIZE = 64 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attachments (
+    id TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    content_type TEXT,
+    filename TEXT,
+    fetched_at REAL NOT NULL
+);
+"""
+
+def connect():
+    conn = announcement_store.connect()
+    conn.executescript(SCHEMA)
+    return conn
+
+def attachment_id(att):
+    """KTU attachment id from a scraped attachment record (None if it has none)"""
+    match = re.match(r"#attachment-(.+)$", att.get("href") or "")
+    return match.group(1) if match else None
+
+def attachment_titles(announcements):
+    """{id: title} for every attachment in a list of announcements"""
+    titles = {}
+    for item in announcements:
+        for att in item.get("attachments") or []:
+            att_id = attachment_id(att)
+            if att_id:
+                titles.setdefault(att_id, att.get("title") or att_id)
+    return titles
+
+def blob_path(sha256):
+    return os.path.join(ATTACHMENT_DIR, sha256[:2], sha256)
+
+def lookup(att_id):
+    """Stored metadata for an attachment id, or None if not downloaded yet"""
+    conn = connect()
+    try:
+        row = conn.execute("SELECT * FROM attachments WHERE id = ?", (att_id,)).fetchone()
+    finally:
+        conn.close()
+    if row is None or not os.path.exists(blob_path(row["sha256"])):
+        return None
+    return dict(row, path=os.path.abspath(blob_path(row["sha256"])))
+
+def filename_from_headers(headers, fallback):
+    disposition = headers.get("Content-Disposition") or ""
+    match = re.search(r'filename\*?=(?:UTF-8\'\')?"?([^";]+)"?', disposition)
+    if match:
+        return os.path.basename(match.group(1).strip())
+    name = re.sub(r"[^\w.\- ]+", "_", fallback).strip() or "attachment"
+    return name if "." in name else name + ".pdf"
+
+def download(session, att_id, title):
+    """Download one attachment into the content-addressed store and record it"""
+    os.makedirs(ATTACHMENT_DIR, exist_ok=True)
+    resp = session.post(
+        ktu_api_client.KTU_API_BASE + ATTACHMENT_PATH,
+        json={"encryptId": att_id},
+        headers={"Accept": "*/*"},
+        timeout=DOWNLOAD_TIMEOUT,
+        stream=True
+    )
+    try:
+        resp.raise_for_status()
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=ATTACHMENT_DIR, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in resp.iter_content(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > ATTACHMENT_MAX_BYTES:
+                        raise ValueError(f"attachment larger than {ATTACHMENT_MAX_BYTES} bytes")
+                    digest.update(chunk)
+                    f.write(chunk)
+            sha256 = digest.hexdigest()
+            os.makedirs(os.path.dirname(blob_path(sha256)), exist_ok=True)
+            os.replace(tmp_path, blob_path(sha256))  # identical content shares one file
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        content_type = (resp.headers.get("Content-Type") or "application/octet-stream").split(";")[0]
+        filename = filename_from_headers(resp.headers, title)
+    finally:
+        resp.close()
+
+    conn = connect()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO attachments (id, sha256, size, content_type, filename, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (att_id, sha256, size, content_type, filename, time.time())
+            )
+    finally:
+        conn.close()
+    return sha256
+
+def resolve_new(announcements):
+    """Download attachments not seen before; returns (downloaded, failed) counts"""
+    titles = attachment_titles(announcements)
+    if not titles:
+        return 0, 0
+    conn = connect()
+    try:
+        known = {row["id"] for row in conn.execute("SELECT id FROM attachments")}
+    finally:
+        conn.close()
+    pending = {att_id: title for att_id, title in titles.items() if att_id not in known}
+    if not pending:
+        return 0, 0
+
+    print(f"Downloading {len(pending)} new attachments with {ATTACHMENT_WORKERS} workers")
+    session = ktu_api_client.make_session(pool_maxsize=ATTACHMENT_WORKERS)
+    downloaded = failed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=ATTACHMENT_WORKERS) as pool:
+            futures = {pool.submit(download, session, att_id, title): att_id for att_id, title in pending.items()}
+            for future, att_id in futures.items():
+                try:
+                    future.result()
+                    downloaded += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"Failed to download attachment {att_id}: {e}")
+    finally:
+        session.close()
+    return downloaded, failed
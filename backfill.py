@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# backfill.py
+"""
+Resumable, low-priority historical backfill.
+
+The live scrape stops after MAX_PAGES pages, but KTU keeps listing older
+announcements further back. With BACKFILL=true the leader walks those pages
+(up to BACKFILL_MAX_PAGES) through the JSON API on a background thread, one
+page every BACKFILL_PAGE_DELAY seconds, and adds each page to the segmented
+archive (archive.py) and the SQLite store (so /api/ktu/search covers them
+too).
+
+The next page to fetch is checkpointed in the SQLite store after every
+page, so a crash, deploy or leader change resumes where it stopped. New
+postings push older announcements further back while the walk is under
+way, so a resume starts one page before the checkpoint; fingerprints keep
+the overlap from being stored twice.
+
+Live refreshes always win: before every page the backfill waits while a
+refresh job is queued or running, and it never holds the scraper.
+"""
+
+import os
+import threading
+import time
+import announcement_store
+import archive
+import ktu_api_client
+
+BACKFILL = os.getenv("BACKFILL", "false").lower() == "true"  # opt in: it walks a lot of upstream pages
+LIVE_PAGES = int(os.getenv("MAX_PAGES", "3"))  # pages the live scrape covers; the backfill starts after them
+BACKFILL_PAGE_DELAY = float(os.getenv("BACKFILL_PAGE_DELAY", "10"))  # seconds between pages
+BACKFILL_MAX_PAGES = int(os.getenv("BACKFILL_MAX_PAGES", "100"))  # stop after this page (0 = walk to the end)
+BACKFILL_ERROR_DELAY = 300  # wait after a failed page before trying it again
+BACKFILL_RESTART_HOURS = 24 * 7  # walk everything again this long after finishing
+BUSY_POLL_SECONDS = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS backfill_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    next_page INTEGER NOT NULL,
+    pages_done INTEGER NOT NULL DEFAULT 0,
+    announcements INTEGER NOT NULL DEFAULT 0,
+    finished_at REAL,
+    last_error TEXT,
+    updated_at REAL NOT NULL
+);
+"""
+
+def connect():
+    conn = announcement_store.connect()
+    conn.executescript(SCHEMA)
+    return conn
+
+def load_state():
+    """The checkpoint as a dict, or None before the first page"""
+    conn = connect()
+    try:
+        row = conn.execute("SELECT * FROM backfill_state WHERE id = 1").fetchone()
+    finally:
+        conn.close()
+    return dict(row) if row else None
+
+def save_state(state):
+    conn = connect()
+    try:
+        with conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO backfill_state
+                   (id, next_page, pages_done, announcements, finished_at, last_error, updated_at)
+                   VALUES (1, ?, ?, ?, ?, ?, ?)""",
+                (state["next_page"], state["pages_done"], state["announcements"],
+                 state["finished_at"], state["last_error"], time.time())
+            )
+    finally:
+        conn.close()
+
+class Backfill:
+    """Walks older pages on a background thread (leader only)
+
+    first_page is the first page beyond the live scrape (0-based);
+    busy() returns True while a live refresh is queued or running.
+    """
+
+    def __init__(self, first_page, busy, on_page=None):
+        self.first_page = first_page
+        self.busy = busy
+        self.on_page = on_page  # callback(ok, announcements added)
+        self.session = None
+
+    def start(self):
+        threading.Thread(target=self._loop, daemon=True).start()
+        return self
+
+    def _loop(self):
+        state = load_state()
+        if state is None:
+            state = {"next_page": self.first_page, "pages_done": 0, "announcements": 0,
+                     "finished_at": None, "last_error": None}
+        else:
+            state["next_page"] = max(self.first_page, state["next_page"] - 1)  # one page of overlap
+        while True:
+            if state["finished_at"]:
+                wait = state["finished_at"] + BACKFILL_RESTART_HOURS * 3600 - time.time()
+                if wait > 0:
+                    time.sleep(min(wait, 3600))
+                    continue
+                print("Backfill: starting another pass over the older pages")
+                state.update(next_page=self.first_page, finished_at=None)
+            time.sleep(BACKFILL_PAGE_DELAY)
+            while self.busy():
+                time.sleep(BUSY_POLL_SECONDS)
+            try:
+                added = self.fetch_page(state)
+            except Exception as e:
+                state["last_error"] = f"page {state['next_page'] + 1}: {e}"
+                print(f"Backfill: {state['last_error']} - retrying in {BACKFILL_ERROR_DELAY}s")
+                save_state(state)
+                if self.on_page:
+                    self.on_page(False, 0)
+                time.sleep(BACKFILL_ERROR_DELAY)
+                continue
+            if self.on_page:
+                self.on_page(True, added)
+
+    def fetch_page(self, state):
+        """Fetch, archive and store one page, then move the checkpoint past it; returns the number added"""
+        if self.session is None:
+            self.session = ktu_api_client.make_session(pool_maxsize=1)
+        page_num = state["next_page"]
+        page = ktu_api_client.fetch_page(self.session, page_num)
+        items = [ktu_api_client.map_announcement(item) for item in ktu_api_client.page_items(page)]
+        items = [item for item in items if item["title"]]
+        added = 0
+        if items:
+            added = archive.add(items)
+            announcement_store.save_announcements(items)
+            state["announcements"] += added
+        last = page.get("last") if isinstance(page, dict) else None
+        state.update(next_page=page_num + 1, pages_done=state["pages_done"] + 1, last_error=None)
+        if not items or last or (BACKFILL_MAX_PAGES and page_num + 1 >= BACKFILL_MAX_PAGES):
+            state["finished_at"] = time.time()
+            print(f"Backfill: reached page {page_num + 1}, history complete "
+                  f"({state['announcements']} announcements archived)")
+        save_state(state)
+        return added
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmarks against the local stand-in KTU site (no network needed).
+
+  scrape  full scrape + save through ktu_scrape_site, wall time and time per
+          phase (driver_start, page_load, parse, api_fetch, save) for the API
+          engine and, when Chrome is available, the Selenium engine; plus the
+          change probe that lets unchanged scheduled runs skip all of that
+  parse   scrape_page throughput as the number of pages grows
+  server  server.py under gunicorn (as in the Dockerfile): cold start to the
+          first 200 and the startup phases from /ready, then p50/p99 latency,
+          requests/sec and response bytes per endpoint, with concurrent clients
+  webhooks  outbox delivery to local receivers (fast, slow, failing at
+          first): enqueue cost, time until every receiver has everything,
+          connections used, and a check that a dispatcher restart neither
+          resends nor drops announcements
+
+Everything runs in a temporary directory, so snapshots, the SQLite store and
+attachments of the real deployment are never touched. Results are printed
+and written as flat JSON metrics (--output) so runs on different commits can
+be compared with --compare.
+
+Usage:
+  python benchmarks/bench_e2e.py [--only scrape,parse,server,webhooks] [--output FILE]
+                                 [--compare OLD.json] [--max-regression PCT]
+"""
+
+import argparse
+import contextlib
+import glob
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+import stand_in  # noqa: E402
+import webhook_receiver  # noqa: E402
+
+SECTIONS = ("scrape", "parse", "server", "webhooks")
+WEBHOOK_RECEIVERS = (
+    # (name, latency ms, failed requests before the first 2xx)
+    ("fast", 0, 0),
+    ("slow", 200, 0),
+    ("flaky", 0, 3),
+)
+WEBHOOK_DEADLINE_SECONDS = 60
+PARSE_PAGE_COUNTS = (1, 5, 10, 25, 50)
+SERVER_STARTUP_SECONDS = 30
+ENDPOINTS = [
+    # (metric name, path, request headers)
+    ("announcements", "/api/ktu/announcements", {"Accept-Encoding": "identity"}),
+    ("announcements_gzip", "/api/ktu/announcements", {"Accept-Encoding": "gzip"}),
+    ("announcements_page", "/api/ktu/announcements?limit=10&fields=title,date", {"Accept-Encoding": "identity"}),
+    ("search", "/api/ktu/search?q=examination", {"Accept-Encoding": "identity"}),
+    ("status", "/api/ktu/status", {}),
+    ("health", "/health", {}),
+]
+
+def median(values):
+    ordered = sorted(values)
+    mid = len(ordered) // 2
+    return ordered[mid] if len(ordered) % 2 else (ordered[mid - 1] + ordered[mid]) / 2
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+@contextlib.contextmanager
+def quiet(enabled=True):
+    """Swallow the scraper's progress output while timing it"""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def chrome_available(ktu_scrape_site):
+    try:
+        ktu_scrape_site.make_driver(headless=True).quit()
+        return True
+    except Exception as e:
+        print(f"Chrome not available - skipping the selenium engine ({str(e).splitlines()[0]})")
+        return False
+
+def bench_scrape(args, metrics):
+    import ktu_scrape_site
+
+    ktu_scrape_site.INCREMENTAL = False  # every round is a full scrape
+    ktu_scrape_site.MAX_PAGES = args.pages
+    engines = [e for e in args.engines.split(",") if e]
+    if "selenium" in engines and not chrome_available(ktu_scrape_site):
+        engines.remove("selenium")
+
+    for engine in engines:
+        ktu_scrape_site.SCRAPER_ENGINE = engine
+        walls, phases = [], {}
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            with quiet(not args.verbose):
+                result = ktu_scrape_site.scrape()
+                ktu_scrape_site.save_result(result)
+            walls.append(time.perf_counter() - started)
+            for phase, seconds in ktu_scrape_site.phase_seconds.items():
+                phases.setdefault(phase, []).append(seconds)
+
+        prefix = f"scrape.{engine}"
+        metrics[f"{prefix}.wall_seconds"] = round(median(walls), 4)
+        for phase, values in sorted(phases.items()):
+            metrics[f"{prefix}.{phase}_seconds"] = round(median(values), 4)
+        metrics[f"{prefix}.announcements"] = result["count"]
+
+    import change_probe
+    walls = []
+    for _ in range(args.rounds):
+        started = time.perf_counter()
+        outcome, reason = change_probe.probe(result)
+        walls.append(time.perf_counter() - started)
+        if outcome != "unchanged":
+            print(f"Change probe did not match the fresh snapshot: {outcome} ({reason})")
+    metrics["scrape.probe.wall_seconds"] = round(median(walls), 4)
+
+class RecordedPage:
+    """Stands in for a WebDriver that has a recorded page loaded"""
+
+    def __init__(self, page_source):
+        self.page_source = page_source
+
+def bench_parse(args, metrics):
+    import ktu_scrape_site
+
+    sources = []
+    for path in sorted(glob.glob(os.path.join(BENCH_DIR, "fixtures", "announcements_page*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            sources.append(f.read())
+
+    for count in PARSE_PAGE_COUNTS:
+        pages = [RecordedPage(sources[i % len(sources)]) for i in range(count)]
+        ktu_scrape_site.scrape_page(pages[0])  # warm up
+        times = []
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            for page in pages:
+                ktu_scrape_site.scrape_page(page)
+            times.append(time.perf_counter() - started)
+        elapsed = median(times)
+        metrics[f"parse.pages_{count}.pages_per_sec"] = round(count / elapsed, 1)
+        metrics[f"parse.pages_{count}.ms_per_page"] = round(elapsed * 1000 / count, 3)
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def server_command(port, workers):
+    if importlib.util.find_spec("gunicorn"):
+        return [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{port}",
+                "--workers", str(workers), "--threads", "32", "--worker-class", "gthread",
+                "--log-level", "warning", "server:app"]
+    print("gunicorn not installed - benchmarking the Flask development server")
+    return [sys.executable, "-c",
+            f"import server; server.app.run(host='127.0.0.1', port={port}, threaded=True)"]
+
+def wait_until_up(session, base_url, proc):
+    deadline = time.time() + SERVER_STARTUP_SECONDS
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("server exited during startup - see server.log in the work directory")
+        try:
+            if session.get(base_url + "/api/ktu/announcements", timeout=2).status_code == 200:
+                return
+        except Exception:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError(f"server did not serve announcements within {SERVER_STARTUP_SECONDS}s")
+
+def startup_phases(session, base_url):
+    """Startup phase timings from /ready once the deferred startup is done (empty on older servers)"""
+    deadline = time.time() + SERVER_STARTUP_SECONDS
+    while time.time() < deadline:
+        resp = session.get(base_url + "/ready", timeout=5)
+        if resp.status_code == 404:
+            return {}
+        body = resp.json()
+        if body.get("startup_completed"):
+            return body.get("startup_phase_seconds") or {}
+        time.sleep(0.1)
+    return {}
+
+def run_load(url, headers, total, concurrency):
+    """Fire `total` GETs from `concurrency` keep-alive clients; returns (latencies, wall, bytes)"""
+    import requests
+
+    def client(count):
+        session = requests.Session()
+        latencies, size = [], 0
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                resp = session.get(url, headers=headers, timeout=30)
+                body = resp.content
+                latencies.append(time.perf_counter() - started)
+                resp.raise_for_status()
+                size = int(resp.headers.get("Content-Length") or len(body))
+        finally:
+            session.close()
+        return latencies, size
+
+    shares = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, [2] * concurrency))  # warm up the server
+        started = time.perf_counter()
+        results = list(pool.map(client, shares))
+        wall = time.perf_counter() - started
+    latencies = [lat for lats, _ in results for lat in lats]
+    return latencies, wall, max(size for _, size in results)
+
+def bench_server(args, metrics):
+    import requests
+    import ktu_api_client
+    import snapshot_files
+
+    if snapshot_files.read_current() is None:  # --only server: publish the fixtures first
+        announcements = ktu_api_client.fetch_announcements(args.pages)
+        snapshot_files.publish({
+            "fetched_at": datetime.utcnow().isoformat() + "Z",
+            "count": len(announcements),
+            "announcements": announcements
+        })
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, SCRAPER_ENGINE="api",
+               PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+    with open("server.log", "w") as log:
+        started = time.perf_counter()
+        proc = subprocess.Popen(server_command(port, args.server_workers), env=env,
+                                stdout=log, stderr=subprocess.STDOUT)
+    try:
+        with requests.Session() as session:
+            wait_until_up(session, base_url, proc)
+            metrics["server.cold_start.first_200_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            for phase, seconds in startup_phases(session, base_url).items():
+                metrics[f"server.startup.{phase}_ms"] = round(seconds * 1000, 3)
+        for name, path, headers in ENDPOINTS:
+            latencies, wall, size = run_load(base_url + path, headers, args.requests, args.concurrency)
+            prefix = f"server.{name}"
+            metrics[f"{prefix}.p50_ms"] = round(percentile(latencies, 50) * 1000, 3)
+            metrics[f"{prefix}.p99_ms"] = round(percentile(latencies, 99) * 1000, 3)
+            metrics[f"{prefix}.requests_per_sec"] = round(len(latencies) / wall, 1)
+            metrics[f"{prefix}.response_bytes"] = size
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+def fake_announcements(count, offset=0):
+    """Distinct announcements built from the recorded API fixtures"""
+    import ktu_api_client
+
+    base = [ktu_api_client.map_announcement(item) for page in stand_in.load_api_pages()
+            for item in ktu_api_client.page_items(page)]
+    return [dict(base[i % len(base)], title=f"{base[i % len(base)]['title']} #{i}")
+            for i in range(offset, offset + count)]
+
+def drain(dispatcher):
+    """Run dispatch rounds until every subscriber has acknowledged the whole outbox"""
+    import webhooks
+
+    deadline = time.time() + WEBHOOK_DEADLINE_SECONDS
+    while time.time() < deadline:
+        dispatcher.dispatch_due()
+        if not dispatcher.in_flight and all(s["pending"] == 0 for s in webhooks.subscribers()):
+            return
+        time.sleep(0.02)
+    raise RuntimeError(f"webhooks not delivered within {WEBHOOK_DEADLINE_SECONDS}s")
+
+def bench_webhooks(args, metrics):
+    """Two delivery rounds with a new Dispatcher in between, as after a restart"""
+    import webhooks
+
+    webhooks.WEBHOOK_BACKOFF_SECONDS = 0.1  # keep the flaky receiver's retries short
+    receivers = []
+    for name, latency_ms, fail_first in WEBHOOK_RECEIVERS:
+        server, receiver, url = webhook_receiver.start(latency_ms=latency_ms, fail_first=fail_first)
+        webhooks.subscribe(url)
+        receivers.append((name, server, receiver))
+
+    half = args.webhook_announcements // 2
+    expected = []
+    try:
+        for round_num, count in enumerate((half, args.webhook_announcements - half)):
+            batch = fake_announcements(count, offset=len(expected))
+            started = time.perf_counter()
+            webhooks.enqueue(batch)
+            metrics[f"webhooks.round{round_num + 1}.enqueue_seconds"] = round(time.perf_counter() - started, 4)
+            expected.extend(batch)
+
+            started = time.perf_counter()
+            drain(webhooks.Dispatcher())  # a fresh dispatcher each round: only the cursors carry over
+            metrics[f"webhooks.round{round_num + 1}.deliver_seconds"] = round(time.perf_counter() - started, 4)
+    finally:
+        for _, server, _ in receivers:
+            server.shutdown()
+
+    from announcement_store import fingerprint
+    want = [fingerprint(item) for item in expected]
+    for name, _, receiver in receivers:
+        got = receiver.fingerprints()
+        if sorted(got) != sorted(want):
+            dupes, missing = len(got) - len(set(got)), len(set(want) - set(got))
+            raise RuntimeError(f"receiver {name}: {dupes} duplicates, {missing} missing")
+        metrics[f"webhooks.{name}.requests"] = receiver.requests
+        metrics[f"webhooks.{name}.connections"] = len(receiver.client_ports)
+    print(f"Webhooks: {len(want)} announcements delivered exactly once to {len(receivers)} receivers")
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def direction(metric):
+    """+1 if higher is better, -1 if lower is better, 0 if neither"""
+    if metric.endswith("_per_sec"):
+        return 1
+    if metric.endswith(("_seconds", "_ms", "_bytes", "ms_per_page")):
+        return -1
+    return 0
+
+def compare(old_path, metrics, max_regression):
+    """Print changes against an earlier result file; returns the number of regressions"""
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    print(f"\nCompared with {old_path} (commit {old.get('commit')}):")
+    print(f"{'metric':<48} {'old':>12} {'new':>12} {'change':>9}")
+    regressions = 0
+    for metric in sorted(set(old["metrics"]) | set(metrics)):
+        before, after = old["metrics"].get(metric), metrics.get(metric)
+        if before is None or after is None:
+            print(f"{metric:<48} {str(before):>12} {str(after):>12} {'':>9}")
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        flag = ""
+        if direction(metric) and change * direction(metric) < -max_regression:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{metric:<48} {before:>12} {after:>12} {change:>+8.1f}%{flag}")
+    return regressions
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--only", default=",".join(SECTIONS), help="comma-separated sections to run")
+    ap.add_argument("--engines", default="api,selenium", help="scrape engines to time")
+    ap.add_argument("--pages", type=int, default=3, help="pages served by the stand-in / scraped")
+    ap.add_argument("--latency-ms", type=int, default=0, help="stand-in response/render delay")
+    ap.add_argument("--rounds", type=int, default=5, help="repetitions per scrape/parse measurement")
+    ap.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    ap.add_argument("--concurrency", type=int, default=8, help="concurrent clients per endpoint")
+    ap.add_argument("--server-workers", type=int, default=1, help="gunicorn workers")
+    ap.add_argument("--webhook-announcements", type=int, default=200, help="announcements pushed to each receiver")
+    ap.add_argument("--output", default="bench_results.json", help="where to write the JSON results")
+    ap.add_argument("--compare", help="earlier results file to compare against")
+    ap.add_argument("--max-regression", type=float, default=10.0,
+                    help="percent change in the wrong direction reported as a regression")
+    ap.add_argument("--keep-workdir", action="store_true", help="keep the temporary work directory")
+    ap.add_argument("--verbose", action="store_true", help="show scraper output")
+    args = ap.parse_args()
+
+    sections = [s for s in args.only.split(",") if s]
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        sys.exit(f"Unknown sections: {', '.join(sorted(unknown))}")
+    output = os.path.abspath(args.output)
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+
+    server, site_url = stand_in.start(pages=args.pages, latency_ms=args.latency_ms)
+    os.environ["KTU_URL"] = site_url + stand_in.LISTING_PATH
+    os.environ["KTU_API_BASE"] = site_url + stand_in.API_PREFIX
+    workdir = tempfile.mkdtemp(prefix="ktu-bench-")
+    os.chdir(workdir)
+    print(f"Stand-in site at {site_url}, working in {workdir}")
+
+    metrics = {}
+    runners = {"scrape": bench_scrape, "parse": bench_parse, "server": bench_server, "webhooks": bench_webhooks}
+    try:
+        for section in SECTIONS:
+            if section in sections:
+                print(f"Running {section} benchmarks...")
+                runners[section](args, metrics)
+    finally:
+        server.shutdown()
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{'metric':<48} {'value':>12}")
+    for metric, value in metrics.items():
+        print(f"{metric:<48} {value:>12}")
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "verbose")},
+        "metrics": metrics
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {output}")
+
+    if compare_path and compare(compare_path, metrics, args.max_regression):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Benchmark DOM extraction in Chrome over the saved KTU page fixtures.
+
+Loads every fixture page in headless Chrome and times, per page:
+
+  per-element       the old DOM fallback: find_element / get_attribute / .text
+                    for every field of every block, one WebDriver round trip each
+  dom script        ktu_scrape_site.extract_from_dom, the same XPaths in one
+                    execute_script call
+  page_source+soup  scrape_page's default route: driver.page_source, then
+                    parse_announcements (BeautifulSoup)
+  ktu script        ktu_scrape_site.extract_announcements (EXTRACT_MODE=script),
+                    parse_announcements' fields in one execute_script call
+
+Reports ms/page and WebDriver round trips/page, and checks that each script
+returns exactly what the route it replaces returns.
+
+Requires Chrome (and chromedriver, see CHROMEDRIVER_PATH).
+
+Usage:
+  python benchmarks/bench_extract.py [--rounds N]
+"""
+
+import argparse
+import glob
+import os
+import pathlib
+import sys
+import time
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import ktu_scrape_site  # noqa: E402
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "announcements_page*.html")))
+
+ATTACHMENT_XPATH = (".//a[contains(@href,'/eu/att/') or contains(text(),'Notification') or contains(text(),'Circular') "
+                    "or contains(@href,'att') or contains(@href,'/eu/') ]")
+
+def per_element_attachments(block):
+    """extract_attachments_from_block before the script version"""
+    attachments = []
+    try:
+        for a in block.find_elements(By.XPATH, ATTACHMENT_XPATH):
+            href = a.get_attribute("href")
+            text = a.text.strip()
+            if href:
+                attachments.append({"title": text or os.path.basename(href), "href": href})
+    except Exception:
+        pass
+    return attachments
+
+def per_element_extract(driver):
+    """extract_from_dom before the script version (structured blocks and the anchor fallback)"""
+    results = []
+    blocks = driver.find_elements(By.XPATH, "//div[contains(@class,'announcement')] | //div[contains(@class,'card') and .//h4]")
+    if not blocks:
+        anchors = driver.find_elements(By.XPATH, "//h4/a | //div[@class='content']//a[contains(@href,'/eu/att') or contains(@href,'notification')]")
+        for a in anchors:
+            try:
+                parent = a.find_element(By.XPATH, "./ancestor::div[1]")
+                date = ""
+                try:
+                    date = parent.find_element(By.XPATH, ".//span[contains(@class,'date')] | .//p[contains(@class,'date')] | .//small").text.strip()
+                except Exception:
+                    pass
+                msg_html = ""
+                try:
+                    msg_html = parent.find_element(By.XPATH, ".//p").get_attribute("innerHTML")
+                except Exception:
+                    pass
+                results.append({"title": a.text.strip(), "link": a.get_attribute("href"), "date": date,
+                                "message_html": msg_html, "attachments": per_element_attachments(parent)})
+            except Exception:
+                continue
+        return results
+
+    for b in blocks:
+        try:
+            title_el = b.find_element(By.XPATH, ".//h4/a")
+        except NoSuchElementException:
+            try:
+                title_el = b.find_element(By.XPATH, ".//a[1]")
+            except Exception:
+                title_el = None
+        title = title_el.text.strip() if title_el else ""
+        link = (title_el.get_attribute("href") or "") if title_el else ""
+        try:
+            date_text = b.find_element(By.XPATH, ".//span[contains(@class,'date')] | .//p[contains(@class,'date')] | .//small | .//h4/following-sibling::*[1]").text.strip()
+        except Exception:
+            try:
+                date_text = b.find_element(By.XPATH, ".//p[contains(@class,'announcementDate')]").text.strip()
+            except Exception:
+                date_text = ""
+        try:
+            message_html = b.find_element(By.XPATH, ".//div[contains(@class,'message')] | .//p").get_attribute("innerHTML").strip()
+        except Exception:
+            message_html = ""
+        results.append({"title": title, "link": link, "date": date_text,
+                        "message_html": message_html, "attachments": per_element_attachments(b)})
+    return results
+
+MODES = [
+    ("per-element", per_element_extract, None),
+    ("dom script", ktu_scrape_site.extract_from_dom, "per-element"),
+    ("page_source+soup", lambda driver: ktu_scrape_site.parse_announcements(driver.page_source), None),
+    ("ktu script", ktu_scrape_site.extract_announcements, "page_source+soup"),
+]
+
+def count_round_trips(driver):
+    """Wrap driver.execute (every WebDriver command, elements included) with a counter"""
+    counter = {"calls": 0}
+    execute = driver.execute
+
+    def counted(*args, **kwargs):
+        counter["calls"] += 1
+        return execute(*args, **kwargs)
+
+    driver.execute = counted
+    return counter
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rounds", type=int, default=10, help="extractions per page and mode")
+    args = ap.parse_args()
+    if not FIXTURES:
+        sys.exit("No fixtures found in benchmarks/fixtures")
+
+    driver = ktu_scrape_site.make_driver(headless=True)
+    counter = count_round_trips(driver)
+    totals = {name: [0.0, 0] for name, _, _ in MODES}
+    mismatches = {name: 0 for name, _, _ in MODES}
+    try:
+        for path in FIXTURES:
+            driver.get(pathlib.Path(path).as_uri())
+            outputs = {}
+            for name, extract, _ in MODES:
+                outputs[name] = extract(driver)  # warm up
+                counter["calls"] = 0
+                started = time.perf_counter()
+                for _ in range(args.rounds):
+                    extract(driver)
+                totals[name][0] += time.perf_counter() - started
+                totals[name][1] += counter["calls"]
+            for name, _, reference in MODES:
+                if reference and outputs[name] != outputs[reference]:
+                    mismatches[name] += 1
+                    print(f"{os.path.basename(path)}: {name} differs from {reference}")
+    finally:
+        driver.quit()
+
+    runs = len(FIXTURES) * args.rounds
+    print(f"\n{len(FIXTURES)} fixture pages, {args.rounds} rounds\n")
+    print(f"{'mode':<18} {'ms/page':>9} {'round trips':>12}  same output as")
+    for name, _, reference in MODES:
+        seconds, calls = totals[name]
+        same = f"{reference}: {'yes' if not mismatches[name] else 'NO'}" if reference else "-"
+        print(f"{name:<18} {1000 * seconds / runs:>9.2f} {calls / runs:>12.1f}  {same}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark announcement page parsing over the saved KTU page fixtures.
+
+Compares the legacy path (whole page into BeautifulSoup, then a second parse
+of every message_html for message_text) with the single-pass strained parser
+in ktu_scrape_site.parse_announcements, for each available parser backend.
+Reports pages/sec and peak Python memory (tracemalloc) per backend.
+
+Usage:
+  python benchmarks/bench_parse.py [--rounds N]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import ktu_scrape_site  # noqa: E402
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "announcements_page*.html")))
+
+def legacy_parse(page_source, parser):
+    """Full-page parse followed by a second parse per message (pre-strainer behaviour)"""
+    items = ktu_scrape_site.parse_announcements(page_source, parser, strainer=None)
+    for item in items:
+        item["message_text"] = BeautifulSoup(item["message_html"], "html.parser").get_text(separator="\n").strip()
+    return items
+
+def available_backends():
+    backends = [("html.parser", "full+reparse", lambda html: legacy_parse(html, "html.parser")),
+                ("html.parser", "strained", lambda html: ktu_scrape_site.parse_announcements(html, "html.parser"))]
+    try:
+        import lxml  # noqa: F401
+        backends += [("lxml", "full+reparse", lambda html: legacy_parse(html, "lxml")),
+                     ("lxml", "strained", lambda html: ktu_scrape_site.parse_announcements(html, "lxml"))]
+    except ImportError:
+        print("lxml not installed - skipping lxml backend")
+    return backends
+
+def bench(parse, pages, rounds):
+    """Return (pages/sec, peak MB) for parsing every page `rounds` times"""
+    parse(pages[0])  # warm up imports/caches
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for html in pages:
+            parse(html)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    for html in pages:
+        parse(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (rounds * len(pages)) / elapsed, peak / (1024 * 1024)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rounds", type=int, default=20, help="passes over the fixture set")
+    args = ap.parse_args()
+
+    pages = []
+    for path in FIXTURES:
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(f.read())
+    if not pages:
+        sys.exit("No fixtures found in benchmarks/fixtures")
+
+    print(f"{len(pages)} fixture pages, {args.rounds} rounds\n")
+    print(f"{'backend':<12} {'mode':<14} {'pages/sec':>10} {'peak MB':>9}")
+    for backend, mode, parse in available_backends():
+        rate, peak = bench(parse, pages, args.rounds)
+        print(f"{backend:<12} {mode:<14} {rate:>10.1f} {peak:>9.2f}")
+
+if __name__ == "__main__":
+    main()
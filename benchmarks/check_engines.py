@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Check that the API and Selenium engines produce the same records.
+
+Maps every recorded API page (benchmarks/fixtures/api_page*.json) with
+ktu_api_client.map_announcement and parses the matching listing page
+(announcements_page*.html) with ktu_scrape_site.parse_announcements, then
+compares the records field by field, fingerprints included. Both engines
+must agree, or an engine fallback shows up as every announcement being
+removed and added again.
+
+Exits with status 1 on any difference.
+
+Usage:
+  python benchmarks/check_engines.py
+"""
+
+import glob
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import ktu_api_client  # noqa: E402
+import ktu_scrape_site  # noqa: E402
+from announcement_store import fingerprint  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def compare(page_num):
+    """Differences between both engines' records for one fixture page"""
+    with open(os.path.join(FIXTURE_DIR, f"api_page{page_num}.json"), "r", encoding="utf-8") as f:
+        api = [ktu_api_client.map_announcement(item) for item in ktu_api_client.page_items(json.load(f))]
+    with open(os.path.join(FIXTURE_DIR, f"announcements_page{page_num}.html"), "r", encoding="utf-8") as f:
+        page = ktu_scrape_site.parse_announcements(f.read())
+
+    problems = []
+    if len(api) != len(page):
+        problems.append(f"{len(api)} API records, {len(page)} page records")
+    for i, (a, p) in enumerate(zip(api, page)):
+        for field in sorted(set(a) | set(p)):
+            if a.get(field) != p.get(field):
+                problems.append(f"item {i + 1} {field}: API {a.get(field)!r:.80} != page {p.get(field)!r:.80}")
+        if fingerprint(a) != fingerprint(p):
+            problems.append(f"item {i + 1}: fingerprints differ")
+    return problems
+
+def main():
+    pages = sorted(int(os.path.basename(p)[len("api_page"):-len(".json")])
+                   for p in glob.glob(os.path.join(FIXTURE_DIR, "api_page*.json")))
+    if not pages:
+        sys.exit("No fixtures found in benchmarks/fixtures")
+    failed = False
+    for page_num in pages:
+        problems = compare(page_num)
+        print(f"page {page_num}: {'ok' if not problems else f'{len(problems)} differences'}")
+        for problem in problems:
+            print(f"  {problem}")
+        failed = failed or bool(problems)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
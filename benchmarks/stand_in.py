@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the KTU site, serving the recorded fixtures.
+
+  GET  /Menu/announcements          JS-rendered listing with working pagination
+                                    (point KTU_URL here for the Selenium engine)
+  GET  /assets/...                  stylesheets, scripts, images and a font of
+                                    realistic size, referenced by the listing
+  POST /api/announcemnts            recorded API pages (KTU_API_BASE=<url>/api)
+  POST /api/getAttachment           deterministic attachment bytes
+  GET  /exam/notifications          a second listing (same fixtures, titles
+  POST /api/examNotifications       prefixed "Exam: ") for sources.py
+
+Pages past the recorded ones cycle through the fixtures again with the page
+number added to titles and attachment ids, so any page count can be served.
+--latency-ms delays every API response and every page render, to model
+KTU's own server time.
+
+Usage:
+  python benchmarks/stand_in.py [--port 8765] [--pages 3] [--latency-ms 0]
+"""
+
+import argparse
+import copy
+import glob
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from bs4 import BeautifulSoup
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+LISTING_PATH = "/Menu/announcements"
+API_PREFIX = "/api"
+EXAM_LISTING_PATH = "/exam/notifications"
+EXAM_API_PATH = "/examNotifications"
+EXAM_PREFIX = "Exam: "
+ATTACHMENT_BYTES = 64 * 1024
+
+# Assets the listing page references, like the real site: (content type, size, filler)
+ASSETS = {
+    "css": ("text/css", 40 * 1024, b"/* stand-in stylesheet */\n"),
+    "js": ("application/javascript", 30 * 1024, b"// stand-in script chunk\n"),
+    "jpg": ("image/jpeg", 80 * 1024, b"\xff\xd8\xff\xe0"),
+    "woff2": ("font/woff2", 40 * 1024, b"wOF2"),
+}
+ASSET_TAGS = "".join(
+    [f'<link rel="stylesheet" href="/assets/css/vendor{i}.css">' for i in range(8)]
+    + [f'<script src="/assets/js/chunk-{i}.js"></script>' for i in range(12)]
+    + ['<link rel="preload" as="font" type="font/woff2" href="/assets/fonts/ktu.woff2" crossorigin>']
+)
+IMAGE_TAGS = "".join(f'<img src="/assets/img/banner{i}.jpg" alt="">' for i in range(6))
+
+LISTING_TEMPLATE = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>Announcements (stand-in)</title>%(assets)s</head>
+<body>%(images)s<section class="announcements"><div id="list"></div><ul class="pagination" id="pager"></ul></section>
+<script>
+var PAGES = %(pages)s, LATENCY = %(latency)d, current = -1;
+function pager(n) {
+  var html = "";
+  for (var i = 0; i < PAGES.length; i++) {
+    html += '<li class="' + (i == n ? "active" : "") + '"><a>' + (i + 1) + "</a></li>";
+  }
+  if (n < PAGES.length - 1) html += '<li class="next"><a rel="next">&raquo;</a></li>';
+  return html;
+}
+function show(n) {
+  setTimeout(function () {
+    current = n;
+    document.getElementById("list").innerHTML = PAGES[n];
+    document.getElementById("pager").innerHTML = pager(n);
+  }, LATENCY);
+}
+document.getElementById("pager").addEventListener("click", function (e) {
+  var a = e.target.closest("a");
+  if (!a) return;
+  show(a.getAttribute("rel") == "next" ? current + 1 : parseInt(a.textContent, 10) - 1);
+});
+show(0);
+</script></body></html>
+"""
+
+def load_api_pages():
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "api_page*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(json.load(f))
+    return pages
+
+def load_listing_blocks():
+    """Announcement block HTML of each recorded page"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "announcements_page*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            soup = BeautifulSoup(f.read(), "html.parser")
+        pages.append("".join(str(block) for block in soup.select("div.row.m-b-25")))
+    return pages
+
+class StandIn:
+    """Fixture data for `pages` pages, expanded from the recorded ones"""
+
+    def __init__(self, pages=3, latency_ms=0):
+        self.latency = latency_ms / 1000.0
+        self.latency_ms = latency_ms
+        recorded = load_api_pages()
+        blocks = load_listing_blocks()
+        self.api_pages = []
+        self.listing_pages = []
+        for n in range(pages):
+            page = copy.deepcopy(recorded[n % len(recorded)])
+            html = blocks[n % len(blocks)]
+            if n >= len(recorded):
+                for item in page["content"]:
+                    item["subject"] += f" (p{n + 1})"
+                    for att in item.get("attachmentList") or []:
+                        att["encryptId"] += f"p{n + 1}"
+                html = self.relabel(html, n + 1)
+            page.update(number=n, totalPages=pages, first=n == 0, last=n == pages - 1)
+            self.api_pages.append(page)
+            self.listing_pages.append(html)
+        self.exam_api_pages = copy.deepcopy(self.api_pages)
+        for page in self.exam_api_pages:
+            for item in page["content"]:
+                item["subject"] = EXAM_PREFIX + item["subject"]
+        self.exam_listing_pages = [self.relabel(html, prefix=EXAM_PREFIX) for html in self.listing_pages]
+
+    @staticmethod
+    def relabel(html, page_num=None, prefix=""):
+        soup = BeautifulSoup(html, "html.parser")
+        suffix = f" (p{page_num})" if page_num else ""
+        for title in soup.select("h6.f-w-bold"):
+            title.string = prefix + title.get_text(strip=True) + suffix
+        if page_num:
+            for button in soup.select("button.btn[value]"):
+                button["value"] = button["value"] + f"p{page_num}"
+        return str(soup)
+
+    def listing_html(self, pages=None):
+        return LISTING_TEMPLATE % {
+            "assets": ASSET_TAGS,
+            "images": IMAGE_TAGS,
+            "pages": json.dumps(self.listing_pages if pages is None else pages),
+            "latency": self.latency_ms
+        }
+
+    @staticmethod
+    def asset(path):
+        """(content type, body) for an /assets/ path, or None"""
+        ext = path.rsplit(".", 1)[-1]
+        if not path.startswith("/assets/") or ext not in ASSETS:
+            return None
+        content_type, size, filler = ASSETS[ext]
+        return content_type, (filler * (size // len(filler) + 1))[:size]
+
+    def api_page(self, number, pages=None):
+        pages = self.api_pages if pages is None else pages
+        if 0 <= number < len(pages):
+            return pages[number]
+        return {"content": [], "number": number, "last": True}
+
+def make_handler(stand_in):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+
+        def send_body(self, status, body, content_type, headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            asset = stand_in.asset(path)
+            if path == LISTING_PATH:
+                self.send_body(200, stand_in.listing_html().encode("utf-8"), "text/html; charset=utf-8")
+            elif path == EXAM_LISTING_PATH:
+                html = stand_in.listing_html(stand_in.exam_listing_pages)
+                self.send_body(200, html.encode("utf-8"), "text/html; charset=utf-8")
+            elif asset is not None:
+                self.send_body(200, asset[1], asset[0], {"Cache-Control": "no-store"})
+            else:
+                self.send_body(404, b"not found", "text/plain")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(stand_in.latency)
+            if self.path == API_PREFIX + "/announcemnts":
+                payload = json.dumps(stand_in.api_page(int(body.get("number", 0)))).encode("utf-8")
+                self.send_body(200, payload, "application/json")
+            elif self.path == API_PREFIX + EXAM_API_PATH:
+                page = stand_in.api_page(int(body.get("number", 0)), stand_in.exam_api_pages)
+                self.send_body(200, json.dumps(page).encode("utf-8"), "application/json")
+            elif self.path == API_PREFIX + "/getAttachment":
+                att_id = str(body.get("encryptId", ""))
+                content = (b"%PDF-1.4\n" + att_id.encode("utf-8") * ATTACHMENT_BYTES)[:ATTACHMENT_BYTES]
+                self.send_body(200, content, "application/pdf",
+                               {"Content-Disposition": f'attachment; filename="{att_id}.pdf"'})
+            else:
+                self.send_body(404, b"{}", "application/json")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+def start(port=0, pages=3, latency_ms=0):
+    """Serve the stand-in on a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(StandIn(pages, latency_ms)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--pages", type=int, default=3, help="number of listing/API pages to serve")
+    ap.add_argument("--latency-ms", type=int, default=0, help="delay added to every response/render")
+    args = ap.parse_args()
+
+    server, base_url = start(args.port, args.pages, args.latency_ms)
+    print(f"Stand-in KTU site at {base_url}")
+    print(f"  KTU_URL={base_url}{LISTING_PATH}")
+    print(f"  KTU_API_BASE={base_url}{API_PREFIX}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Local stand-in webhook receiver, for testing outbox delivery offline.
+
+  POST /<anything>   records the batch and answers 204, after --latency-ms;
+                     the first --fail-first requests get a 503 instead
+
+Every batch is kept with its X-KTU-Delivery id and announcement
+fingerprints, together with the client port it arrived on, so callers can
+check for duplicates, drops and connection reuse.
+
+Usage:
+  python benchmarks/webhook_receiver.py [--port 8766] [--latency-ms 0] [--fail-first 0]
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class Receiver:
+    def __init__(self, latency_ms=0, fail_first=0):
+        self.latency = latency_ms / 1000.0
+        self.fail_first = fail_first
+        self.requests = 0
+        self.batches = []  # (delivery id, [fingerprints]) of acknowledged batches
+        self.client_ports = set()
+        self.lock = threading.Lock()
+
+    def handle(self, delivery, body, client_port):
+        """Status code for one POST"""
+        time.sleep(self.latency)
+        with self.lock:
+            self.requests += 1
+            self.client_ports.add(client_port)
+            if self.requests <= self.fail_first:
+                return 503
+            fingerprints = [a.get("fingerprint") for a in body.get("announcements") or []]
+            self.batches.append((delivery, fingerprints))
+        return 204
+
+    def fingerprints(self):
+        with self.lock:
+            return [fp for _, fps in self.batches for fp in fps]
+
+def make_handler(receiver):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                body = {}
+            status = receiver.handle(self.headers.get("X-KTU-Delivery"), body, self.client_address[1])
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+def start(port=0, latency_ms=0, fail_first=0):
+    """Serve a receiver on a background thread; returns (server, receiver, url)"""
+    receiver = Receiver(latency_ms, fail_first)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(receiver))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, receiver, f"http://127.0.0.1:{server.server_address[1]}/hook"
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--latency-ms", type=int, default=0, help="delay before answering each batch")
+    ap.add_argument("--fail-first", type=int, default=0, help="answer 503 to this many requests first")
+    args = ap.parse_args()
+
+    server, receiver, url = start(args.port, args.latency_ms, args.fail_first)
+    print(f"Webhook receiver at {url}")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"{receiver.requests} requests, {len(receiver.fingerprints())} announcements, "
+                  f"{len(receiver.client_ports)} connections")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# change_feed.py
+"""
+Versioned change feed for announcement snapshots.
+
+Every installed snapshot that differs from the previous one gets the next
+version number and a stored delta (added / changed / removed). Versions are
+kept in the SQLite store (AUTOINCREMENT, so they never go backwards, even
+across restarts) and the last MAX_HISTORY deltas are retained for
+/api/ktu/changes and the SSE stream.
+"""
+
+import json
+import threading
+import time
+import announcement_store
+from announcement_store import fingerprint
+
+MAX_HISTORY = 200  # deltas kept; older "since" values must resync from the full list
+CONTENT_FIELDS = ("title", "link", "date", "message_html", "message_text", "attachments")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    delta TEXT NOT NULL
+);
+"""
+
+_cond = threading.Condition()
+_latest = None  # latest version, loaded lazily from the store
+
+def connect():
+    conn = announcement_store.connect()
+    conn.executescript(SCHEMA)
+    return conn
+
+def compute_delta(old_items, new_items):
+    """Diff two announcement lists by fingerprint"""
+    old = {item.get("fingerprint") or fingerprint(item): item for item in old_items}
+    new = {item.get("fingerprint") or fingerprint(item): item for item in new_items}
+    added = [dict(item, fingerprint=fp) for fp, item in new.items() if fp not in old]
+    changed = [
+        dict(item, fingerprint=fp) for fp, item in new.items()
+        if fp in old and any(old[fp].get(f) != item.get(f) for f in CONTENT_FIELDS)
+    ]
+    removed = [fp for fp in old if fp not in new]
+    return {"added": added, "changed": changed, "removed": removed}
+
+def latest_version():
+    global _latest
+    with _cond:
+        if _latest is None:
+            conn = connect()
+            try:
+                row = conn.execute("SELECT MAX(version) FROM changes").fetchone()
+            finally:
+                conn.close()
+            _latest = row[0] or 0
+        return _latest
+
+def sync_from_store():
+    """Pick up versions recorded by another process (the leader) and wake waiters"""
+    global _latest
+    conn = connect()
+    try:
+        version = conn.execute("SELECT MAX(version) FROM changes").fetchone()[0] or 0
+    finally:
+        conn.close()
+    with _cond:
+        if _latest is None or version > _latest:
+            _latest = version
+            _cond.notify_all()
+    return version
+
+def snapshot_delta(old_data, new_data):
+    import ktu_api_client  # requests/bs4 - only needed by the leader, after startup
+
+    # snapshots written by an older API client are compared in the page format
+    return compute_delta(
+        [ktu_api_client.normalize_record(item) for item in (old_data or {}).get("announcements") or []],
+        (new_data or {}).get("announcements") or []
+    )
+
+def record(old_data, new_data, delta=None):
+    """Store the delta between two snapshots; returns its version or None if nothing changed"""
+    global _latest
+    if delta is None:
+        delta = snapshot_delta(old_data, new_data)
+    if not (delta["added"] or delta["changed"] or delta["removed"]):
+        return None
+
+    latest_version()  # make sure _latest is loaded before we bump it
+    conn = connect()
+    try:
+        with conn:
+            cur = conn.execute(
+                "INSERT INTO changes (created_at, delta) VALUES (?, ?)",
+                (time.time(), json.dumps(delta, ensure_ascii=False))
+            )
+            version = cur.lastrowid
+            conn.execute("DELETE FROM changes WHERE version <= ?", (version - MAX_HISTORY,))
+    finally:
+        conn.close()
+
+    with _cond:
+        _latest = version
+        _cond.notify_all()
+    print(f"Change feed v{version}: {len(delta['added'])} added, "
+          f"{len(delta['changed'])} changed, {len(delta['removed'])} removed")
+    return version
+
+def changes_since(version):
+    """Deltas after `version`, oldest first; None if that version is no longer retained"""
+    conn = connect()
+    try:
+        oldest = conn.execute("SELECT MIN(version) FROM changes").fetchone()[0]
+        if oldest is not None and version < oldest - 1:
+            return None
+        rows = conn.execute(
+            "SELECT version, created_at, delta FROM changes WHERE version > ? ORDER BY version",
+            (version,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [
+        dict(json.loads(row["delta"]), version=row["version"], created_at=row["created_at"])
+        for row in rows
+    ]
+
+def wait_for_change(version, timeout):
+    """Block until a version newer than `version` exists or timeout passes"""
+    latest_version()
+    with _cond:
+        return _cond.wait_for(lambda: _latest > version, timeout)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# change_probe.py
+"""
+Cheap change probe run before a scheduled scrape.
+
+Most scheduled runs find nothing new, yet a full run pays for Chrome, page
+loads and re-publishing the snapshot. The probe fetches only the first API
+page over a kept-alive session (conditionally, if the API ever sends an
+ETag or Last-Modified) and compares its fingerprints with the top of the
+current snapshot. The API records are mapped to the page's format, so this
+works whether the snapshot came from the API or the Selenium engine. The full scrape only runs when they differ, when the
+probe cannot tell (API down, no snapshot yet), or when the snapshot is
+older than CHANGE_PROBE_MAX_AGE_HOURS, since fingerprints do not cover
+edits to an announcement's message text.
+"""
+
+import os
+from datetime import datetime
+import ktu_api_client
+from announcement_store import fingerprint
+
+CHANGE_PROBE = os.getenv("CHANGE_PROBE", "true").lower() == "true"
+MAX_AGE = float(os.getenv("CHANGE_PROBE_MAX_AGE_HOURS", "6")) * 3600  # force a full run after this
+PROBE_TRIGGERS = ("scheduler", "stale")  # manual and startup refreshes always scrape
+
+_session = None
+_validators = {}  # ETag / Last-Modified of the last first page that matched the snapshot
+
+def snapshot_age(data):
+    """Seconds since the snapshot was fully scraped (None if unknown)"""
+    try:
+        fetched = datetime.fromisoformat(data["fetched_at"].rstrip("Z"))
+    except (KeyError, TypeError, AttributeError, ValueError):
+        return None
+    return (datetime.utcnow() - fetched).total_seconds()
+
+def probe(data):
+    """Decide whether a scrape is needed; returns (result, reason)
+
+    result is "unchanged" (skip the scrape), "changed" or "inconclusive".
+    """
+    global _session, _validators
+    items = (data or {}).get("announcements") or []
+    if not items:
+        return "inconclusive", "no snapshot to compare with"
+    age = snapshot_age(data)
+    if age is None or age > MAX_AGE:
+        return "inconclusive", "snapshot older than CHANGE_PROBE_MAX_AGE_HOURS"
+
+    if _session is None:
+        _session = ktu_api_client.make_session(pool_maxsize=1)
+    try:
+        page, _validators = ktu_api_client.fetch_page_conditional(_session, 0, _validators)
+    except Exception as e:
+        return "inconclusive", f"probe request failed: {e}"
+    if page is None:
+        return "unchanged", "304 Not Modified"
+
+    records = [ktu_api_client.map_announcement(item) for item in ktu_api_client.page_items(page)]
+    latest = [fingerprint(r) for r in records if r["title"]]
+    if not latest:
+        return "inconclusive", "first page is empty"
+    # recomputed from the page-format fields, whichever engine (or client version) built the snapshot
+    current = [fingerprint(ktu_api_client.normalize_record(item)) for item in items[:len(latest)]]
+    if latest == current:
+        return "unchanged", f"first {len(latest)} announcements match"
+    _validators = {}  # they describe a page the snapshot does not have yet
+    return "changed", "first page differs from the snapshot"
+
+def should_probe(trigger):
+    return CHANGE_PROBE and trigger in PROBE_TRIGGERS
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# ktu_api_client.py
+"""
+Fetch announcements straight from the JSON API behind https://ktu.edu.in/Menu/announcements.
+
+No browser is needed: pages are requested through one pooled requests.Session
+(keep-alive) and mapped into the same records scrape_page() produces:
+title, link, date, message_html, message_text, attachments.
+
+The API location can be overridden with KTU_API_BASE, e.g. to point the
+client at a local stand-in server that replays recorded responses.
+"""
+
+import os
+import re
+from datetime import datetime
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+KTU_API_BASE = os.getenv("KTU_API_BASE", "https://api.ktu.edu.in/ktu-web-portal-api/anon")
+ANNOUNCEMENTS_PATH = "/announcemnts"  # sic - matches the path used by the KTU frontend
+PAGE_SIZE = 10
+REQUEST_TIMEOUT = 15  # seconds per API call
+DISPLAY_DATE_FORMAT = "%d %b %Y"  # how the page shows announcementDate, e.g. "28 Nov 2025"
+ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T")
+MESSAGE_WRAPPER = '<div class="m-t-10 font-14">{}</div>'  # the element the page renders a message in
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36"
+
+def make_session(pool_maxsize=4):
+    """Create a keep-alive session with a small connection pool"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept": "application/json",
+        "Origin": "https://ktu.edu.in",
+        "Referer": "https://ktu.edu.in/",
+    })
+    return session
+
+def fetch_page(session, page_num, size=PAGE_SIZE, path=ANNOUNCEMENTS_PATH):
+    """Fetch one page (0-based) of a listing (announcements by default) and return the decoded JSON"""
+    resp = session.post(
+        KTU_API_BASE + path,
+        json={"number": page_num, "searchText": "", "size": size},
+        timeout=REQUEST_TIMEOUT
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+def fetch_page_conditional(session, page_num, validators=None, size=PAGE_SIZE):
+    """fetch_page with If-None-Match / If-Modified-Since from an earlier response
+
+    Returns (page, validators); page is None when the server answered
+    304 Not Modified. validators holds the ETag / Last-Modified to send
+    next time (empty if the server sends neither).
+    """
+    headers = {}
+    if validators and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators and validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    resp = session.post(
+        KTU_API_BASE + ANNOUNCEMENTS_PATH,
+        json={"number": page_num, "searchText": "", "size": size},
+        headers=headers,
+        timeout=REQUEST_TIMEOUT
+    )
+    if resp.status_code == 304:
+        return None, validators
+    resp.raise_for_status()
+    fresh = {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+    return resp.json(), {k: v for k, v in fresh.items() if v}
+
+def page_items(page):
+    """Return the list of announcement objects in an API page"""
+    if isinstance(page, list):
+        return page
+    return page.get("content") or []
+
+def display_date(value):
+    """An API date as the page shows it: "2025-11-28T00:00:00.000+00:00" -> "28 Nov 2025" """
+    value = (value or "").strip()
+    try:
+        return datetime.strptime(value[:10], "%Y-%m-%d").strftime(DISPLAY_DATE_FORMAT)
+    except ValueError:
+        return value
+
+def map_announcement(item):
+    """Map an API announcement object to the record scrape_page() parses out of the page
+
+    The date is formatted and the message wrapped and serialized like the
+    page does, so both engines give an announcement the same fingerprint
+    and the same content.
+    """
+    message = BeautifulSoup(MESSAGE_WRAPPER.format(item.get("message") or ""), "html.parser").div
+    attachments = []
+    for att in item.get("attachmentList") or []:
+        att_id = att.get("encryptId") or att.get("id")
+        if not att_id:
+            continue
+        attachments.append({
+            "title": (att.get("title") or att.get("attachmentName") or "").strip(),
+            "href": f"#attachment-{att_id}"
+        })
+    return {
+        "title": (item.get("subject") or "").strip(),
+        "link": "",
+        "date": display_date(item.get("announcementDate")),
+        "message_html": str(message),
+        "message_text": message.get_text(separator="\n").strip(),
+        "attachments": attachments
+    }
+
+def normalize_record(record):
+    """Convert a record saved by an older API client (ISO date, unwrapped message) to the page format
+
+    Other records are returned as they are. A converted copy drops its
+    stored fingerprint, which is computed again from the new date.
+    """
+    date = record.get("date") or ""
+    html = record.get("message_html") or ""
+    iso_date = ISO_DATE_RE.match(date) is not None
+    bare_message = bool(html) and not html.startswith(MESSAGE_WRAPPER.split("{")[0])
+    if not (iso_date or bare_message):
+        return record
+    message = BeautifulSoup(MESSAGE_WRAPPER.format(html) if bare_message else html, "html.parser").div
+    record = {k: v for k, v in record.items() if k != "fingerprint"}
+    record["date"] = display_date(date) if iso_date else date
+    if message is not None:
+        record["message_html"] = str(message)
+        record["message_text"] = message.get_text(separator="\n").strip()
+    return record
+
+def fetch_announcements(max_pages, session=None, stop_when=None):
+    """Fetch up to max_pages pages of announcements through the API
+
+    stop_when, if given, is called with each page's mapped records and ends
+    pagination early when it returns True.
+    """
+    own_session = session is None
+    if own_session:
+        session = make_session()
+    announcements = []
+    try:
+        for page_num in range(max_pages):
+            page = fetch_page(session, page_num)
+            items = page_items(page)
+            print(f"Found {len(items)} announcements on API page {page_num + 1}")
+            records = [map_announcement(item) for item in items]
+            announcements.extend(records)
+            last = page.get("last") if isinstance(page, dict) else None
+            if not items or last:
+                break
+            if stop_when and stop_when(records):
+                print("Page contains only known announcements - stopping early")
+                break
+    finally:
+        if own_session:
+            session.close()
+    return [a for a in announcements if a["title"]]
@@ -1,34 +1,147 @@
 #!/usr/bin/env python3
 # ktu_scrape_site.py
 """
-Scrape announcements from https://ktu.edu.in/Menu/announcements using Selenium.
+Scrape announcements from https://ktu.edu.in/Menu/announcements.
 Saves output to ktu_announcements.json.
 
+Two fetch engines are available, selected with SCRAPER_ENGINE:
+  api      - call the JSON API directly (see ktu_api_client.py), no browser
+  selenium - render the page in headless Chrome and parse the HTML
+  auto     - try the API first and fall back to Selenium on failure (default)
+
+With INCREMENTAL=true (default) pagination stops at the first page whose
+announcements are all already in the saved snapshot, and the new items are
+merged into it instead of rewriting the history from scratch.
+
+With PARALLEL_PAGES=K > 1, full (non-incremental) Selenium runs spread the
+pages over K browsers that jump straight to their pages and scrape in
+parallel. K is capped by available memory (CHROME_MB_PER_DRIVER per browser).
+
 Requirements:
   pip install selenium webdriver-manager beautifulsoup4 requests
   Chrome/Chromium installed
 """
 
 import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
-import requests
-import sys
 import os
+import ktu_api_client
+import lean_page
+import page_ready
+import snapshot_files
+from announcement_store import fingerprint
 
-KTU_URL = "https://ktu.edu.in/Menu/announcements"
+KTU_URL = os.getenv("KTU_URL", "https://ktu.edu.in/Menu/announcements")  # override to scrape a local stand-in
 OUTPUT_FILE = "ktu_announcements.json"
-WAIT_SECONDS = 35  # wait for JS-rendered content (increased for Render)
+WAIT_SECONDS = 35  # max wait for JS-rendered content (increased for Render)
+PAGE_WAIT_SECONDS = 15  # max wait for a pagination click to show the next page
 HEADLESS = True    # set False while debugging to see the browser
 MAX_PAGES = int(os.getenv("MAX_PAGES", "3"))  # Number of pages to scrape (10 per page, configurable via env var)
+SCRAPER_ENGINE = os.getenv("SCRAPER_ENGINE", "auto").lower()  # "api", "selenium" or "auto"
+INCREMENTAL = os.getenv("INCREMENTAL", "true").lower() == "true"  # stop at the first fully-known page
+PAGE_SIZE = 10  # announcements per page on the KTU site
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH")  # skip webdriver-manager's lookup when set
+PARALLEL_PAGES = int(os.getenv("PARALLEL_PAGES", "1"))  # browsers to use for full multi-page runs
+CHROME_MB_PER_DRIVER = int(os.getenv("CHROME_MB_PER_DRIVER", "150"))  # memory budget per browser
+EXTRACT_MODE = os.getenv("EXTRACT_MODE", "soup").lower()  # "soup" (page_source + BeautifulSoup) or "script"
+
+_driver_path = None  # resolved chromedriver path, reused across drivers in one process
+_driver_path_lock = threading.Lock()  # parallel browser lanes start their drivers at the same time
+
+phase_seconds = {}  # seconds spent per phase in the current run: driver_start, page_load, parse, api_fetch, save
+phase_log = []  # [(phase, seconds)] for every timed step of the current run, e.g. one "parse" per page
+_phase_lock = threading.Lock()  # parallel browser lanes report into the same dict
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the with-block to phase_seconds[phase]"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        with _phase_lock:
+            phase_seconds[phase] = round(phase_seconds.get(phase, 0) + elapsed, 4)
+            phase_log.append((phase, round(elapsed, 4)))
+
+def resolve_driver_path():
+    """Resolve the chromedriver path once per process"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = CHROMEDRIVER_PATH or ChromeDriverManager().install()
+        return _driver_path
+
+def load_snapshot():
+    """Return the announcements saved by the previous run (empty if none)"""
+    current = snapshot_files.read_current()
+    if current is not None:
+        items = current[1].get("announcements") or []
+    else:
+        try:
+            with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
+                items = json.load(f).get("announcements") or []
+        except (OSError, ValueError):
+            items = []
+    return [ktu_api_client.normalize_record(item) for item in items]
+
+def all_known(page_announcements, known):
+    """True if every announcement on a page is already in the snapshot"""
+    return bool(page_announcements) and all(
+        fingerprint(item) in known for item in page_announcements
+    )
+
+def merge_announcements(new_items, old_items, limit):
+    """Merge freshly scraped items in front of the saved ones, newest first"""
+    merged = []
+    seen = set()
+    for item in list(new_items) + list(old_items):
+        fp = item.get("fingerprint") or fingerprint(item)
+        if fp in seen:
+            continue
+        seen.add(fp)
+        item["fingerprint"] = fp
+        merged.append(item)
+    return merged[:limit]
+
+def available_memory_mb():
+    """Memory still available to this container/host in MB, or None if unknown"""
+    # cgroup v2 limit (Docker/Render) takes precedence over host memory
+    try:
+        with open("/sys/fs/cgroup/memory.max", "r") as f:
+            limit = f.read().strip()
+        with open("/sys/fs/cgroup/memory.current", "r") as f:
+            current = int(f.read().strip())
+        if limit != "max":
+            return (int(limit) - current) // (1024 * 1024)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+def parallel_driver_count(requested, pages):
+    """How many browsers to run at once, bounded by pages and free memory"""
+    count = max(1, min(requested, pages))
+    free_mb = available_memory_mb()
+    if free_mb is not None:
+        count = max(1, min(count, free_mb // CHROME_MB_PER_DRIVER))
+    return count
 
 def make_driver(headless=HEADLESS):
     from selenium.webdriver.chrome.options import Options
@@ -60,138 +173,224 @@ def make_driver(headless=HEADLESS):
     chrome_options.add_argument("--window-size=1920,1080")
     # set a realistic user-agent
     chrome_options.add_argument("--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36")
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    page_ready.enable_network_log(chrome_options)
+    with timed("driver_start"):
+        service = Service(resolve_driver_path())
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+    lean_page.enable(driver)  # must be in place before the first navigation
     return driver
 
 def wait_for_announcements(driver):
-    """Wait until announcements are present in the DOM (multiple fallbacks)."""
-    wait = WebDriverWait(driver, WAIT_SECONDS)
-    # Try a few XPaths that match common announcement elements
-    try:
-        wait.until(
-            EC.presence_of_element_located((
-                By.XPATH,
-                "//div[contains(@class,'announcement')] | //div[contains(@class,'card') and .//h4] | //h4/a"
-            ))
-        )
-        return True
-    except TimeoutException:
-        return False
+    """Wait until the first announcement block scrape_page parses is rendered."""
+    return page_ready.wait_for_first_block(driver, WAIT_SECONDS)
+
+def click_and_wait(driver, element):
+    """Click a pagination link and wait until the listing shows another page"""
+    with timed("page_load"):
+        mark = page_ready.mark_page(driver)
+        element.click()
+        return page_ready.wait_for_page_change(driver, mark, PAGE_WAIT_SECONDS)
+
+# XPath helpers shared by the DOM fallback scripts. Each script does in the
+# browser what used to be one WebDriver round trip per find_element /
+# get_attribute / .text call: .text is the element's rendered text (empty
+# when hidden) and href the resolved URL, as Selenium reports them.
+DOM_SCRIPT_HELPERS = r"""
+function first(xpath, context) {
+  return document.evaluate(xpath, context || document, null,
+                           XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+function all(xpath, context) {
+  var result = document.evaluate(xpath, context || document, null,
+                                 XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+  var nodes = [];
+  for (var i = 0; i < result.snapshotLength; i++) nodes.push(result.snapshotItem(i));
+  return nodes;
+}
+function text(el) {
+  return el && el.getClientRects().length ? el.innerText.trim() : "";
+}
+function href(a) {
+  return a.hasAttribute("href") ? a.href : null;
+}
+function attachments(block) {
+  var found = [];
+  all(".//a[contains(@href,'/eu/att/') or contains(text(),'Notification') or contains(text(),'Circular') or contains(@href,'att') or contains(@href,'/eu/') ]", block)
+    .forEach(function (a) {
+      var url = href(a);
+      if (url) found.push({title: text(a) || url.slice(url.lastIndexOf("/") + 1), href: url});
+    });
+  return found;
+}
+"""
+
+DOM_EXTRACT_SCRIPT = DOM_SCRIPT_HELPERS + r"""
+var results = [];
+// Prefer structured blocks (announcement class or cards)
+var blocks = all("//div[contains(@class,'announcement')] | //div[contains(@class,'card') and .//h4]");
+
+// If none found, fallback to h4/a anchors
+if (!blocks.length) {
+  all("//h4/a | //div[@class='content']//a[contains(@href,'/eu/att') or contains(@href,'notification')]")
+    .forEach(function (a) {
+      var parent = first("./ancestor::div[1]", a);
+      if (!parent) return;
+      var msg = first(".//p", parent);
+      results.push({
+        title: text(a),
+        link: href(a),
+        date: text(first(".//span[contains(@class,'date')] | .//p[contains(@class,'date')] | .//small", parent)),
+        message_html: msg ? msg.innerHTML : "",
+        attachments: attachments(parent)
+      });
+    });
+  return results;
+}
+
+blocks.forEach(function (b) {
+  // Title typically in h4 > a, else the first anchor in the block
+  var title = first(".//h4/a", b) || first(".//a[1]", b);
+  var date = first(".//span[contains(@class,'date')] | .//p[contains(@class,'date')] | .//small | .//h4/following-sibling::*[1]", b)
+    || first(".//p[contains(@class,'announcementDate')]", b);
+  var msg = first(".//div[contains(@class,'message')] | .//p", b);
+  results.push({
+    title: text(title),
+    link: title ? href(title) || "" : "",
+    date: text(date),
+    message_html: msg ? msg.innerHTML.trim() : "",
+    attachments: attachments(b)
+  });
+});
+return results;
+"""
 
 def extract_attachments_from_block(block):
-    attachments = []
+    """Attachment links in a block element, found in one script call"""
     try:
-        # find anchors that are likely attachments
-        anchors = block.find_elements(By.XPATH, ".//a[contains(@href,'/eu/att/') or contains(text(),'Notification') or contains(text(),'Circular') or contains(@href,'att') or contains(@href,'/eu/') ]")
-        for a in anchors:
-            href = a.get_attribute("href")
-            text = a.text.strip()
-            if href:
-                attachments.append({"title": text or os.path.basename(href), "href": href})
-    except Exception:
-        pass
-    return attachments
+        return block.parent.execute_script(DOM_SCRIPT_HELPERS + "return attachments(arguments[0]);", block)
+    except WebDriverException:
+        return []
 
 def extract_from_dom(driver):
-    results = []
-    # Prefer structured blocks (announcement class or cards)
-    blocks = driver.find_elements(By.XPATH, "//div[contains(@class,'announcement')] | //div[contains(@class,'card') and .//h4]")
-
-    # If none found, fallback to h4/a anchors
-    if not blocks:
-        anchors = driver.find_elements(By.XPATH, "//h4/a | //div[@class='content']//a[contains(@href,'/eu/att') or contains(@href,'notification') or contains(@href,'notification')]")
-        for a in anchors:
-            try:
-                title = a.text.strip()
-                href = a.get_attribute("href")
-                # Attempt to find sibling date or message
-                parent = a.find_element(By.XPATH, "./ancestor::div[1]")
-                date = ""
-                try:
-                    date_el = parent.find_element(By.XPATH, ".//span[contains(@class,'date')] | .//p[contains(@class,'date')] | .//small")
-                    date = date_el.text.strip()
-                except Exception:
-                    pass
-                msg_html = ""
-                try:
-                    msg = parent.find_element(By.XPATH, ".//p")
-                    msg_html = msg.get_attribute("innerHTML")
-                except Exception:
-                    pass
-                attachments = extract_attachments_from_block(parent)
-                results.append({
-                    "title": title,
-                    "link": href,
-                    "date": date,
-                    "message_html": msg_html,
-                    "attachments": attachments
-                })
-            except Exception:
-                continue
-        return results
+    """Generic DOM fallback for announcement/card layouts, in one script call per page"""
+    return driver.execute_script(DOM_EXTRACT_SCRIPT)
+
+# parse_announcements run inside the browser: the same blocks and fields,
+# with BeautifulSoup's get_text()/strip() and str(tag) (minimal formatter)
+# reproduced, so the records are identical to parsing page_source.
+ANNOUNCEMENTS_SCRIPT = r"""
+var SPACE = "\t\n\x0b\x0c\r\x1c-\x20\x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000";
+var EDGES = new RegExp("^[" + SPACE + "]+|[" + SPACE + "]+$", "g");
+var WORDS = new RegExp("[^" + SPACE + "]+", "g");
+var VOID = " area base basefont bgsound br col command embed frame hr image img input isindex keygen link" +
+           " menuitem meta nextid param source spacer track wbr ";
+var RAW_TEXT = " script style ";
+var LIST_ATTRS = {"*": " class accesskey dropzone ", a: " rel rev ", link: " rel rev ", area: " rel ",
+                  td: " headers ", th: " headers ", form: " accept-charset ", object: " archive ",
+                  icon: " sizes ", iframe: " sandbox ", output: " for "};
+
+function strip(s) { return s.replace(EDGES, ""); }  // Python's str.strip()
+function escape(s) { return s.replace(/&/g, "&amp;").replace(/</g, "&lt;").replace(/>/g, "&gt;"); }
+function tag(node) { return node.nodeName.toLowerCase(); }
+function isRaw(node) { return RAW_TEXT.indexOf(" " + tag(node) + " ") >= 0; }
+
+function strings(node, out) {
+  for (var child = node.firstChild; child; child = child.nextSibling) {
+    if (child.nodeType === 3 || child.nodeType === 4) out.push(child.data);
+    else if (child.nodeType === 1 && !isRaw(child)) strings(child, out);
+  }
+  return out;
+}
+function getText(el, separator, stripped) {  // Tag.get_text(separator, strip)
+  var parts = strings(el, []);
+  if (stripped) parts = parts.map(strip).filter(function (s) { return s; });
+  return parts.join(separator);
+}
+
+function attribute(name, value, element) {
+  var lists = LIST_ATTRS["*"] + (LIST_ATTRS[element] || "");
+  if (lists.indexOf(" " + name + " ") >= 0) value = (value.match(WORDS) || []).join(" ");
+  value = escape(value);
+  var quote = '"';
+  if (value.indexOf('"') >= 0) {
+    if (value.indexOf("'") >= 0) value = value.replace(/"/g, "&quot;");
+    else quote = "'";
+  }
+  return " " + name + "=" + quote + value + quote;
+}
+function html(node) {  // str(tag)
+  if (node.nodeType === 3 || node.nodeType === 4) {
+    return node.parentNode && isRaw(node.parentNode) ? node.data : escape(node.data);
+  }
+  if (node.nodeType === 8) return "<!--" + node.data + "-->";
+  if (node.nodeType !== 1) return "";
+  var name = tag(node), out = "<" + name;
+  Array.prototype.slice.call(node.attributes)
+    .sort(function (a, b) { return a.name < b.name ? -1 : a.name > b.name ? 1 : 0; })  // sorted, like bs4
+    .forEach(function (attr) { out += attribute(attr.name, attr.value, name); });
+  if (!node.firstChild && VOID.indexOf(" " + name + " ") >= 0) return out + "/>";
+  out += ">";
+  for (var child = node.firstChild; child; child = child.nextSibling) out += html(child);
+  return out + "</" + name + ">";
+}
+
+var records = [];
+document.querySelectorAll("div.row.m-b-25").forEach(function (block) {
+  var title = block.querySelector("h6.f-w-bold");
+  var date = block.querySelector("div.text-theme.h6.m-t-10.f-w-bold");
+  var msg = block.querySelector("div.m-t-10.font-14");
+  var record = {
+    title: title ? getText(title, "", true) : "",
+    link: "",
+    date: date ? strip(getText(date, "", true)) : "",
+    message_html: msg ? html(msg) : "",
+    message_text: msg ? strip(getText(msg, "\n", false)) : "",
+    attachments: []
+  };
+  block.querySelectorAll("button.btn").forEach(function (button) {
+    if (button.getAttribute("value")) {
+      record.attachments.push({
+        title: strip(getText(button, "", true)),
+        href: "#attachment-" + button.getAttribute("value")
+      });
+    }
+  });
+  if (record.title) records.push(record);
+});
+return records;
+"""
 
-    # Parse each block
-    for b in blocks:
-        try:
-            title = ""
-            link = ""
-            # Title typically in h4 > a
-            try:
-                title_el = b.find_element(By.XPATH, ".//h4/a")
-                title = title_el.text.strip()
-                link = title_el.get_attribute("href") or ""
-            except NoSuchElementException:
-                # fallback: first anchor in block
-                try:
-                    a = b.find_element(By.XPATH, ".//a[1]")
-                    title = a.text.strip()
-                    link = a.get_attribute("href") or ""
-                except Exception:
-                    title = ""
-                    link = ""
-            # Date
-            date_text = ""
-            try:
-                date_el = b.find_element(By.XPATH, ".//span[contains(@class,'date')] | .//p[contains(@class,'date')] | .//small | .//h4/following-sibling::*[1]")
-                date_text = date_el.text.strip()
-            except Exception:
-                # maybe date sits in a different small tag
-                try:
-                    date_el = b.find_element(By.XPATH, ".//p[contains(@class,'announcementDate')]")
-                    date_text = date_el.text.strip()
-                except Exception:
-                    date_text = ""
+def extract_announcements(driver):
+    """Announcement records of the current page in one execute_script call
 
-            # Message HTML (first <p> or div.message)
-            message_html = ""
-            try:
-                msg_el = b.find_element(By.XPATH, ".//div[contains(@class,'message')] | .//p")
-                message_html = msg_el.get_attribute("innerHTML").strip()
-            except Exception:
-                message_html = ""
-
-            # attachments
-            attachments = extract_attachments_from_block(b)
-
-            results.append({
-                "title": title,
-                "link": link,
-                "date": date_text,
-                "message_html": message_html,
-                "attachments": attachments
-            })
-        except Exception as e:
-            # ignore block parse errors but log to stdout
-            print("Parse error for block:", e)
-            continue
+    Same output as parse_announcements(driver.page_source), without
+    serializing the whole page and parsing it again in Python.
+    """
+    return driver.execute_script(ANNOUNCEMENTS_SCRIPT)
 
-    return results
+def default_html_parser():
+    """lxml when installed (much faster), otherwise the stdlib html.parser"""
+    try:
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
 
-def scrape_page(driver):
-    """Scrape announcements from current page"""
-    page_source = driver.page_source
-    soup = BeautifulSoup(page_source, "html.parser")
+HTML_PARSER = os.getenv("HTML_PARSER") or default_html_parser()
+
+def is_announcement_block_class(css_class):
+    return css_class is not None and "m-b-25" in css_class.split()
+
+# Only build the announcement blocks (div.row.m-b-25), not the whole page
+ANNOUNCEMENT_STRAINER = SoupStrainer("div", class_=is_announcement_block_class)
+
+def parse_announcements(page_source, parser=None, strainer=ANNOUNCEMENT_STRAINER):
+    """Parse announcement records out of a KTU announcements page
+
+    Only the announcement subtrees are built (via the strainer) and every
+    field, message_text included, is extracted in this single pass.
+    """
+    soup = BeautifulSoup(page_source, parser or HTML_PARSER, parse_only=strainer)
     announcements = []
 
     # Parse KTU-specific structure: div.row.m-b-25 containing announcements
@@ -210,16 +409,16 @@ def scrape_page(driver):
             # Message is in div.m-t-10.font-14
             msg_el = block.select_one("div.m-t-10.font-14")
             message_html = str(msg_el) if msg_el else ""
-            message_text = msg_el.get_text(strip=True) if msg_el else ""
+            message_text = msg_el.get_text(separator="\n").strip() if msg_el else ""
 
-            # Attachments - button with value attribute
+            # Attachments - one button with a value attribute per attachment
             attachments = []
-            button = block.select_one("button.btn")
-            if button and button.get("value"):
-                attachments.append({
-                    "title": button.get_text(strip=True).replace("", "").strip(),
-                    "href": f"#attachment-{button.get('value')}"
-                })
+            for button in block.select("button.btn"):
+                if button.get("value"):
+                    attachments.append({
+                        "title": button.get_text(strip=True).replace("", "").strip(),
+                        "href": f"#attachment-{button.get('value')}"
+                    })
 
             if title:  # Only add if we have a title
                 announcements.append({
@@ -236,31 +435,51 @@ def scrape_page(driver):
 
     return announcements
 
-def main():
-    driver = make_driver(headless=HEADLESS)
+def scrape_page(driver):
+    """Scrape announcements from current page"""
+    with timed("parse"):
+        if EXTRACT_MODE == "script":
+            try:
+                return extract_announcements(driver)
+            except WebDriverException as e:
+                print(f"Script extraction failed ({e.msg}) - parsing page_source instead")
+        return parse_announcements(driver.page_source)
+
+def scrape_with_selenium(known=None, driver=None):
+    """Scrape MAX_PAGES pages by rendering them in headless Chrome
+
+    If a set of known fingerprints is given, stop after the first page that
+    contains nothing new. A caller-owned driver is reused and left open;
+    otherwise a fresh one is started and quit afterwards.
+    """
+    own_driver = driver is None
+    if own_driver:
+        driver = make_driver(headless=HEADLESS)
     all_announcements = []
 
     try:
         print(f"Starting scraper - will fetch {MAX_PAGES} pages")
         print("Loading:", KTU_URL)
-        driver.get(KTU_URL)
-
-        # Let initial JS run - longer wait for first page
-        time.sleep(5)
+        with timed("page_load"):
+            driver.get(KTU_URL)
+            # Wait for the JS-rendered list instead of sleeping a fixed time
+            rendered = wait_for_announcements(driver)
+        if not rendered:
+            print("Announcements did not render in time - parsing what is there")
 
         # Scrape multiple pages
         for page_num in range(1, MAX_PAGES + 1):
             print(f"\n=== Scraping Page {page_num}/{MAX_PAGES} ===")
 
-            # Wait for page to load (first page already waited)
-            if page_num > 1:
-                time.sleep(3)
-
             # Scrape current page
             page_announcements = scrape_page(driver)
             print(f"Found {len(page_announcements)} announcements on page {page_num}")
             all_announcements.extend(page_announcements)
 
+            if known and all_known(page_announcements, known):
+                print("Page contains only known announcements - stopping early")
+                break
+
             # Click next page if not the last page
             if page_num < MAX_PAGES:
                 try:
@@ -268,8 +487,9 @@ def main():
                     next_button = driver.find_element(By.XPATH, "//li[@class='next']/a[@rel='next']")
                     if next_button:
                         print("Clicking next page...")
-                        next_button.click()
-                        time.sleep(3)  # Wait for next page to load
+                        if not click_and_wait(driver, next_button):
+                            print("Next page did not load - stopping")
+                            break
                     else:
                         print("No more pages available")
                         break
@@ -279,36 +499,197 @@ def main():
                 except Exception as e:
                     print(f"Error navigating to next page: {e}")
                     break
+    finally:
+        lean_page.collect(driver)
+        if own_driver:
+            driver.quit()
+
+    return all_announcements
+
+def goto_page(driver, page_num, current=None):
+    """Move the listing to page_num, forward from page current if the driver shows it
+
+    Without current (or with current past the target) the announcements
+    page is loaded first. Clicks the highest visible numbered pagination
+    link that does not pass the target, falling back to "next". Returns
+    False if the page can't be reached (e.g. past the last page).
+    """
+    if current is None or current > page_num:
+        with timed("page_load"):
+            driver.get(KTU_URL)
+            wait_for_announcements(driver)
+        current = 1
+    while current < page_num:
+        target = None
+        for link in driver.find_elements(By.XPATH, "//ul[contains(@class,'pagination')]//li/a"):
+            text = link.text.strip()
+            if text.isdigit() and current < int(text) <= page_num:
+                if target is None or int(text) > int(target.text.strip()):
+                    target = link
+        try:
+            if target is not None:
+                next_num = int(target.text.strip())
+            else:
+                target = driver.find_element(By.XPATH, "//li[@class='next']/a[@rel='next']")
+                next_num = current + 1
+            if not click_and_wait(driver, target):
+                return False
+        except Exception:
+            return False
+        current = next_num
+    return True
+
+def scrape_pages_parallel(driver=None):
+    """Scrape MAX_PAGES pages with several browsers working side by side
+
+    Page p goes to browser (p - 1) % K. Each browser loads the listing once
+    and moves forward from the page it is on, reloading only after an
+    error. A caller-owned driver serves as the first browser and is left
+    open. Results are merged in page order.
+    """
+    lanes = parallel_driver_count(PARALLEL_PAGES, MAX_PAGES)
+    print(f"Starting parallel scraper - {MAX_PAGES} pages across {lanes} browsers")
+    by_page = {}
+
+    def run_lane(lane):
+        own_driver = lane > 0 or driver is None
+        lane_driver = make_driver(headless=HEADLESS) if own_driver else driver
+        current = None  # page the lane's browser shows (None: load the listing again)
+        try:
+            for page_num in range(lane + 1, MAX_PAGES + 1, lanes):
+                reached = goto_page(lane_driver, page_num, current)
+                if not reached and current is not None:
+                    reached = goto_page(lane_driver, page_num)  # retry once from a fresh load
+                if not reached:
+                    print(f"Page {page_num} not reachable - end of pages")
+                    break
+                current = page_num
+                try:
+                    by_page[page_num] = scrape_page(lane_driver)
+                except Exception as e:
+                    print(f"Page {page_num} failed: {e}")
+                    current = None
+                    continue
+                print(f"Found {len(by_page[page_num])} announcements on page {page_num}")
+        finally:
+            lean_page.collect(lane_driver)
+            if own_driver:
+                lane_driver.quit()
+
+    with ThreadPoolExecutor(max_workers=lanes) as pool:
+        for future in [pool.submit(run_lane, lane) for lane in range(lanes)]:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Browser lane failed: {e}")
 
-        announcements = all_announcements
-        print(f"\nTotal announcements scraped: {len(announcements)}")
-
-        # sanitize message_html -> message_text
-        for item in announcements:
-            mh = item.get("message_html", "") or ""
-            item["message_text"] = BeautifulSoup(mh, "html.parser").get_text(separator="\n").strip()
-
-        result = {
-            "fetched_at": datetime.utcnow().isoformat() + "Z",
-            "count": len(announcements),
-            "announcements": announcements
-        }
-
-        # Save JSON
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
-        print("Saved", OUTPUT_FILE)
-
-        # OPTIONAL: POST to your WordPress endpoint (uncomment and configure)
-        # wp_endpoint = "https://your-site.com/wp-json/yourplugin/v1/ktu-sync"
-        # try:
-        #     resp = requests.post(wp_endpoint, json=result, timeout=15)
-        #     print("Posted to WP:", resp.status_code, resp.text)
-        # except Exception as e:
-        #     print("Failed to POST to WP:", e)
+    announcements = []
+    seen = set()
+    for page_num in sorted(by_page):
+        for item in by_page[page_num]:
+            fp = fingerprint(item)
+            if fp not in seen:
+                seen.add(fp)
+                announcements.append(item)
+    return announcements
 
-    finally:
-        driver.quit()
+def scrape_with_api(known=None, session=None):
+    """Fetch MAX_PAGES pages from the KTU JSON API without a browser"""
+    print(f"Starting API fetch - will fetch {MAX_PAGES} pages from {ktu_api_client.KTU_API_BASE}")
+    stop_when = (lambda page: all_known(page, known)) if known else None
+    with timed("api_fetch"):
+        return ktu_api_client.fetch_announcements(MAX_PAGES, session=session, stop_when=stop_when)
+
+def fetch_announcements(engine=None, known=None, driver_factory=None, session=None):
+    """Fetch announcements with the configured engine
+
+    driver_factory, if given, supplies a long-lived driver for the Selenium
+    engine; it is only called when Selenium is actually used. session is a
+    kept-alive requests.Session for the API engine (one per run if None).
+    """
+    engine = engine or SCRAPER_ENGINE
+    if engine == "selenium":
+        return scrape_with_browser(known, driver_factory)
+    if engine == "api":
+        return scrape_with_api(known, session)
+
+    # auto: API first, Selenium as fallback
+    try:
+        announcements = scrape_with_api(known, session)
+        if announcements:
+            return announcements
+        print("API returned no announcements - falling back to Selenium")
+    except Exception as e:
+        print(f"API fetch failed ({e}) - falling back to Selenium")
+    return scrape_with_browser(known, driver_factory)
+
+def scrape_with_browser(known=None, driver_factory=None):
+    """Pick serial or parallel Selenium scraping
+
+    Incremental runs stay serial so they can stop at the first known page;
+    full runs use PARALLEL_PAGES browsers when configured.
+    """
+    driver = driver_factory() if driver_factory else None
+    if PARALLEL_PAGES > 1 and not known and MAX_PAGES > 1:
+        return scrape_pages_parallel(driver)
+    return scrape_with_selenium(known, driver)
+
+def reset_run_stats():
+    """Clear the per-run timings and network stats reported with a result"""
+    page_ready.reset_timings()
+    phase_seconds.clear()
+    del phase_log[:]
+    lean_page.reset_stats()
+
+def scrape(driver_factory=None, session=None):
+    """Run one scrape and return the result dict (without saving it)"""
+    reset_run_stats()
+    previous = load_snapshot() if INCREMENTAL else []
+    known = {item.get("fingerprint") or fingerprint(item) for item in previous}
+    if known:
+        print(f"Incremental mode - {len(known)} known announcements")
+
+    scraped = fetch_announcements(known=known, driver_factory=driver_factory, session=session)
+    print(f"\nTotal announcements scraped: {len(scraped)}")
+    new_count = sum(1 for item in scraped if fingerprint(item) not in known)
+    print(f"New announcements: {new_count}")
+    if page_ready.timings:
+        print(f"Time spent waiting for pages: {page_ready.summary()}")
+    print(f"Time per phase: {phase_seconds}")
+    lean_page.log_stats()
+
+    announcements = merge_announcements(scraped, previous, MAX_PAGES * PAGE_SIZE)
+
+    return {
+        "fetched_at": datetime.utcnow().isoformat() + "Z",
+        "count": len(announcements),
+        "announcements": announcements
+    }
+
+def save_result(result):
+    """Publish a scrape result atomically; returns the snapshot pointer
+
+    Writes the versioned snapshot (plus gzip/brotli variants) and also
+    replaces OUTPUT_FILE atomically, in compact form, for existing readers.
+    Unchanged announcements are not published again: the current version's
+    pointer is touched instead, which marks it as confirmed up to date.
+    """
+    with timed("save"):
+        current = snapshot_files.read_current()
+        if current is not None and current[1].get("announcements") == result["announcements"]:
+            snapshot_files.touch_pointer()
+            print(f"Unchanged since snapshot v{current[0]['version']}")
+            return current[0]
+        pointer = snapshot_files.publish(result)
+        snapshot_files.write_atomic(OUTPUT_FILE, snapshot_files.encode(result))
+    print(f"Saved {OUTPUT_FILE} and snapshot v{pointer['version']} in {snapshot_files.SNAPSHOT_DIR}/")
+    return pointer
+
+def main():
+    result = scrape()
+    save_result(result)
+    # New announcements are pushed to WordPress and other sites by the server's
+    # webhook outbox (webhooks.py, WEBHOOK_URLS), never from the scrape itself.
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# leader.py
+"""
+Single-leader election between gunicorn workers.
+
+Every worker imports server.py, so every worker would otherwise run its own
+scheduler and Chrome. The worker that holds an exclusive flock() on
+LEADER_LOCK_FILE is the leader: it runs the scraper and publishes snapshots.
+The others only read what the leader publishes. The lock is released by the
+kernel when the leader exits, so a follower takes over on its next attempt.
+"""
+
+import os
+
+LOCK_FILE = os.getenv("LEADER_LOCK_FILE", "scraper.lock")
+
+try:
+    import fcntl
+except ImportError:  # no flock (e.g. Windows): every process acts as its own leader
+    fcntl = None
+
+_fd = None
+
+def _close_in_child():
+    # A forked child (e.g. the scraper worker) must not keep the lock alive
+    # after the leader itself is gone.
+    global _fd
+    if _fd is not None and _fd >= 0:
+        os.close(_fd)
+    _fd = None
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_close_in_child)
+
+def try_acquire():
+    """Try to become the leader without blocking; True if this process leads"""
+    global _fd
+    if _fd is not None:
+        return True
+    if fcntl is None:
+        _fd = -1
+        return True
+    fd = os.open(LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+    os.ftruncate(fd, 0)
+    os.write(fd, str(os.getpid()).encode())
+    _fd = fd
+    return True
+
+def is_leader():
+    return _fd is not None
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# lean_page.py
+"""
+Lean page loads for the Selenium scraper.
+
+The announcements page pulls in fonts, stylesheets, images and third-party
+scripts that scrape_page never reads. With LEAN_PAGE=true (default) the
+driver blocks them through the DevTools protocol (Network.setBlockedURLs)
+before the first navigation, so only the document, the site's own scripts
+and the api.ktu.edu.in calls are fetched.
+
+setBlockedURLs takes URL patterns, not resource types, so each entry of
+BLOCK_RESOURCE_TYPES maps to the file extensions of that type, and
+BLOCK_URL_PATTERNS adds hosts/paths (analytics, web fonts, embeds).
+
+Requests seen, blocked and bytes downloaded are counted from Chrome's
+performance log and kept in `stats` for the current run.
+"""
+
+import json
+import os
+import threading
+from selenium.common.exceptions import WebDriverException
+
+LEAN_PAGE = os.getenv("LEAN_PAGE", "true").lower() == "true"
+
+EXTENSIONS = {
+    "image": ("png", "jpg", "jpeg", "gif", "webp", "svg", "ico", "bmp", "avif"),
+    "font": ("woff", "woff2", "ttf", "otf", "eot"),
+    "stylesheet": ("css",),
+    "media": ("mp4", "webm", "ogg", "mp3", "wav", "m4a"),
+}
+DEFAULT_RESOURCE_TYPES = "image,font,stylesheet,media"
+DEFAULT_URL_PATTERNS = (
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*fonts.googleapis.com*",
+    "*fonts.gstatic.com*",
+    "*facebook.net*",
+    "*connect.facebook.com*",
+    "*platform.twitter.com*",
+    "*youtube.com/embed*",
+    "*hotjar.com*",
+    "*clarity.ms*",
+)
+
+def split_env(name, default):
+    return [v.strip() for v in os.getenv(name, default).split(",") if v.strip()]
+
+BLOCK_RESOURCE_TYPES = split_env("BLOCK_RESOURCE_TYPES", DEFAULT_RESOURCE_TYPES)
+BLOCK_URL_PATTERNS = split_env("BLOCK_URL_PATTERNS", ",".join(DEFAULT_URL_PATTERNS))
+
+stats = {"requests": 0, "blocked": 0, "bytes": 0}  # for the current run
+_stats_lock = threading.Lock()  # parallel browser lanes count into the same stats
+
+def reset_stats():
+    stats.update(requests=0, blocked=0, bytes=0)
+
+def blocked_patterns(resource_types=None, url_patterns=None):
+    """URL patterns for Network.setBlockedURLs"""
+    patterns = []
+    for resource_type in BLOCK_RESOURCE_TYPES if resource_types is None else resource_types:
+        for ext in EXTENSIONS.get(resource_type, ()):
+            patterns += [f"*.{ext}", f"*.{ext}?*"]
+    patterns += BLOCK_URL_PATTERNS if url_patterns is None else url_patterns
+    return patterns
+
+def enable(driver):
+    """Start blocking on a new driver; returns the number of patterns installed"""
+    if not LEAN_PAGE:
+        return 0
+    patterns = blocked_patterns()
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except (WebDriverException, AttributeError) as e:  # not a Chromium driver
+        print(f"Lean page mode unavailable: {e}")
+        return 0
+    return len(patterns)
+
+def read_network_log(driver):
+    """Drain Chrome's performance log, count requests, return the Network messages"""
+    messages = [json.loads(entry["message"])["message"] for entry in driver.get_log("performance")]
+    with _stats_lock:
+        for message in messages:
+            method = message.get("method", "")
+            params = message.get("params", {})
+            if method == "Network.requestWillBeSent":
+                stats["requests"] += 1
+            elif method == "Network.loadingFailed" and params.get("blockedReason"):
+                stats["blocked"] += 1
+            elif method == "Network.loadingFinished":
+                stats["bytes"] += int(params.get("encodedDataLength") or 0)
+    return messages
+
+def collect(driver):
+    """Fold whatever is left in the performance log into stats"""
+    try:
+        read_network_log(driver)
+    except WebDriverException:
+        pass  # performance log not enabled for this driver
+
+def log_stats():
+    if stats["requests"]:
+        print(f"Lean page: {stats['blocked']} of {stats['requests']} requests blocked, "
+              f"{stats['bytes'] / 1024:.0f} KB downloaded")
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# metrics.py
+"""
+Prometheus-style metrics for the API server and the scraper.
+
+A small in-process registry of counters, gauges and histograms rendered in
+the Prometheus text format at /metrics. Scraper phases are timed inside the
+scraper (worker process or subprocess) and reported back with the result,
+then observed here in the leader.
+
+With several gunicorn workers each one writes its values to
+METRICS_DIR/<pid>.json from the shared-state watcher, and /metrics adds up
+the files of all live workers, so whichever worker answers reports the whole
+server (counters and histograms are summed, gauges take the maximum).
+"""
+
+import glob
+import json
+import os
+import threading
+import snapshot_files
+
+METRICS_DIR = os.getenv("METRICS_DIR", "metrics")
+
+_lock = threading.Lock()
+_registry = []
+_changes = 0  # bumped on every update so dump() can skip unchanged state
+_dumped = -1
+
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"expected labels {labelnames}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}  # label values tuple -> value
+        _registry.append(self)
+
+    def _update(self, labels, update):
+        global _changes
+        key = _label_key(self.labelnames, labels)
+        with _lock:
+            self.values[key] = update(self.values.get(key))
+            _changes += 1
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        self._update(labels, lambda value: (value or 0) + amount)
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        self._update(labels, lambda _: value)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        def update(state):
+            # [per-bucket counts (non-cumulative, last one is +Inf), sum, count]
+            state = state or [[0] * (len(self.buckets) + 1), 0.0, 0]
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+            return state
+        self._update(labels, update)
+
+# Scraper
+SCRAPE_PHASE_SECONDS = Histogram(
+    "ktu_scrape_phase_seconds",
+    "Time spent in one scraper phase (driver_start, page_load, parse per page, api_fetch, save)",
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+    ("phase",)
+)
+SCRAPE_DURATION_SECONDS = Histogram(
+    "ktu_scrape_duration_seconds", "Wall time of a whole scrape run",
+    (0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+)
+SCRAPE_ANNOUNCEMENTS = Histogram(
+    "ktu_scrape_announcements", "Announcements in the snapshot produced by a scrape run",
+    (0, 5, 10, 20, 30, 50, 100, 200, 500)
+)
+SCRAPES_TOTAL = Counter("ktu_scrapes_total", "Scrape runs by result", ("result",))
+SCRAPE_RUNS_TOTAL = Counter(
+    "ktu_scrape_runs_total", "Refresh jobs by whether the change probe skipped the scrape or it was executed",
+    ("decision",)
+)
+SCRAPER_PEAK_RSS_BYTES = Gauge("ktu_scraper_peak_rss_bytes", "Peak RSS of the scraper process")
+BROWSER_RSS_BYTES = Gauge("ktu_browser_rss_bytes", "RSS of chromedriver + Chrome after the last run")
+BROWSER_REQUESTS_TOTAL = Counter(
+    "ktu_browser_requests_total", "Requests made by the scraper's Chrome, blocked by lean page mode or allowed",
+    ("outcome",)
+)
+BROWSER_BYTES_TOTAL = Counter("ktu_browser_bytes_total", "Bytes downloaded by the scraper's Chrome")
+
+# Webhooks
+WEBHOOK_BATCHES_TOTAL = Counter("ktu_webhook_batches_total", "Webhook batches by result", ("result",))
+WEBHOOK_ANNOUNCEMENTS_TOTAL = Counter(
+    "ktu_webhook_announcements_delivered_total", "Announcements acknowledged by webhook subscribers"
+)
+WEBHOOK_SECONDS = Histogram(
+    "ktu_webhook_delivery_seconds", "Time for a subscriber to answer one batch",
+    (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+# Other sources (sources.py)
+SOURCE_SCRAPES_TOTAL = Counter(
+    "ktu_source_scrapes_total", "Scrapes of registered sources other than announcements, by result",
+    ("source", "result")
+)
+SOURCE_SCRAPE_SECONDS = Histogram(
+    "ktu_source_scrape_duration_seconds", "Wall time of a source scrape, including waiting for the browser",
+    (0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+    ("source",)
+)
+
+# Startup
+STARTUP_PHASE_SECONDS = Gauge(
+    "ktu_startup_phase_seconds", "Time spent in each startup phase (slowest worker)", ("phase",)
+)
+
+# Backfill
+BACKFILL_PAGES_TOTAL = Counter("ktu_backfill_pages_total", "Older pages walked by the backfill, by result", ("result",))
+BACKFILL_ANNOUNCEMENTS_TOTAL = Counter(
+    "ktu_backfill_announcements_total", "Announcements the backfill added to the archive"
+)
+
+# HTTP
+REQUEST_SECONDS = Histogram(
+    "ktu_http_request_duration_seconds", "Time to produce a response, per endpoint",
+    (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10),
+    ("endpoint",)
+)
+REQUESTS_TOTAL = Counter("ktu_http_requests_total", "Requests per endpoint and status", ("endpoint", "status"))
+RESPONSE_BYTES = Histogram(
+    "ktu_http_response_bytes", "Response body size, per endpoint",
+    (100, 1000, 10000, 50000, 100000, 250000, 500000, 1000000, 5000000),
+    ("endpoint",)
+)
+STALE_SERVES_TOTAL = Counter("ktu_stale_serves_total", "Announcements served from a cache older than CACHE_DURATION")
+REFRESH_TRIGGERS_TOTAL = Counter(
+    "ktu_refresh_triggers_total", "Refresh triggers by source and whether they started or joined a job",
+    ("trigger", "outcome")
+)
+
+def _copy(value):
+    return [list(value[0]), value[1], value[2]] if isinstance(value, list) else value
+
+def state():
+    """{name: [[label values, value], ...]} for every metric with samples"""
+    with _lock:
+        return {m.name: [[list(k), _copy(v)] for k, v in m.values.items()] for m in _registry if m.values}
+
+def dump():
+    """Write this worker's state for the other workers' /metrics (skipped if unchanged)"""
+    global _dumped
+    if _changes == _dumped:
+        return
+    changes = _changes
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    snapshot_files.write_atomic(os.path.join(METRICS_DIR, f"{os.getpid()}.json"), json.dumps(state()).encode("utf-8"))
+    _dumped = changes
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+def collect():
+    """This worker's live state merged with the last dump of every other live worker"""
+    own = state()
+    merged = {m.name: {tuple(k): v for k, v in own.get(m.name, [])} for m in _registry}
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+        try:
+            pid = int(os.path.basename(path)[:-5])
+        except ValueError:
+            continue
+        if pid == os.getpid():
+            continue
+        if not _alive(pid):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                other = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for metric in _registry:
+            values = merged[metric.name]
+            for key, value in other.get(metric.name, []):
+                key = tuple(key)
+                values[key] = _merge(metric, values.get(key), value)
+    return merged
+
+def _merge(metric, a, b):
+    if a is None:
+        return b
+    if metric.kind == "histogram":
+        return [[x + y for x, y in zip(a[0], b[0])], a[1] + b[1], a[2] + b[2]]
+    if metric.kind == "gauge":
+        return max(a, b)
+    return a + b
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render(extra_gauges=()):
+    """All metrics in the Prometheus text exposition format (version 0.0.4)
+
+    extra_gauges: (name, help, value) computed by the caller at scrape time.
+    """
+    lines = []
+    values = collect()
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for key, value in sorted(values[metric.name].items()):
+            if metric.kind != "histogram":
+                lines.append(f"{metric.name}{_labels(metric.labelnames, key)} {_number(value)}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket in zip(metric.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{metric.name}_bucket{_labels(metric.labelnames, key, le)} {cumulative}")
+            lines.append(f"{metric.name}_sum{_labels(metric.labelnames, key)} {_number(total)}")
+            lines.append(f"{metric.name}_count{_labels(metric.labelnames, key)} {count}")
+    for name, documentation, value in extra_gauges:
+        if value is None:
+            continue
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {_number(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# page_ready.py
+"""
+Page readiness signals for the Selenium scraper.
+
+Instead of sleeping for a fixed time after every page load or "next" click,
+the scraper waits on something concrete:
+  - the first announcement block (div.row.m-b-25) appearing
+  - the listing switching pages after a pagination click: the first title
+    element replaced, its text changed, or another pager number active
+  - optionally, network idle seen through Chrome's performance log
+
+Every wait is bounded by a timeout and recorded in `timings` so a run can
+report how long it actually spent waiting.
+"""
+
+import os
+import time
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+import lean_page
+
+BLOCK_SELECTOR = "div.row.m-b-25"
+TITLE_SELECTOR = "div.row.m-b-25 h6.f-w-bold"
+ACTIVE_PAGE_SELECTOR = "ul.pagination li.active"
+POLL_SECONDS = 0.1
+NETWORK_IDLE = os.getenv("WAIT_FOR_NETWORK_IDLE", "false").lower() == "true"
+NETWORK_IDLE_SECONDS = 0.5  # no requests in flight for this long counts as idle
+
+timings = []  # [{"signal", "seconds", "ok"}] for the current run
+
+def reset_timings():
+    del timings[:]
+
+def record(signal, started, ok):
+    elapsed = round(time.time() - started, 3)
+    timings.append({"signal": signal, "seconds": elapsed, "ok": ok})
+    print(f"Wait '{signal}': {elapsed}s{'' if ok else ' (timed out)'}")
+    return ok
+
+def summary():
+    """Total seconds spent waiting, per signal"""
+    totals = {}
+    for t in timings:
+        totals[t["signal"]] = round(totals.get(t["signal"], 0) + t["seconds"], 3)
+    return totals
+
+def enable_network_log(chrome_options):
+    """Turn on the performance log needed by wait_for_network_idle and lean page stats"""
+    if NETWORK_IDLE or lean_page.LEAN_PAGE:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+def first_block_title(driver, selector=TITLE_SELECTOR):
+    """Title text of the first announcement block, or None if there is none"""
+    return driver.execute_script(
+        "var el = document.querySelector(arguments[0]);"
+        "return el ? el.textContent.trim() : null;",
+        selector
+    )
+
+def wait_for_first_block(driver, timeout, selector=TITLE_SELECTOR):
+    """Wait until the first announcement block (or another listing's first item) has a title"""
+    started = time.time()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_SECONDS).until(
+            lambda d: first_block_title(d, selector)
+        )
+        ok = True
+    except TimeoutException:
+        ok = False
+    record("first_block", started, ok)
+    if ok and NETWORK_IDLE:
+        wait_for_network_idle(driver, timeout)
+    return ok
+
+def mark_page(driver, selector=TITLE_SELECTOR):
+    """Remember the page the listing shows, for wait_for_page_change
+
+    Tags the first title element in the DOM and returns its text and the
+    active pager number. Titles alone are not enough: two pages can start
+    with the same announcement.
+    """
+    return driver.execute_script(
+        "var el = document.querySelector(arguments[0]);"
+        "if (el) el.__pageReadyOld = true;"
+        "var active = document.querySelector(arguments[1]);"
+        "return {title: el ? el.textContent.trim() : null,"
+        "        active: active ? active.textContent.trim() : null};",
+        selector, ACTIVE_PAGE_SELECTOR
+    )
+
+PAGE_CHANGED_SCRIPT = """
+var el = document.querySelector(arguments[0]);
+var title = el ? el.textContent.trim() : null;
+if (!title) return false;
+var active = document.querySelector(arguments[1]);
+active = active ? active.textContent.trim() : null;
+return !el.__pageReadyOld || title != arguments[2].title ||
+       (active !== null && active != arguments[2].active);
+"""
+
+def wait_for_page_change(driver, mark, timeout, selector=TITLE_SELECTOR):
+    """Wait until the listing shows another page than mark (from mark_page) and has a title
+
+    The page counts as switched once the tagged title element is gone (the
+    list was re-rendered), its text changed, or another pager number is active.
+    """
+    started = time.time()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_SECONDS).until(
+            lambda d: d.execute_script(PAGE_CHANGED_SCRIPT, selector, ACTIVE_PAGE_SELECTOR, mark)
+        )
+        ok = True
+    except TimeoutException:
+        ok = False
+    return record("page_change", started, ok)
+
+def wait_for_network_idle(driver, timeout, idle_seconds=NETWORK_IDLE_SECONDS):
+    """Wait until no network request has been in flight for idle_seconds"""
+    started = time.time()
+    inflight = set()
+    quiet_since = time.time()
+    ok = False
+    while time.time() - started < timeout:
+        try:
+            messages = lean_page.read_network_log(driver)
+        except WebDriverException:
+            break  # performance log not enabled for this driver
+        for message in messages:
+            method = message.get("method", "")
+            request_id = message.get("params", {}).get("requestId")
+            if method == "Network.requestWillBeSent":
+                inflight.add(request_id)
+            elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                inflight.discard(request_id)
+            else:
+                continue
+            quiet_since = time.time()
+        if not inflight and time.time() - quiet_since >= idle_seconds:
+            ok = True
+            break
+        time.sleep(POLL_SECONDS)
+    return record("network_idle", started, ok)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# refresh_jobs.py
+"""
+Single-flight refresh jobs.
+
+Every scrape trigger (the scheduler, a stale read, /api/ktu/refresh, a
+refresh asked for through a follower worker) goes through submit(). If a job
+is already queued or running, the trigger joins it, so concurrent triggers
+collapse into one job id and one scraper thread. Jobs and their phase
+timestamps are kept in the SQLite store: any worker can report on a job at
+/api/ktu/jobs/<id> or wait for it, but only the leader's JobRunner runs them.
+"""
+
+import json
+import threading
+import time
+import uuid
+from datetime import datetime
+import announcement_store
+
+JOB_HISTORY = 100  # finished jobs kept for /api/ktu/jobs/<id>
+WAIT_POLL_SECONDS = 0.5  # how often waiters in other workers re-read a job
+ACTIVE = ("queued", "running")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    trigger TEXT NOT NULL,
+    status TEXT NOT NULL,
+    phases TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    finished_at REAL,
+    error TEXT,
+    snapshot_version INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status);
+"""
+
+_finished = threading.Condition()  # wakes waiters in the leader as soon as a job ends
+
+def connect():
+    conn = announcement_store.connect()
+    conn.executescript(SCHEMA)
+    return conn
+
+def submit(trigger):
+    """Queue a refresh, or join the active one; returns (job_id, joined)"""
+    conn = connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")  # check-and-insert is atomic across workers
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at LIMIT 1"
+        ).fetchone()
+        if row is not None:
+            conn.rollback()
+            return row["id"], True
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        conn.execute(
+            "INSERT INTO jobs (id, trigger, status, phases, created_at) VALUES (?, ?, 'queued', ?, ?)",
+            (job_id, trigger, json.dumps([["queued", now]]), now)
+        )
+        conn.execute(
+            "DELETE FROM jobs WHERE id NOT IN (SELECT id FROM jobs ORDER BY created_at DESC LIMIT ?)",
+            (JOB_HISTORY,)
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return job_id, False
+
+def abandon_running():
+    """Fail jobs left 'running' by a leader that has exited"""
+    conn = connect()
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Scraper leader exited', finished_at = ? "
+                "WHERE status = 'running'",
+                (time.time(),)
+            )
+    finally:
+        conn.close()
+
+def next_queued():
+    """(job_id, trigger) of the oldest queued job, or None"""
+    conn = connect()
+    try:
+        row = conn.execute(
+            "SELECT id, trigger FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+        ).fetchone()
+    finally:
+        conn.close()
+    return (row["id"], row["trigger"]) if row else None
+
+def get(job_id):
+    """A job as a JSON-ready dict, or None if unknown"""
+    conn = connect()
+    try:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+
+    phases = json.loads(row["phases"])
+    end = row["finished_at"] or time.time()
+    timeline = []
+    for i, (name, started) in enumerate(phases):
+        until = phases[i + 1][1] if i + 1 < len(phases) else end
+        timeline.append({
+            "phase": name,
+            "started_at": datetime.fromtimestamp(started).isoformat(),
+            "seconds": round(until - started, 3)
+        })
+    return {
+        "id": row["id"],
+        "trigger": row["trigger"],
+        "status": row["status"],
+        "phase": phases[-1][0] if row["status"] in ACTIVE else row["status"],
+        "phases": timeline,
+        "created_at": datetime.fromtimestamp(row["created_at"]).isoformat(),
+        "finished_at": datetime.fromtimestamp(row["finished_at"]).isoformat() if row["finished_at"] else None,
+        "duration_seconds": round(end - row["created_at"], 3),
+        "error": row["error"],
+        "snapshot_version": row["snapshot_version"]
+    }
+
+def wait(job_id, timeout):
+    """Block until the job finishes or timeout passes; returns get(job_id)"""
+    deadline = time.time() + timeout
+    while True:
+        job = get(job_id)
+        remaining = deadline - time.time()
+        if job is None or job["status"] not in ACTIVE or remaining <= 0:
+            return job
+        with _finished:
+            _finished.wait(min(WAIT_POLL_SECONDS, remaining))
+
+class Job:
+    """Handle passed to the runner so it can report which phase it is in"""
+
+    def __init__(self, job_id, trigger=None):
+        self.id = job_id
+        self.trigger = trigger
+        self.phases = None
+
+    def phase(self, name):
+        conn = connect()
+        try:
+            with conn:
+                if self.phases is None:
+                    row = conn.execute("SELECT phases FROM jobs WHERE id = ?", (self.id,)).fetchone()
+                    self.phases = json.loads(row["phases"])
+                self.phases.append([name, time.time()])
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', phases = ? WHERE id = ?",
+                    (json.dumps(self.phases), self.id)
+                )
+        finally:
+            conn.close()
+
+    def finish(self, error=None, snapshot_version=None):
+        conn = connect()
+        try:
+            with conn:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, snapshot_version = ?, finished_at = ? WHERE id = ?",
+                    ("failed" if error else "succeeded", error, snapshot_version, time.time(), self.id)
+                )
+        finally:
+            conn.close()
+
+class JobRunner:
+    """Runs queued jobs one at a time on a background thread (leader only)
+
+    runner(job) does the scrape, calls job.phase() as it goes, returns the
+    published snapshot version and raises on failure.
+    """
+
+    def __init__(self, runner):
+        self.runner = runner
+        self.running = None  # id of the job this process is running
+        self._lock = threading.Lock()
+
+    def trigger(self, trigger):
+        """Submit a refresh and make sure it runs; returns (job_id, joined)"""
+        with self._lock:
+            if self.running is not None:  # fast path: no store round trip under load
+                return self.running, True
+        job_id, joined = submit(trigger)
+        self.run_pending()
+        return job_id, joined
+
+    def run_pending(self):
+        """Start the oldest queued job unless one is already running here"""
+        with self._lock:
+            if self.running is not None:
+                return None
+            queued = next_queued()
+            if queued is None:
+                return None
+            job_id, trigger = queued
+            self.running = job_id
+        threading.Thread(target=self._run, args=(job_id, trigger), daemon=True).start()
+        return job_id
+
+    def _run(self, job_id, trigger):
+        job = Job(job_id, trigger)
+        try:
+            version = self.runner(job)
+            job.finish(snapshot_version=version)
+        except Exception as e:
+            job.finish(error=str(e) or type(e).__name__)
+        finally:
+            with self._lock:
+                self.running = None
+            with _finished:
+                _finished.notify_all()
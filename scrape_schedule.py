@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# scrape_schedule.py
+"""
+Adaptive, change-aware scrape schedule.
+
+Instead of scraping every 30 minutes around the clock, the leader learns
+when KTU actually posts. The week is split into 168 hour-of-week slots (in
+KTU's own time zone); every run that finds new or changed announcements
+adds weight to the slots between the previous run and this one, and old
+observations fade with a half-life. The delay to the next run is then:
+
+- short in slots that often see changes, long in quiet ones (geometric
+  between SCHEDULE_MIN_MINUTES and SCHEDULE_MAX_MINUTES),
+- stretched by SCHEDULE_BACKOFF for every consecutive run that found
+  nothing, and cut short at the start of a busier slot,
+- an exponential retry backoff after failures (timeouts count double),
+- randomized by +/- SCHEDULE_JITTER.
+
+Until enough changes are observed, weekday office hours are assumed busy.
+The learned state lives in the SQLite store, so it survives restarts.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+import announcement_store
+
+MIN_MINUTES = float(os.getenv("SCHEDULE_MIN_MINUTES", "5"))
+MAX_MINUTES = float(os.getenv("SCHEDULE_MAX_MINUTES", "240"))
+BACKOFF = float(os.getenv("SCHEDULE_BACKOFF", "1.5"))  # per consecutive unchanged run
+MAX_BACKOFF = float(os.getenv("SCHEDULE_MAX_BACKOFF", "2"))  # unchanged runs stretch a slot's delay at most this much
+FAILURE_MINUTES = float(os.getenv("SCHEDULE_FAILURE_MINUTES", "5"))  # first retry after a failure
+JITTER = float(os.getenv("SCHEDULE_JITTER", "0.2"))
+HALF_LIFE_DAYS = float(os.getenv("SCHEDULE_HALF_LIFE_DAYS", "28"))
+UTC_OFFSET_HOURS = float(os.getenv("SCHEDULE_UTC_OFFSET_HOURS", "5.5"))  # KTU posts on IST
+
+SLOTS = 7 * 24
+PRIOR_HOURS = range(9, 18)  # assumed busy before anything is learned: Mon-Sat 09:00-18:00
+PRIOR_DAYS = range(0, 6)
+PRIOR_WEIGHT = 0.5
+REFERENCE_SLOTS = 12  # a slot as busy as the average of the 12 busiest gets MIN_MINUTES
+ACTIVITY_EXPONENT = 0.5  # < 1 keeps slots with some history close to the busiest one
+SPREAD_STEP = 900  # a change is spread over the gap since the last run in 15-minute steps
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS schedule_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+def connect():
+    conn = announcement_store.connect()
+    conn.executescript(SCHEMA)
+    return conn
+
+def initial_state():
+    slots = [0.0] * SLOTS
+    for day in PRIOR_DAYS:
+        for hour in PRIOR_HOURS:
+            slots[day * 24 + hour] = PRIOR_WEIGHT
+    return {
+        "slots": slots,
+        "decayed_at": time.time(),
+        "last_success": None,
+        "unchanged": 0,
+        "failures": 0,
+        "next_run": None,
+        "runs": 0,
+        "changes": 0
+    }
+
+def load_state():
+    """The persisted schedule state, or None before the first run"""
+    conn = connect()
+    try:
+        row = conn.execute("SELECT state FROM schedule_state WHERE id = 1").fetchone()
+    finally:
+        conn.close()
+    return json.loads(row["state"]) if row else None
+
+def save_state(state):
+    conn = connect()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO schedule_state (id, state, updated_at) VALUES (1, ?, ?)",
+                (json.dumps(state), time.time())
+            )
+    finally:
+        conn.close()
+
+def slot_of(ts):
+    """Hour-of-week slot (0 = Monday 00:00 KTU time)"""
+    local = time.gmtime(ts + UTC_OFFSET_HOURS * 3600)
+    return local.tm_wday * 24 + local.tm_hour
+
+def slot_minutes(slots, slot):
+    """Base delay for a slot: MIN_MINUTES in the busiest slots, MAX_MINUTES in one never seen changing"""
+    busiest = sorted(slots, reverse=True)[:REFERENCE_SLOTS]
+    reference = sum(busiest) / len(busiest) or 1.0  # not the single peak, which is mostly noise
+    activity = min(slots[slot] / reference, 1.0) ** ACTIVITY_EXPONENT
+    return MAX_MINUTES * (MIN_MINUTES / MAX_MINUTES) ** activity
+
+def describe(state, now=None):
+    """JSON-ready summary for /api/ktu/status"""
+    if state is None:
+        return None
+    now = now or time.time()
+    slots = state["slots"]
+    busiest = sorted(range(SLOTS), key=lambda s: slots[s], reverse=True)[:5]
+    days = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+    return {
+        "next_run_in_seconds": round(state["next_run"] - now) if state["next_run"] else None,
+        "current_interval_minutes": round(slot_minutes(slots, slot_of(now)), 1),
+        "unchanged_runs": state["unchanged"],
+        "failures": state["failures"],
+        "runs": state["runs"],
+        "changes_seen": state["changes"],
+        "busiest_hours": [f"{days[s // 24]} {s % 24:02d}:00" for s in busiest if slots[s] > 0]
+    }
+
+class AdaptiveSchedule:
+    """Learns from run outcomes and decides when the next scheduled run is due (leader only)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.state = load_state() or initial_state()
+
+    def _decay(self, now):
+        days = (now - self.state["decayed_at"]) / 86400
+        if days > 0:
+            factor = 0.5 ** (days / HALF_LIFE_DAYS)
+            self.state["slots"] = [w * factor for w in self.state["slots"]]
+            self.state["decayed_at"] = now
+
+    def _observe_change(self, now):
+        """Credit the change to every slot between the previous successful run and now"""
+        since = self.state["last_success"]
+        if since is None or now - since > MAX_MINUTES * 60 * 2:
+            since = now - MIN_MINUTES * 60  # gap unknown or too long to say when it happened
+        steps = [t for t in range(int(since) + SPREAD_STEP, int(now), SPREAD_STEP)] + [now]
+        for t in steps:
+            self.state["slots"][slot_of(t)] += 1.0 / len(steps)
+
+    def _delay(self, now):
+        """Seconds until the next run, before jitter"""
+        state = self.state
+        if state["failures"]:
+            minutes = FAILURE_MINUTES * 2 ** min(state["failures"] - 1, 20)
+            return min(minutes, MAX_MINUTES) * 60
+
+        backoff = min(BACKOFF ** min(state["unchanged"], 20), MAX_BACKOFF)
+        minutes = min(slot_minutes(state["slots"], slot_of(now)) * backoff, MAX_MINUTES)
+        # Wake up at the start of the first upcoming hour that wants a shorter delay
+        hour_start = now - (now + UTC_OFFSET_HOURS * 3600) % 3600  # KTU-time hours (IST is :30 off UTC)
+        for hour in range(1, int(minutes // 60) + 1):
+            boundary = hour_start + hour * 3600
+            if boundary - now >= minutes * 60:
+                break
+            if slot_minutes(state["slots"], slot_of(boundary)) < minutes:
+                return boundary - now
+        return minutes * 60
+
+    def record_run(self, ok, changed=None, timeout=False, now=None):
+        """Fold one finished run into the state and persist it; returns the next run time
+
+        changed is None when the run had nothing to compare against (first run).
+        """
+        now = now or time.time()
+        with self._lock:
+            state = self.state
+            self._decay(now)
+            state["runs"] += 1
+            if not ok:
+                state["failures"] += 2 if timeout else 1
+            else:
+                state["failures"] = 0
+                if changed:
+                    self._observe_change(now)
+                    state["changes"] += 1
+                    state["unchanged"] = 0
+                elif changed is not None:
+                    state["unchanged"] += 1
+                state["last_success"] = now
+            delay = self._delay(now) * random.uniform(1 - JITTER, 1 + JITTER)
+            state["next_run"] = now + max(delay, 60)
+            save_state(state)
+            return state["next_run"]
+
+    def next_run(self, now=None):
+        """When the next scheduled run is due (soon if the state has none)"""
+        now = now or time.time()
+        with self._lock:
+            next_run = self.state["next_run"]
+        if next_run is None:
+            return now + 60
+        return max(next_run, now + random.uniform(5, 60))  # spread restarts after a long outage
+
+    def overdue(self, grace=300, now=None):
+        """True if the scheduled run should have happened by now (scheduler stuck or not started)"""
+        now = now or time.time()
+        with self._lock:
+            next_run = self.state["next_run"]
+        return next_run is None or now > next_run + grace
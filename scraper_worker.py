@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# scraper_worker.py
+"""
+Long-lived scraper worker that keeps one browser session warm between runs.
+
+The worker runs in its own process (so Chrome crashes and memory stay out of
+the web server). Jobs arrive on a queue; each job reloads the announcements
+page (or another registered source's listing, see sources.py) in the
+already-running browser, scrapes it, publishes the snapshot files and sends
+the result back on a result queue. API fetches share one kept-alive
+requests.Session the same way. The browser is recycled after
+SCRAPER_WORKER_MAX_JOBS jobs or once Chrome's RSS passes
+SCRAPER_WORKER_MAX_RSS_MB.
+"""
+
+import atexit
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+
+MAX_JOBS_PER_BROWSER = int(os.getenv("SCRAPER_WORKER_MAX_JOBS", "20"))
+MAX_BROWSER_RSS_MB = int(os.getenv("SCRAPER_WORKER_MAX_RSS_MB", "350"))
+PARENT_CHECK_SECONDS = 5  # how often an idle worker checks that the server that started it is still alive
+
+def process_tree_rss_mb(root_pid):
+    """Total RSS in MB of a process and all its descendants (Linux /proc)"""
+    children = {}
+    rss_kb = {}
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                stat = f.read()
+            with open(f"/proc/{entry}/statm", "r") as f:
+                pages = int(f.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        # ppid is the 2nd field after the parenthesised command name
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+        rss_kb[int(entry)] = pages * (os.sysconf("SC_PAGE_SIZE") // 1024)
+
+    total_kb = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        total_kb += rss_kb.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total_kb / 1024
+
+def peak_rss_mb(children=False):
+    """Peak RSS in MB of this process, or of its largest finished child process"""
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    return usage.ru_maxrss / 1024  # ru_maxrss is in KB on Linux
+
+def browser_rss_mb(driver):
+    """RSS of chromedriver plus the Chrome processes it started"""
+    try:
+        return process_tree_rss_mb(driver.service.process.pid)
+    except Exception:
+        return 0.0
+
+def parent_gone(parent, ppid):
+    """True once the server process that started this worker has exited"""
+    if parent is not None and not parent.is_alive():
+        return True
+    return os.getppid() != ppid  # reparented: whoever forked us is gone
+
+def worker_loop(job_queue, result_queue):
+    """Worker process entry point: serve scrape jobs until a None job arrives or the server exits"""
+    # Own process group so the parent can kill Chrome along with us on timeout.
+    # That also keeps us out of the server's signals, so we watch for it
+    # exiting ourselves rather than outliving it with a browser open.
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    parent = multiprocessing.parent_process()
+    ppid = os.getppid()
+
+    import ktu_api_client
+    import ktu_scrape_site
+    import page_ready
+    import sources
+
+    state = {"driver": None, "jobs": 0, "session": None}
+
+    def get_session():
+        if state["session"] is None:
+            state["session"] = ktu_api_client.make_session()
+        return state["session"]
+
+    def get_driver():
+        if state["driver"] is None:
+            print("[worker] Starting browser")
+            state["driver"] = ktu_scrape_site.make_driver(headless=ktu_scrape_site.HEADLESS)
+            state["jobs"] = 0
+        return state["driver"]
+
+    def recycle_driver(reason):
+        if state["driver"] is not None:
+            print(f"[worker] Recycling browser: {reason}")
+            try:
+                state["driver"].quit()
+            except Exception:
+                pass
+            state["driver"] = None
+
+    while True:
+        try:
+            job = job_queue.get(timeout=PARENT_CHECK_SECONDS)
+        except queue.Empty:
+            if parent_gone(parent, ppid):
+                print("[worker] Server exited, shutting down")
+                break
+            continue
+        if job is None:
+            break
+
+        started = time.time()
+        reply = {"id": job.get("id")}
+        try:
+            source = sources.get(job["source"]) if job.get("source") else None
+            if source is None or source.name == sources.ANNOUNCEMENTS:
+                result = ktu_scrape_site.scrape(driver_factory=get_driver, session=get_session())
+                pointer = ktu_scrape_site.save_result(result)
+            else:
+                result = sources.scrape(source, driver_factory=get_driver, session=get_session())
+                pointer = sources.save(source, result)
+            reply.update(ok=True, result=result, snapshot=pointer)
+        except Exception as e:
+            reply.update(ok=False, error=str(e))
+            recycle_driver(f"job failed ({e})")
+
+        if state["driver"] is not None:
+            state["jobs"] += 1
+            rss = browser_rss_mb(state["driver"])
+            reply["browser_rss_mb"] = round(rss, 1)
+            if state["jobs"] >= MAX_JOBS_PER_BROWSER:
+                recycle_driver(f"{state['jobs']} jobs served")
+            elif rss > MAX_BROWSER_RSS_MB:
+                recycle_driver(f"RSS {rss:.0f}MB over {MAX_BROWSER_RSS_MB}MB")
+
+        reply["wait_seconds"] = page_ready.summary()
+        reply["phase_seconds"] = dict(ktu_scrape_site.phase_seconds)
+        reply["phase_log"] = list(ktu_scrape_site.phase_log)
+        reply["network"] = dict(ktu_scrape_site.lean_page.stats)
+        reply["peak_rss_mb"] = round(peak_rss_mb(), 1)
+        reply["duration"] = round(time.time() - started, 2)
+        result_queue.put(reply)
+
+    recycle_driver("shutdown")
+    if state["session"] is not None:
+        state["session"].close()
+
+class ScraperWorker:
+    """Parent-side handle for the worker process"""
+
+    def __init__(self):
+        # Not fork: the parent is a threaded gunicorn worker, and a lock some
+        # other thread holds at fork time (stdout, sqlite, metrics) would stay
+        # locked forever in the child. The fork server is a fresh process that
+        # preloads this module and forks workers from there; spawn is the
+        # fallback where there is no fork server. Either way the worker still
+        # imports the parent's __main__ (as __mp_main__), so server.py only
+        # boots when it is not imported under that name.
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self._ctx = multiprocessing.get_context("forkserver")
+            self._ctx.set_forkserver_preload([__name__])
+        else:
+            self._ctx = multiprocessing.get_context("spawn")
+        self._process = None
+        self._jobs = None
+        self._results = None
+        self._next_id = 0
+        self._lock = threading.Lock()  # one job at a time: the job runner and source runs share the browser
+        atexit.register(self.kill)  # the worker and Chrome are in their own process group, so take them down with us
+
+    def _ensure_started(self):
+        if self._process is not None and self._process.is_alive():
+            return
+        self._jobs = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._process = self._ctx.Process(
+            target=worker_loop, args=(self._jobs, self._results), daemon=True
+        )
+        self._process.start()
+
+    def run(self, timeout, source=None):
+        """Run one scrape job (of a registered source; announcements if None) and return the reply dict
+
+        Callers wait for the job in flight first. Raises TimeoutError (after
+        killing the worker and its browser) if the job does not finish
+        within timeout seconds.
+        """
+        with self._lock:
+            return self._run(timeout, source)
+
+    def _run(self, timeout, source):
+        self._ensure_started()
+        self._next_id += 1
+        job_id = self._next_id
+        self._jobs.put({"id": job_id, "source": source})
+        deadline = time.time() + timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                self.kill()
+                raise TimeoutError(f"Scraper worker timed out after {timeout} seconds")
+            try:
+                reply = self._results.get(timeout=min(remaining, 1.0))
+            except queue.Empty:
+                if not self._process.is_alive():
+                    code = self._process.exitcode
+                    self._process = None
+                    raise RuntimeError(f"Scraper worker exited with code {code}")
+                continue
+            if reply.get("id") == job_id:
+                return reply
+
+    def kill(self):
+        """Kill the worker and the browser it started"""
+        if self._process is None:
+            return
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(self._process.pid, signal.SIGKILL)
+            else:
+                self._process.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+        self._process.join(5)
+        self._process = None
+
+    def stop(self):
+        """Ask the worker to quit its browser and exit"""
+        if self._process is None:
+            return
+        self._jobs.put(None)
+        self._process.join(10)
+        if self._process.is_alive():
+            self.kill()
+        self._process = None
@@ -1,47 +1,302 @@
-from flask import Flask, jsonify
+import time
+BOOT_STARTED = time.perf_counter()  # taken before the other imports so the startup timings include them
+
+# Only what serving the published snapshot needs is imported here. Leader-side
+# modules that pull in requests/bs4 (attachments, backfill, change_probe,
+# webhooks) and APScheduler are imported where they are used, after boot;
+# selenium is only ever imported by the scraper process.
+from flask import Flask, Response, g, jsonify, request, send_file, stream_with_context
 from flask_cors import CORS
-from apscheduler.schedulers.background import BackgroundScheduler
-from ktu_scrape_site import main as scrape_main
+from scraper_worker import ScraperWorker, peak_rss_mb
+import announcement_store
+import archive
+import change_feed
+import leader
+import metrics
+import refresh_jobs
+import scrape_schedule
+import snapshot_files
+import sources
+from snapshot_index import FIELDS, SnapshotIndex
+import hashlib
+import hmac
 import json
 import os
 import subprocess
 import threading
-import time
 from datetime import datetime
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for WordPress integration
+CORS(app, expose_headers=["ETag", "X-Cache-Age-Seconds", "X-Cached-At"])  # Enable CORS for WordPress integration
 
 # Cache for announcements data
 cache = {
     "data": None,
+    "variants": None,  # {"identity"|"gzip"|"br": bytes} pre-encoded JSON of "data"
+    "etag": None,      # content hash of the identity payload
+    "index": None,     # SnapshotIndex for paged/filtered queries
+    "version": None,   # published snapshot version the cache holds (None if unversioned)
     "last_updated": None,
     "is_scraping": False,
     "last_error": None,
-    "last_scraper_output": None
+    "last_scraper_output": None,
+    "last_probe": None
 }
 cache_lock = threading.Lock()
 
+def new_source_cache():
+    return {"data": None, "variants": None, "etag": None, "index": None, "version": None,
+            "last_updated": None, "is_scraping": False, "last_error": None}
+
+# Independent caches of the other registered listings (sources.py), also guarded by cache_lock
+source_caches = {source.name: new_source_cache() for source in sources.extra()}
+
 JSON_FILE = "ktu_announcements.json"
 CACHE_DURATION = 3600  # 1 hour in seconds
+SCRAPER_TIMEOUT = 120  # seconds
+SCRAPER_MODE = os.getenv("SCRAPER_MODE", "worker").lower()  # "worker" (warm browser) or "subprocess"
+STALE_GRACE_SECONDS = 300  # stale reads only trigger a scrape once the scheduled run is this late
+SNAPSHOT_POLL_SECONDS = 2  # how often workers check for a new snapshot / queued job / leadership
+REFRESH_MAX_WAIT = 300  # cap on ?wait= for /api/ktu/refresh and /api/ktu/jobs/<id>
+
+SEARCH_MAX_LIMIT = 100
+PAGE_MAX_LIMIT = 100
+QUERY_PARAMS = ("limit", "cursor", "since", "until", "has_attachment", "fields")
+ATTACHMENT_MAX_AGE = 365 * 24 * 3600  # files are content-addressed, so cache them for a year
+SSE_HEARTBEAT_SECONDS = 15
+SSE_MAX_SECONDS = 300  # clients reconnect with Last-Event-ID after this
+SSE_MAX_CLIENTS = int(os.getenv("SSE_MAX_CLIENTS", "20"))  # keep threads free for normal requests
+WEBHOOK_ADMIN_TOKEN = os.getenv("WEBHOOK_ADMIN_TOKEN")  # required to manage subscribers over HTTP
+STARTUP_DEFER_SECONDS = float(os.getenv("STARTUP_DEFER_SECONDS", "10"))  # start leader duties by then without a request
+
+sse_clients = threading.BoundedSemaphore(SSE_MAX_CLIENTS)
+
+scraper_worker = None  # set by boot()
+
+class ScrapeFailed(Exception):
+    """A scrape that ran but produced no snapshot (message is what /debug shows)"""
+
+class ScrapeTimeout(ScrapeFailed):
+    """A scrape killed after SCRAPER_TIMEOUT"""
+
+def install_snapshot(data, updated_at=None, variants=None, version=None, target=None):
+    """Install a snapshot and its pre-encoded variants into the cache (or a source's cache).
+
+    Must be called with cache_lock held. Published snapshots arrive with
+    their JSON/gzip/brotli bytes already produced at publish time; anything
+    else is encoded and compressed here once, never on the request path.
+    """
+    target = cache if target is None else target
+    if not variants or "identity" not in variants:
+        variants = snapshot_files.compress(snapshot_files.encode(data))
+    target["data"] = data
+    target["variants"] = variants
+    target["etag"] = hashlib.sha256(variants["identity"]).hexdigest()[:32]
+    target["index"] = SnapshotIndex(data.get("announcements") or [])
+    target["version"] = version
+    target["last_updated"] = updated_at or time.time()
+
+def publish_snapshot(data, pointer=None, job=None):
+    """Install a freshly scraped snapshot, persist it and record its delta
+
+    A pointer to the version already installed means the scraper found
+    nothing new and only touched the pointer; that just confirms the cache.
+    """
+    import attachments
+
+    if job:
+        job.phase("installing")
+    with cache_lock:
+        unchanged = pointer is not None and pointer["version"] == cache["version"]
+        if unchanged:
+            cache["last_updated"] = pointer_mtime() or time.time()
+            cache["last_error"] = None
+    if unchanged:
+        print(f"[{datetime.now()}] Snapshot v{pointer['version']} unchanged")
+        return
+    variants = snapshot_files.read_variants(pointer) if pointer else None
+    with cache_lock:
+        previous = cache["data"]
+        install_snapshot(data, variants=variants, version=pointer["version"] if pointer else None)
+        cache["last_error"] = None
+    if job:
+        job.phase("storing")
+    store_snapshot(data)
+    delta = change_feed.snapshot_delta(previous, data)
+    try:
+        change_feed.record(previous, data, delta)
+    except Exception as e:
+        print(f"[{datetime.now()}] Failed to record change feed entry: {e}")
+    if previous is not None:  # the first snapshot is a baseline, not news
+        queue_webhooks(delta["added"])
+    try:
+        archive.add(delta["added"] + delta["changed"])
+    except Exception as e:
+        print(f"[{datetime.now()}] Failed to update the archive: {e}")
+    if job:
+        job.phase("attachments")
+    try:
+        downloaded, failed = attachments.resolve_new(data.get("announcements") or [])
+        if downloaded or failed:
+            print(f"[{datetime.now()}] Attachments: {downloaded} downloaded, {failed} failed")
+    except Exception as e:
+        print(f"[{datetime.now()}] Failed to resolve attachments: {e}")
+
+def queue_webhooks(announcements):
+    """Put new announcements in the webhook outbox; delivery happens on the dispatcher"""
+    import webhooks
+
+    try:
+        queued = webhooks.enqueue(announcements)
+        if queued:
+            print(f"[{datetime.now()}] Queued {queued} announcements for webhook delivery")
+            if dispatcher is not None:
+                dispatcher.wake()
+    except Exception as e:
+        print(f"[{datetime.now()}] Failed to queue webhooks: {e}")
+
+def record_delivery(subscriber_id, ok, count, seconds):
+    metrics.WEBHOOK_BATCHES_TOTAL.inc(result="delivered" if ok else "failed")
+    metrics.WEBHOOK_SECONDS.observe(seconds)
+    if ok:
+        metrics.WEBHOOK_ANNOUNCEMENTS_TOTAL.inc(count)
+
+def store_snapshot(data):
+    """Persist a snapshot's announcements into the SQLite store (outside cache_lock)"""
+    try:
+        added = announcement_store.save_announcements(data.get("announcements") or [])
+        print(f"[{datetime.now()}] Stored announcements in {announcement_store.DB_FILE} ({added} new)")
+    except Exception as e:
+        print(f"[{datetime.now()}] Failed to update announcement store: {e}")
+
+def run_scraper(job):
+    """Run one refresh job; returns the published snapshot version
+
+    Only called by the JobRunner, which already guarantees a single scrape
+    at a time. Failures are recorded in the cache for /debug and re-raised
+    so the job is marked failed.
+    """
+    if not scrape_needed(job):
+        metrics.SCRAPE_RUNS_TOTAL.inc(decision="skipped")
+        return confirm_snapshot()
+    metrics.SCRAPE_RUNS_TOTAL.inc(decision="executed")
 
-def run_scraper():
-    """Run the scraper in a safe way"""
     with cache_lock:
-        if cache["is_scraping"]:
-            print("Scraper already running, skipping...")
-            return
         cache["is_scraping"] = True
+        had_data = cache["data"] is not None
+    feed_version = change_feed.latest_version()
+
+    started = time.perf_counter()
+    try:
+        print(f"[{datetime.now()}] Starting scraper (job {job.id})...")
+        job.phase("scraping")
+        if SCRAPER_MODE == "subprocess":
+            version = run_scraper_subprocess(job)
+        else:
+            version = run_scraper_worker(job)
+        metrics.SCRAPES_TOTAL.inc(result="success")
+        changed = change_feed.latest_version() != feed_version if had_data else None
+        reschedule_after_run(True, changed)
+        return version
+    except Exception as e:
+        error_msg = str(e) if isinstance(e, ScrapeFailed) else f"Scraper error: {str(e)}"
+        print(f"[{datetime.now()}] {error_msg}")
+        timeout = isinstance(e, ScrapeTimeout)
+        metrics.SCRAPES_TOTAL.inc(result="timeout" if timeout else "failure")
+        with cache_lock:
+            cache["last_error"] = error_msg
+        reschedule_after_run(False, timeout=timeout)
+        raise ScrapeFailed(error_msg) from e
+    finally:
+        metrics.SCRAPE_DURATION_SECONDS.observe(time.perf_counter() - started)
+        with cache_lock:
+            cache["is_scraping"] = False
+
+def scrape_needed(job):
+    """Probe upstream before scheduled/stale scrapes; False if the snapshot is still current"""
+    import change_probe
+
+    if not change_probe.should_probe(job.trigger):
+        return True
+    job.phase("probing")
+    with cache_lock:
+        data = cache["data"]
+    started = time.perf_counter()
+    try:
+        result, reason = change_probe.probe(data)
+    except Exception as e:
+        result, reason = "inconclusive", f"probe error: {e}"
+    seconds = time.perf_counter() - started
+    metrics.SCRAPE_PHASE_SECONDS.observe(seconds, phase="probe")
+    with cache_lock:
+        cache["last_probe"] = {
+            "result": result,
+            "reason": reason,
+            "seconds": round(seconds, 3),
+            "at": datetime.now().isoformat()
+        }
+    print(f"[{datetime.now()}] Change probe: {result} ({reason}) in {seconds:.2f}s")
+    return result != "unchanged"
+
+def confirm_snapshot():
+    """Skip the scrape: mark the current snapshot as up to date; returns its version"""
+    snapshot_files.touch_pointer()  # followers and restarts take the new age from the pointer mtime
+    with cache_lock:
+        cache["last_updated"] = pointer_mtime() or time.time()
+        version = cache["version"]
+    reschedule_after_run(True, changed=False)
+    return version
+
+def run_scraper_worker(job):
+    """Run one job on the warm scraper worker and install its result"""
+    try:
+        reply = scraper_worker.run(timeout=SCRAPER_TIMEOUT)
+    except TimeoutError as e:
+        with cache_lock:
+            cache["last_scraper_output"] = {"returncode": "timeout"}
+        raise ScrapeTimeout(str(e))
+
+    with cache_lock:
+        cache["last_scraper_output"] = {
+            "returncode": 0 if reply["ok"] else 1,
+            "duration_seconds": reply.get("duration"),
+            "browser_rss_mb": reply.get("browser_rss_mb"),
+            "wait_seconds": reply.get("wait_seconds"),
+            "phase_seconds": reply.get("phase_seconds"),
+            "network": reply.get("network"),
+            "error": reply.get("error")
+        }
+    for phase, seconds in reply.get("phase_log") or []:
+        metrics.SCRAPE_PHASE_SECONDS.observe(seconds, phase=phase)
+    if reply.get("peak_rss_mb"):
+        metrics.SCRAPER_PEAK_RSS_BYTES.set(int(reply["peak_rss_mb"] * 1024 * 1024))
+    if reply.get("browser_rss_mb") is not None:
+        metrics.BROWSER_RSS_BYTES.set(int(reply["browser_rss_mb"] * 1024 * 1024))
+    network = reply.get("network") or {}
+    if network.get("requests"):
+        metrics.BROWSER_REQUESTS_TOTAL.inc(network["blocked"], outcome="blocked")
+        metrics.BROWSER_REQUESTS_TOTAL.inc(network["requests"] - network["blocked"], outcome="allowed")
+        metrics.BROWSER_BYTES_TOTAL.inc(network["bytes"])
 
+    if not reply["ok"]:
+        raise ScrapeFailed(f"Scraper failed: {reply.get('error')}")
+    print(f"[{datetime.now()}] Scraper completed successfully in {reply.get('duration')}s")
+    pointer = reply.get("snapshot")
+    metrics.SCRAPE_ANNOUNCEMENTS.observe(reply["result"].get("count") or 0)
+    publish_snapshot(reply["result"], pointer, job)
+    return pointer["version"] if pointer else None
+
+def run_scraper_subprocess(job):
+    """Run the scraper as a one-off subprocess and load the JSON it writes"""
     try:
-        print(f"[{datetime.now()}] Starting scraper...")
         # Use subprocess instead of os.system for security
         result = subprocess.run(
             ["python3", "ktu_scrape_site.py"],
             capture_output=True,
             text=True,
-            timeout=120  # 2 minute timeout
+            timeout=SCRAPER_TIMEOUT
         )
+        metrics.SCRAPER_PEAK_RSS_BYTES.set(int(peak_rss_mb(children=True) * 1024 * 1024))
 
         # Store output for debugging
         with cache_lock:
@@ -54,67 +309,365 @@ def run_scraper():
         if result.returncode == 0:
             print(f"[{datetime.now()}] Scraper completed successfully")
             print(f"[{datetime.now()}] Scraper stdout: {result.stdout[-200:]}")
-            # Load the new data into cache
-            if os.path.exists(JSON_FILE):
-                with open(JSON_FILE, "r", encoding="utf-8") as f:
-                    new_data = json.load(f)
-                with cache_lock:
-                    cache["data"] = new_data
-                    cache["last_updated"] = time.time()
-                    cache["last_error"] = None
-            else:
-                error_msg = "Scraper completed but JSON file not found"
-                print(f"[{datetime.now()}] {error_msg}")
-                with cache_lock:
-                    cache["last_error"] = error_msg
-        else:
-            error_msg = f"Scraper failed with code {result.returncode}: {result.stderr}"
-            print(f"[{datetime.now()}] {error_msg}")
-            with cache_lock:
-                cache["last_error"] = error_msg
+            # Load the newly published snapshot into cache
+            current = snapshot_files.read_current()
+            if current is None:
+                raise ScrapeFailed("Scraper completed but no snapshot was published")
+            pointer, new_data, _ = current
+            metrics.SCRAPE_ANNOUNCEMENTS.observe(new_data.get("count") or 0)
+            publish_snapshot(new_data, pointer, job)
+            return pointer["version"]
+        raise ScrapeFailed(f"Scraper failed with code {result.returncode}: {result.stderr}")
     except subprocess.TimeoutExpired as e:
-        error_msg = "Scraper timed out after 120 seconds"
-        print(f"[{datetime.now()}] {error_msg}")
         with cache_lock:
-            cache["last_error"] = error_msg
             cache["last_scraper_output"] = {
                 "stdout": e.stdout[-1000:] if e.stdout else "",
                 "stderr": e.stderr[-1000:] if e.stderr else "",
                 "returncode": "timeout"
             }
-    except Exception as e:
-        error_msg = f"Scraper error: {str(e)}"
-        print(f"[{datetime.now()}] {error_msg}")
-        with cache_lock:
-            cache["last_error"] = error_msg
-    finally:
-        with cache_lock:
-            cache["is_scraping"] = False
+        raise ScrapeTimeout(f"Scraper timed out after {SCRAPER_TIMEOUT} seconds")
+
+def read_legacy_snapshot():
+    """Snapshot from the unversioned JSON_FILE (pre-snapshot_files deployments)"""
+    if not os.path.exists(JSON_FILE):
+        return None
+    with open(JSON_FILE, "r", encoding="utf-8") as f:
+        return json.load(f), os.path.getmtime(JSON_FILE)
 
 def load_initial_cache():
-    """Load existing JSON file into cache on startup"""
+    """Load the current published snapshot into cache on startup"""
     try:
-        if os.path.exists(JSON_FILE):
-            with open(JSON_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
+        current = snapshot_files.read_current()
+        if current is not None:
+            pointer, data, variants = current
+            with cache_lock:
+                install_snapshot(data, updated_at=pointer_mtime(), variants=variants, version=pointer["version"])
+            print(f"Loaded snapshot v{pointer['version']} into cache")
+        else:
+            legacy = read_legacy_snapshot()
+            if legacy is None:
+                return
+            data, mtime = legacy
             with cache_lock:
-                cache["data"] = data
-                cache["last_updated"] = time.time()
+                install_snapshot(data, updated_at=mtime)
             print("Loaded existing data into cache")
     except Exception as e:
         print(f"Failed to load initial cache: {e}")
+    try:
+        reload_source_snapshots()
+    except Exception as e:
+        print(f"Failed to load source snapshots: {e}")
 
-# Initialize cache on startup
-load_initial_cache()
+def pointer_mtime(directory=snapshot_files.SNAPSHOT_DIR):
+    try:
+        return os.path.getmtime(os.path.join(directory, snapshot_files.POINTER_FILE))
+    except OSError:
+        return None
+
+def reload_published_snapshot():
+    """Follower: install the leader's snapshot if a newer version was published"""
+    pointer = snapshot_files.read_pointer()
+    with cache_lock:
+        if pointer is None:
+            return
+        if pointer["version"] == cache["version"]:
+            confirmed = pointer_mtime()  # touched by the leader when a probe found nothing new
+            if confirmed and confirmed > (cache["last_updated"] or 0):
+                cache["last_updated"] = confirmed
+            return
+    current = snapshot_files.read_current()
+    if current is None:
+        return
+    pointer, data, variants = current
+    with cache_lock:
+        install_snapshot(data, updated_at=pointer_mtime(), variants=variants, version=pointer["version"])
+    print(f"[{datetime.now()}] Loaded snapshot v{pointer['version']} published by the leader")
+
+def reload_source_snapshots():
+    """Install every other source's published snapshot whose version is not cached yet"""
+    for name, entry in source_caches.items():
+        directory = sources.get(name).snapshot_dir
+        pointer = snapshot_files.read_pointer(directory)
+        with cache_lock:
+            if pointer is None:
+                continue
+            if pointer["version"] == entry["version"]:
+                entry["last_updated"] = pointer_mtime(directory) or entry["last_updated"]  # touched if unchanged
+                continue
+        current = snapshot_files.read_current(directory)
+        if current is None:
+            continue
+        pointer, data, variants = current
+        with cache_lock:
+            install_snapshot(data, updated_at=pointer_mtime(directory), variants=variants,
+                             version=pointer["version"], target=entry)
+        print(f"[{datetime.now()}] Loaded {name} snapshot v{pointer['version']}")
+
+def schedule_sources():
+    """One interval job per other source on the leader's scheduler
+
+    A source's first run is due one interval after its cached snapshot, or
+    right away if it has none.
+    """
+    for source in sources.extra():
+        with cache_lock:
+            last_updated = source_caches[source.name]["last_updated"]
+        first_run = max(time.time(), (last_updated or 0) + source.interval_minutes * 60)
+        scheduler.add_job(
+            func=run_source, args=[source.name], trigger="interval", minutes=source.interval_minutes,
+            next_run_time=datetime.fromtimestamp(first_run), id=f"source:{source.name}",
+            replace_existing=True, coalesce=True, max_instances=1, misfire_grace_time=None
+        )
+        print(f"[{datetime.now()}] Source {source.name}: every {source.interval_minutes:g} min, "
+              f"next at {datetime.fromtimestamp(first_run).isoformat(timespec='seconds')}")
+
+def run_source(name):
+    """Scrape one other source and install its snapshot (leader only)
+
+    Runs on the same scraper worker (and browser) as the announcements, after
+    any job already in flight there.
+    """
+    source = sources.get(name)
+    entry = source_caches[name]
+    with cache_lock:
+        entry["is_scraping"] = True
+    started = time.perf_counter()
+    try:
+        if SCRAPER_MODE == "subprocess":
+            result = subprocess.run(["python3", "sources.py", name], capture_output=True, text=True,
+                                    timeout=SCRAPER_TIMEOUT)
+            if result.returncode != 0:
+                raise ScrapeFailed(f"Scraper failed with code {result.returncode}: {result.stderr[-500:]}")
+            current = snapshot_files.read_current(source.snapshot_dir)
+            if current is None:
+                raise ScrapeFailed("Scraper completed but no snapshot was published")
+            pointer, data, variants = current
+        else:
+            reply = scraper_worker.run(timeout=SCRAPER_TIMEOUT, source=name)
+            if not reply["ok"]:
+                raise ScrapeFailed(f"Scraper failed: {reply.get('error')}")
+            pointer, data = reply["snapshot"], reply["result"]
+            variants = snapshot_files.read_variants(pointer, source.snapshot_dir)
+        with cache_lock:
+            if pointer["version"] == entry["version"]:  # unchanged: the scraper only touched the pointer
+                entry["last_updated"] = pointer_mtime(source.snapshot_dir) or time.time()
+            else:
+                install_snapshot(data, variants=variants, version=pointer["version"], target=entry)
+            entry["last_error"] = None
+        metrics.SOURCE_SCRAPES_TOTAL.inc(source=name, result="success")
+        print(f"[{datetime.now()}] Source {name}: snapshot v{pointer['version']} with {data.get('count')} items")
+    except Exception as e:
+        timeout = isinstance(e, (TimeoutError, subprocess.TimeoutExpired))
+        metrics.SOURCE_SCRAPES_TOTAL.inc(source=name, result="timeout" if timeout else "failure")
+        with cache_lock:
+            entry["last_error"] = str(e)
+        print(f"[{datetime.now()}] Source {name} failed: {e}")
+    finally:
+        metrics.SOURCE_SCRAPE_SECONDS.observe(time.perf_counter() - started, source=name)
+        with cache_lock:
+            entry["is_scraping"] = False
+
+def start_leader_duties():
+    """Job runner, scheduler and startup scrape - only ever run in the leader process"""
+    global scheduler, job_runner, run_schedule, dispatcher, leader_started
+    from apscheduler.schedulers.background import BackgroundScheduler
+    import backfill
+    import webhooks
+
+    if leader_started:  # also after a failed attempt: its threads may already be running
+        return
+    leader_started = True
+    print(f"[{datetime.now()}] Worker {os.getpid()} is the scraper leader")
+    refresh_jobs.abandon_running()
+    job_runner = refresh_jobs.JobRunner(run_scraper)
+    dispatcher = webhooks.Dispatcher(on_delivery=record_delivery).start()
+    if backfill.BACKFILL:
+        backfill.Backfill(backfill.LIVE_PAGES, refresh_busy, on_page=record_backfill_page).start()
+
+    # One-shot scheduler job, re-armed after every run from the learned schedule
+    run_schedule = scrape_schedule.AdaptiveSchedule()
+    scheduler = BackgroundScheduler()
+    scheduler.start()
+    schedule_next_scrape(run_schedule.next_run())
+    schedule_sources()
+
+    # Run scraper on startup if cache is empty; otherwise pick up jobs queued while leaderless
+    if cache["data"] is None:
+        trigger_refresh("startup")
+    else:
+        job_runner.run_pending()
+
+def reschedule_after_run(ok, changed=None, timeout=False):
+    """Teach the adaptive schedule this run's outcome and arm the next scheduled scrape"""
+    try:
+        schedule_next_scrape(run_schedule.record_run(ok, changed, timeout))
+    except Exception as e:
+        print(f"[{datetime.now()}] Failed to update scrape schedule: {e}")
+        schedule_next_scrape(time.time() + scrape_schedule.MAX_MINUTES * 60)
 
-# Set up background scheduler to run scraper every 30 minutes
-scheduler = BackgroundScheduler()
-scheduler.add_job(func=run_scraper, trigger="interval", minutes=30)
-scheduler.start()
+def schedule_next_scrape(run_at):
+    """(Re)arm the scheduler's single pending scrape for run_at (epoch seconds)"""
+    if scheduler is None:
+        return
+    scheduler.add_job(
+        func=trigger_refresh, args=["scheduler"], trigger="date",
+        run_date=datetime.fromtimestamp(run_at), id="scrape", replace_existing=True,
+        misfire_grace_time=None
+    )
+    print(f"[{datetime.now()}] Next scheduled scrape at {datetime.fromtimestamp(run_at).isoformat(timespec='seconds')}")
 
-# Run scraper on startup if cache is empty
-if cache["data"] is None:
-    threading.Thread(target=run_scraper, daemon=True).start()
+def record_backfill_page(ok, added):
+    metrics.BACKFILL_PAGES_TOTAL.inc(result="ok" if ok else "failed")
+    metrics.BACKFILL_ANNOUNCEMENTS_TOTAL.inc(added)
+
+def migrate_records():
+    """Bring announcements stored by the older API client (ISO dates) into the page format
+
+    Without this, the store and the archive keep a second copy of every
+    such announcement under another fingerprint.
+    """
+    import ktu_api_client
+
+    try:
+        rekeyed = announcement_store.rekey(ktu_api_client.normalize_record)
+        dropped = archive.migrate()
+        if rekeyed or dropped:
+            print(f"[{datetime.now()}] Migrated records: {rekeyed} store rows re-keyed, "
+                  f"{dropped} duplicate archive entries dropped")
+    except Exception as e:
+        print(f"[{datetime.now()}] Record migration failed: {e}")
+
+def finish_startup():
+    """Boot work deferred until after the first response: leader duties and the shared-state watcher
+
+    Runs once - after the first response is sent, STARTUP_DEFER_SECONDS after
+    boot, or on the first refresh trigger, whichever comes first; concurrent
+    callers wait until it is done.
+    """
+    with startup_lock:
+        if startup["completed"]:
+            return
+        started = time.perf_counter()
+        try:
+            if leader.is_leader():
+                migrate_records()
+                with cache_lock:
+                    data = cache["data"]
+                if data is not None:
+                    store_snapshot(data)
+                start_leader_duties()
+        except Exception as e:
+            print(f"[{datetime.now()}] Deferred startup failed: {e}")
+        finally:
+            # Completed either way: running it again would start a second set of leader threads
+            threading.Thread(target=watch_shared_state, daemon=True).start()
+            startup["completed"] = True
+            record_startup_phase("deferred_startup", started)
+    print(f"[{datetime.now()}] Startup finished: " +
+          ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in startup["phases"].items()))
+
+def record_startup_phase(phase, started):
+    """Record a startup phase that began at started (a perf_counter value)"""
+    seconds = time.perf_counter() - started
+    startup["phases"][phase] = round(seconds, 4)
+    metrics.STARTUP_PHASE_SECONDS.set(seconds, phase=phase)
+
+def first_response_sent():
+    if "first_response" not in startup["phases"]:
+        record_startup_phase("first_response", BOOT_STARTED)
+    if not startup["completed"]:
+        threading.Thread(target=finish_startup, daemon=True).start()
+
+def refresh_busy():
+    """True while a live refresh is running or queued - the backfill waits for it"""
+    return job_runner.running is not None or refresh_jobs.next_queued() is not None
+
+def trigger_refresh(trigger):
+    """Start a refresh job or join the one in flight; returns (job_id, joined)
+
+    On a follower the job is only queued in the store; the leader's
+    watcher picks it up within SNAPSHOT_POLL_SECONDS.
+    """
+    if leader.is_leader() and job_runner is None:  # an explicit refresh does not wait for the deferred startup
+        finish_startup()
+    if leader.is_leader() and job_runner is not None:
+        job_id, joined = job_runner.trigger(trigger)
+    else:  # a follower, or a leader whose startup failed: queue it in the store
+        job_id, joined = refresh_jobs.submit(trigger)
+    metrics.REFRESH_TRIGGERS_TOTAL.inc(trigger=trigger, outcome="joined" if joined else "started")
+    return job_id, joined
+
+def watch_shared_state():
+    """Background loop shared by all workers
+
+    Followers pick up snapshots and change feed versions published by the
+    leader and take over leadership if the leader goes away; the leader
+    runs refresh jobs queued through followers.
+    """
+    while True:
+        time.sleep(SNAPSHOT_POLL_SECONDS)
+        try:
+            if not leader.is_leader():
+                if leader.try_acquire():
+                    start_leader_duties()
+                    continue
+                reload_published_snapshot()
+                reload_source_snapshots()
+                change_feed.sync_from_store()
+            elif job_runner is not None:
+                job_runner.run_pending()
+            metrics.dump()
+        except Exception as e:
+            print(f"[{datetime.now()}] Shared state watcher error: {e}")
+
+scheduler = None
+leader_started = False
+job_runner = None
+run_schedule = None
+dispatcher = None
+startup = {"phases": {}, "completed": False}  # phase -> seconds, for /ready and /metrics
+startup_lock = threading.Lock()
+
+def boot():
+    """Start this server process: elect the leader, load the snapshot, schedule finish_startup()
+
+    Boot only does what serving the last published snapshot needs: elect the
+    scraper leader among gunicorn workers and load the snapshot. The rest
+    waits for finish_startup(), so a cold start answers its first request
+    without starting the scheduler, the job runner or a scrape first.
+    """
+    global scraper_worker
+    record_startup_phase("imports", BOOT_STARTED)
+    scraper_worker = ScraperWorker()
+    started = time.perf_counter()
+    leader.try_acquire()
+    record_startup_phase("leader_election", started)
+    started = time.perf_counter()
+    load_initial_cache()
+    record_startup_phase("load_snapshot", started)
+    record_startup_phase("ready", BOOT_STARTED)
+    # Nothing to serve without a snapshot, so then the first scrape starts right away
+    timer = threading.Timer(STARTUP_DEFER_SECONDS if cache["data"] is not None else 0, finish_startup)
+    timer.daemon = True
+    timer.start()
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    """Per-endpoint latency, status and response size for /metrics"""
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    started = g.pop("request_started", None)
+    if started is not None:
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+    metrics.REQUESTS_TOTAL.inc(endpoint=endpoint, status=response.status_code)
+    if response.content_length is not None:  # unknown for streamed responses (SSE)
+        metrics.RESPONSE_BYTES.observe(response.content_length, endpoint=endpoint)
+    if "first_response" not in startup["phases"]:
+        response.call_on_close(first_response_sent)
+    return response
 
 @app.route('/')
 def home():
@@ -122,85 +675,537 @@ def home():
         "message": "KTU Announcements API running",
         "endpoints": {
             "/api/ktu/announcements": "Get all announcements (cached)",
-            "/api/ktu/refresh": "Force refresh announcements (triggers scraper)",
-            "/api/ktu/status": "Get cache status"
+            "/api/ktu/search?q=": "Full-text search over announcement titles and messages",
+            "/api/ktu/changes?since=": "Announcements added/changed/removed after a feed version",
+            "/api/ktu/changes/stream": "Server-Sent Events stream of new change feed entries",
+            "/api/ktu/attachments/<id>": "Download an attachment (id from href '#attachment-<id>')",
+            "/api/ktu/archive": "Monthly archive segments of older announcements and backfill progress",
+            "/api/ktu/sources": "Registered listings (announcements, exam notifications, ...) and their caches",
+            "/api/ktu/sources/<name>": "One listing's announcements (cached per source)",
+            "/api/ktu/refresh?wait=": "Force refresh announcements (starts or joins a refresh job)",
+            "/api/ktu/jobs/<id>?wait=": "Refresh job status by phase",
+            "/api/ktu/webhooks": "Webhook subscribers (needs WEBHOOK_ADMIN_TOKEN)",
+            "/api/ktu/status": "Get cache status",
+            "/ready": "Readiness (200 once a snapshot is loaded) and startup phase timings",
+            "/metrics": "Prometheus metrics"
         }
     }
 
 @app.route('/api/ktu/announcements')
 def announcements():
-    """Get announcements from cache"""
+    """Get announcements from cache
+
+    The body is the pre-encoded snapshot; per-request metadata such as the
+    cache age is sent in headers so the payload never has to be re-encoded.
+    Any of limit/cursor/since/until/has_attachment/fields switches to a
+    paged, filtered query answered from the snapshot's precomputed index.
+    """
     try:
         with cache_lock:
             if cache["data"] is None:
-                # No data yet, check if file exists
-                if os.path.exists(JSON_FILE):
-                    with open(JSON_FILE, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                    cache["data"] = data
-                    cache["last_updated"] = time.time()
-                    return jsonify(data)
-                else:
-                    return jsonify({
-                        "error": "Data not available yet. Scraper is running...",
-                        "retry_after": 30
-                    }), 503
-
-            # Check if cache is stale
-            cache_age = time.time() - cache["last_updated"]
-            if cache_age > CACHE_DURATION and not cache["is_scraping"]:
-                # Trigger background refresh
-                threading.Thread(target=run_scraper, daemon=True).start()
-
-            # Return cached data with metadata
-            response = cache["data"].copy()
-            response["cache_age_seconds"] = int(cache_age)
-            response["cached_at"] = datetime.fromtimestamp(cache["last_updated"]).isoformat()
-
-            return jsonify(response)
+                return jsonify({
+                    "error": "Data not available yet. Scraper is running...",
+                    "retry_after": 30
+                }), 503
+
+            data = cache["data"]
+            variants = cache["variants"]
+            etag = cache["etag"]
+            index = cache["index"]
+            last_updated = cache["last_updated"]
+            cache_age = time.time() - last_updated
+            stale = cache_age > CACHE_DURATION and not cache["is_scraping"]
+
+        if cache_age > CACHE_DURATION:
+            metrics.STALE_SERVES_TOTAL.inc()
+        # Stale reads start (or join) a background refresh job on the leader, but only
+        # if the scheduled run is overdue - quiet hours and failure backoff are deliberate
+        if stale and leader.is_leader() and run_schedule is not None and run_schedule.overdue(STALE_GRACE_SECONDS):
+            trigger_refresh("stale")
+        return snapshot_response(data, variants, etag, index, last_updated)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/ktu/refresh')
-def refresh():
-    """Force refresh - trigger scraper immediately"""
+def snapshot_response(data, variants, etag, index, last_updated):
+    """A cached snapshot as its pre-encoded bytes, or a paged query of it, with cache headers"""
+    if any(param in request.args for param in QUERY_PARAMS):
+        etag = query_etag(etag)
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = query_announcements(data, index)
+        if response.status_code in (200, 304):
+            response.set_etag(etag)
+    else:
+        encoding = choose_encoding(variants)
+        variant_etag = etag if encoding == "identity" else f"{etag}-{encoding}"
+        if request.if_none_match.contains_weak(variant_etag):
+            response = Response(status=304)
+        else:
+            response = Response(variants[encoding], mimetype="application/json")
+            if encoding != "identity":
+                response.headers["Content-Encoding"] = encoding
+        response.set_etag(variant_etag)
+        response.vary.add("Accept-Encoding")
+    response.headers["X-Cache-Age-Seconds"] = str(int(time.time() - last_updated))
+    response.headers["X-Cached-At"] = datetime.fromtimestamp(last_updated).isoformat()
+    return response
+
+def query_etag(etag):
+    """ETag of a query response: the snapshot's ETag and the query parameters, in a fixed order"""
+    query = "&".join(f"{name}={request.args[name]}" for name in QUERY_PARAMS if name in request.args)
+    return hashlib.sha256(f"{etag}?{query}".encode("utf-8")).hexdigest()[:32]
+
+def choose_encoding(variants):
+    """Best precompressed variant the client accepts (br > gzip > identity)"""
+    for encoding in ("br", "gzip"):
+        if encoding in variants and request.accept_encodings[encoding] > 0:
+            return encoding
+    return "identity"
+
+def query_announcements(data, index):
+    """Answer a paged/filtered announcements request from the snapshot index"""
+    args = request.args
+    try:
+        limit = int(args.get("limit", PAGE_MAX_LIMIT))
+    except ValueError:
+        return make_error("'limit' must be an integer", 400)
+    limit = max(1, min(limit, PAGE_MAX_LIMIT))
+
+    dates = {}
+    for name in ("since", "until"):
+        if args.get(name):
+            dates[name] = announcement_store.parse_date(args[name])
+            if dates[name] is None:
+                return make_error(f"'{name}' must be a date like 2025-11-12", 400)
+
+    has_attachment = None
+    if "has_attachment" in args:
+        value = args["has_attachment"].lower()
+        if value not in ("true", "false", "1", "0"):
+            return make_error("'has_attachment' must be true or false", 400)
+        has_attachment = value in ("true", "1")
+
+    fields = None
+    if args.get("fields"):
+        fields = [f.strip() for f in args["fields"].split(",") if f.strip()]
+        unknown = [f for f in fields if f not in FIELDS]
+        if unknown:
+            return make_error(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(FIELDS)}", 400)
+
+    try:
+        page, total, next_cursor = index.query(
+            limit, cursor=args.get("cursor"), since=dates.get("since"), until=dates.get("until"),
+            has_attachment=has_attachment, fields=fields
+        )
+    except KeyError:
+        return make_error("Unknown or expired 'cursor'", 400)
+
+    return jsonify({
+        "fetched_at": data.get("fetched_at"),
+        "count": len(page),
+        "total": total,
+        "next_cursor": next_cursor,
+        "announcements": page
+    })
+
+def make_error(message, status):
+    response = jsonify({"error": message})
+    response.status_code = status
+    return response
+
+@app.route('/api/ktu/sources')
+def source_list():
+    """Every registered listing with the state of its cache"""
+    listing = []
+    with cache_lock:
+        for name, source in sources.SOURCES.items():
+            entry = cache if name == sources.ANNOUNCEMENTS else source_caches[name]
+            listing.append(dict(
+                source.describe(),
+                href=f"/api/ktu/sources/{name}",
+                count=entry["data"]["count"] if entry["data"] else 0,
+                snapshot_version=entry["version"],
+                last_updated=datetime.fromtimestamp(entry["last_updated"]).isoformat() if entry["last_updated"] else None,
+                is_scraping=entry["is_scraping"],
+                last_error=entry["last_error"]
+            ))
+    return jsonify({"sources": listing})
+
+@app.route('/api/ktu/sources/<name>')
+def source_snapshot(name):
+    """One source's cached snapshot (same format and query parameters as /api/ktu/announcements)"""
+    if name == sources.ANNOUNCEMENTS:
+        return announcements()
+    entry = source_caches.get(name)
+    if entry is None:
+        return make_error("Unknown source", 404)
     try:
         with cache_lock:
-            if cache["is_scraping"]:
+            if entry["data"] is None:
                 return jsonify({
-                    "message": "Scraper already running",
-                    "status": "in_progress"
-                }), 429
+                    "error": "Data not available yet. Scraper is running...",
+                    "retry_after": 30
+                }), 503
+            data, variants, etag = entry["data"], entry["variants"], entry["etag"]
+            index, last_updated = entry["index"], entry["last_updated"]
+        return snapshot_response(data, variants, etag, index, last_updated)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        # Start scraper in background
-        threading.Thread(target=run_scraper, daemon=True).start()
+@app.route('/api/ktu/search')
+def search():
+    """Full-text search over stored announcements"""
+    q = request.args.get("q", "").strip()
+    if not q:
+        return jsonify({"error": "Missing query parameter 'q'"}), 400
+    try:
+        limit = min(int(request.args.get("limit", 20)), SEARCH_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"error": "'limit' must be an integer"}), 400
 
+    limit = max(limit, 1)
+    with cache_lock:
+        data = cache["data"]
+    try:
+        results = announcement_store.search(q, limit=limit)
+        if data is not None:
+            # The leader indexes a loaded snapshot only after startup (and every
+            # new one after publishing it); search what is not indexed yet in memory
+            pending = announcement_store.unindexed(data.get("announcements") or [])
+            if pending:
+                results = (announcement_store.search_items(pending, q, limit) + results)[:limit]
         return jsonify({
-            "message": "Scraper started",
-            "status": "running",
-            "estimated_time": "30-60 seconds"
+            "query": q,
+            "count": len(results),
+            "results": results
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/ktu/changes')
+def changes():
+    """Deltas recorded after the given feed version"""
+    try:
+        since = int(request.args.get("since", 0))
+    except ValueError:
+        return make_error("'since' must be an integer version", 400)
+
+    try:
+        deltas = change_feed.changes_since(since)
+        latest = change_feed.latest_version()
+    except Exception as e:
+        return make_error(str(e), 500)
+
+    if deltas is None:
+        response = jsonify({
+            "error": "Version too old - reload /api/ktu/announcements and continue from 'version'",
+            "version": latest
+        })
+        response.status_code = 410
+        return response
+
+    return jsonify({
+        "since": since,
+        "version": latest,
+        "changes": deltas
+    })
+
+@app.route('/api/ktu/changes/stream')
+def changes_stream():
+    """Push change feed entries as Server-Sent Events
+
+    Each client holds one thread (gthread worker) blocked on a condition
+    variable, not a whole sync worker; connections are capped at
+    SSE_MAX_CLIENTS and closed after SSE_MAX_SECONDS so clients resume with
+    Last-Event-ID.
+    """
+    try:
+        since = int(request.headers.get("Last-Event-ID") or request.args.get("since") or change_feed.latest_version())
+    except ValueError:
+        return make_error("'since' must be an integer version", 400)
+
+    if not sse_clients.acquire(blocking=False):
+        response = make_error("Too many stream clients, poll /api/ktu/changes instead", 503)
+        response.headers["Retry-After"] = "30"
+        return response
+
+    def events(version):
+        try:
+            yield f"retry: 5000\n: connected at version {version}\n\n"
+            deadline = time.time() + SSE_MAX_SECONDS
+            while time.time() < deadline:
+                if not change_feed.wait_for_change(version, SSE_HEARTBEAT_SECONDS):
+                    yield ": keepalive\n\n"
+                    continue
+                deltas = change_feed.changes_since(version)
+                if deltas is None:
+                    yield "event: resync\ndata: {}\n\n"
+                    return
+                for delta in deltas:
+                    version = delta["version"]
+                    yield f"id: {version}\nevent: change\ndata: {json.dumps(delta, ensure_ascii=False)}\n\n"
+        finally:
+            sse_clients.release()
+
+    response = Response(stream_with_context(events(since)), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+@app.route('/api/ktu/attachments/<att_id>')
+def attachment(att_id):
+    """Serve an attachment from the local content-addressed cache
+
+    Supports Range requests and conditional GETs. An attachment of the
+    current snapshot that has not been downloaded yet is fetched on demand.
+    """
+    import attachments
+
+    try:
+        meta = attachments.lookup(att_id)
+        if meta is None:
+            with cache_lock:
+                current = cache["data"]
+            titles = attachments.attachment_titles((current or {}).get("announcements") or [])
+            if att_id not in titles:
+                return make_error("Unknown attachment", 404)
+            session = attachments.ktu_api_client.make_session()
+            try:
+                attachments.download(session, att_id, titles[att_id])
+            finally:
+                session.close()
+            meta = attachments.lookup(att_id)
+    except Exception as e:
+        return make_error(f"Attachment unavailable: {e}", 502)
+
+    response = send_file(
+        meta["path"],
+        mimetype=meta["content_type"],
+        download_name=meta["filename"],
+        as_attachment=False,
+        conditional=True,
+        etag=meta["sha256"],
+        max_age=ATTACHMENT_MAX_AGE
+    )
+    response.headers["Cache-Control"] = f"public, max-age={ATTACHMENT_MAX_AGE}, immutable"
+    return response
+
+@app.route('/api/ktu/archive')
+def archive_index():
+    """Archive segments (one per month) and backfill progress; segments are fetched one by one"""
+    import backfill
+
+    try:
+        index = archive.read_index()
+        state = backfill.load_state()
+    except Exception as e:
+        return make_error(str(e), 500)
+    return jsonify({
+        "count": index.get("count", 0),
+        "segments": [dict(meta, segment=segment, href=f"/api/ktu/archive/{segment}")
+                     for segment, meta in index["segments"].items()],
+        "backfill": {
+            "enabled": backfill.BACKFILL,
+            "next_page": state["next_page"] + 1 if state else backfill.LIVE_PAGES + 1,
+            "pages_done": state["pages_done"] if state else 0,
+            "announcements_archived": state["announcements"] if state else 0,
+            "finished_at": datetime.fromtimestamp(state["finished_at"]).isoformat()
+                           if state and state["finished_at"] else None,
+            "last_error": state["last_error"] if state else None
+        }
+    })
+
+@app.route('/api/ktu/archive/<segment>')
+def archive_segment(segment):
+    """One archive segment (YYYY-MM or "undated"), streamed from disk"""
+    if not archive.SEGMENT_RE.match(segment):
+        return make_error("Segment must be YYYY-MM or 'undated'", 400)
+    path = archive.segment_path(segment)
+    if not os.path.exists(path):
+        return make_error("Unknown segment", 404)
+    response = send_file(os.path.abspath(path), mimetype="application/json", conditional=True)
+    response.headers["Cache-Control"] = "no-cache"  # revalidate: a segment grows as the backfill runs
+    return response
+
+@app.route('/api/ktu/refresh')
+def refresh():
+    """Force refresh - start a refresh job, or join the one already in flight
+
+    With ?wait=<seconds> the request blocks until the job finishes (or the
+    wait runs out), so deploy hooks can wait for fresh data.
+    """
+    wait, error = wait_seconds()
+    if error:
+        return error
+    try:
+        job_id, joined = trigger_refresh("manual")
+        job = refresh_jobs.wait(job_id, wait) if wait else refresh_jobs.get(job_id)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    if job["status"] == "succeeded" and not leader.is_leader():
+        reload_published_snapshot()  # answer from the new snapshot right away
+
+    messages = {
+        "queued": "Refresh queued",
+        "running": "Scraper already running" if joined else "Scraper started",
+        "succeeded": "Refresh finished",
+        "failed": "Refresh failed"
+    }
+    body = {
+        "message": messages[job["status"]],
+        "status": job["status"],
+        "joined": joined,
+        "job": job
+    }
+    if job["status"] in refresh_jobs.ACTIVE:
+        body["estimated_time"] = "30-60 seconds"
+    response = jsonify(body)
+    response.status_code = job_status_code(job)
+    response.headers["Location"] = f"/api/ktu/jobs/{job_id}"
+    return response
+
+@app.route('/api/ktu/jobs/<job_id>')
+def job_status(job_id):
+    """Refresh job progress by phase; ?wait=<seconds> blocks until it finishes"""
+    wait, error = wait_seconds()
+    if error:
+        return error
+    try:
+        job = refresh_jobs.wait(job_id, wait) if wait else refresh_jobs.get(job_id)
+    except Exception as e:
+        return make_error(str(e), 500)
+    if job is None:
+        return make_error("Unknown job", 404)
+    response = jsonify(job)
+    response.status_code = job_status_code(job)
+    return response
+
+def wait_seconds():
+    """(seconds, None) from ?wait=, capped at REFRESH_MAX_WAIT, or (None, error response)"""
+    try:
+        wait = float(request.args.get("wait", 0))
+    except ValueError:
+        return None, make_error("'wait' must be a number of seconds", 400)
+    return max(0.0, min(wait, REFRESH_MAX_WAIT)), None
+
+def job_status_code(job):
+    """202 while a job is queued/running, 200 once it succeeded, 502 if the scrape failed"""
+    if job["status"] in refresh_jobs.ACTIVE:
+        return 202
+    return 200 if job["status"] == "succeeded" else 502
+
+def webhook_admin_error():
+    """Error response unless the request carries WEBHOOK_ADMIN_TOKEN (None if it does)"""
+    if not WEBHOOK_ADMIN_TOKEN:
+        return make_error("Webhook management is disabled (set WEBHOOK_ADMIN_TOKEN)", 403)
+    supplied = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(supplied.encode("utf-8"), f"Bearer {WEBHOOK_ADMIN_TOKEN}".encode("utf-8")):
+        return make_error("Missing or wrong bearer token", 401)
+    return None
+
+@app.route('/api/ktu/webhooks', methods=["GET", "POST"])
+def webhook_subscribers():
+    """List subscribers with their delivery state, or register a URL ({"url", "secret"?})"""
+    import webhooks
+
+    error = webhook_admin_error()
+    if error:
+        return error
+    try:
+        if request.method == "GET":
+            return jsonify({"subscribers": webhooks.subscribers()})
+        body = request.get_json(silent=True) or {}
+        try:
+            subscriber, created = webhooks.subscribe(str(body.get("url") or ""), body.get("secret") or None)
+        except ValueError as e:
+            return make_error(str(e), 400)
+    except Exception as e:
+        return make_error(str(e), 500)
+    response = jsonify(subscriber)
+    response.status_code = 201 if created else 200
+    response.headers["Location"] = f"/api/ktu/webhooks/{subscriber['id']}"
+    return response
+
+@app.route('/api/ktu/webhooks/<subscriber_id>', methods=["DELETE"])
+def webhook_unsubscribe(subscriber_id):
+    import webhooks
+
+    error = webhook_admin_error()
+    if error:
+        return error
+    try:
+        removed = webhooks.unsubscribe(subscriber_id)
+    except Exception as e:
+        return make_error(str(e), 500)
+    if not removed:
+        return make_error("Unknown subscriber", 404)
+    return Response(status=204)
+
 @app.route('/api/ktu/status')
 def status():
     """Get cache and scraper status"""
     with cache_lock:
         return jsonify({
+            "role": "leader" if leader.is_leader() else "follower",
+            "pid": os.getpid(),
             "is_scraping": cache["is_scraping"],
             "has_data": cache["data"] is not None,
             "last_updated": datetime.fromtimestamp(cache["last_updated"]).isoformat() if cache["last_updated"] else None,
             "cache_age_seconds": int(time.time() - cache["last_updated"]) if cache["last_updated"] else None,
-            "announcement_count": cache["data"]["count"] if cache["data"] else 0
+            "announcement_count": cache["data"]["count"] if cache["data"] else 0,
+            "schedule": scrape_schedule.describe(schedule_state()),
+            "startup": {"completed": startup["completed"], "phase_seconds": dict(startup["phases"])}
         })
 
+def schedule_state():
+    """The leader's live schedule, or the state it last persisted (followers)"""
+    if run_schedule is not None and leader.is_leader():
+        return run_schedule.state
+    try:
+        return scrape_schedule.load_state()
+    except Exception:
+        return None
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Scraper and request metrics in the Prometheus text format"""
+    with cache_lock:
+        updated = cache["last_updated"]
+        extra = [
+            ("ktu_cache_age_seconds", "Seconds since the cached snapshot was loaded",
+             round(time.time() - updated, 3) if updated else None),
+            ("ktu_snapshot_version", "Published snapshot version held in the cache", cache["version"]),
+            ("ktu_announcements_cached", "Announcements in the cached snapshot",
+             cache["data"]["count"] if cache["data"] else None),
+            ("ktu_scrape_in_progress", "1 while this worker is running a scrape", int(cache["is_scraping"]))
+        ]
+    return Response(metrics.render(extra), content_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.route('/health')
 def health():
     """Health check endpoint for Render"""
     return jsonify({"status": "healthy"}), 200
 
+@app.route('/ready')
+def ready():
+    """Readiness: 200 once this worker has a snapshot to serve, 503 before
+
+    Unlike /health this does not wait for anything else; leader duties start
+    in the background after the first response.
+    """
+    with cache_lock:
+        has_data = cache["data"] is not None
+        version = cache["version"]
+    return jsonify({
+        "ready": has_data,
+        "snapshot_version": version,
+        "startup_completed": startup["completed"],
+        "startup_phase_seconds": dict(startup["phases"])
+    }), 200 if has_data else 503
+
 @app.route('/api/ktu/debug')
 def debug():
     """Debug endpoint to see scraper output and errors"""
@@ -208,10 +1213,18 @@ def debug():
         return jsonify({
             "last_error": cache["last_error"],
             "last_scraper_output": cache["last_scraper_output"],
+            "last_probe": cache["last_probe"],
             "is_scraping": cache["is_scraping"],
             "has_data": cache["data"] is not None,
+            "snapshot_version": cache["version"],
             "json_file_exists": os.path.exists(JSON_FILE)
         })
 
+# The scraper worker's process (spawn or fork server) imports the parent's
+# __main__ as __mp_main__; under `python server.py` that is this file, and it
+# must not boot a second server there. gunicorn imports it as `server`.
 if __name__ == "__main__":
+    boot()
     app.run(host="0.0.0.0", port=8080)
+elif __name__ != "__mp_main__":
+    boot()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# snapshot_files.py
+"""
+Atomic, versioned snapshot publishing.
+
+Each scrape result is encoded once as compact JSON and written, together with
+gzip and brotli variants, to versioned files in SNAPSHOT_DIR:
+
+  snapshots/ktu_announcements.<version>.json[.gz|.br]
+  snapshots/current.json   -> {"version": 12, "file": "...", "sha256": "..."}
+
+Every file is written to a temp file and renamed into place, and the pointer
+is switched last, so readers never see a half-written snapshot. Readers
+(the server, the incremental scraper, follower workers) go through the
+pointer. The last SNAPSHOT_KEEP versions are kept on disk.
+
+Every function takes the directory to work in; other sources (sources.py)
+publish the same way into their own subdirectory of SNAPSHOT_DIR.
+"""
+
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+try:
+    import brotli
+except ImportError:  # brotli variant is skipped when the package is missing
+    brotli = None
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+POINTER_FILE = "current.json"
+SNAPSHOT_KEEP = 5
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11  # done once per publish, so use the densest setting
+
+def encode(data):
+    """Compact UTF-8 JSON bytes for a snapshot"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def compress(payload):
+    """{encoding: bytes} for every available encoding of a payload"""
+    variants = {"identity": payload, "gzip": gzip.compress(payload, GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(payload, quality=BROTLI_QUALITY)
+    return variants
+
+SUFFIXES = {"identity": "", "gzip": ".gz", "br": ".br"}
+
+def write_atomic(path, content):
+    """Write bytes to path via a temp file + rename in the same directory"""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def read_pointer(directory=SNAPSHOT_DIR):
+    """The current pointer dict, or None if nothing has been published"""
+    try:
+        with open(os.path.join(directory, POINTER_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def touch_pointer(directory=SNAPSHOT_DIR):
+    """Mark the current snapshot as confirmed up to date (the pointer's mtime)"""
+    try:
+        os.utime(os.path.join(directory, POINTER_FILE))
+    except OSError:
+        pass
+
+def current_version(directory=SNAPSHOT_DIR):
+    pointer = read_pointer(directory)
+    return pointer["version"] if pointer else 0
+
+def publish(data, directory=SNAPSHOT_DIR):
+    """Publish a snapshot; returns the pointer dict of the new version"""
+    os.makedirs(directory, exist_ok=True)
+    payload = encode(data)
+    version = current_version(directory) + 1
+    name = f"ktu_announcements.{version}.json"
+    for encoding, content in compress(payload).items():
+        write_atomic(os.path.join(directory, name + SUFFIXES[encoding]), content)
+
+    pointer = {
+        "version": version,
+        "file": name,
+        "sha256": hashlib.sha256(payload).hexdigest(),
+        "size": len(payload)
+    }
+    write_atomic(os.path.join(directory, POINTER_FILE), json.dumps(pointer).encode("utf-8"))
+    prune(version, directory)
+    return pointer
+
+def prune(latest, directory=SNAPSHOT_DIR):
+    """Delete versioned files older than the last SNAPSHOT_KEEP versions"""
+    for path in glob.glob(os.path.join(directory, "ktu_announcements.*.json*")):
+        match = re.search(r"ktu_announcements\.(\d+)\.json", os.path.basename(path))
+        if match and int(match.group(1)) <= latest - SNAPSHOT_KEEP:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+def read_variants(pointer, directory=SNAPSHOT_DIR):
+    """{encoding: bytes} of a published version, read straight from disk"""
+    variants = {}
+    for encoding, suffix in SUFFIXES.items():
+        try:
+            with open(os.path.join(directory, pointer["file"] + suffix), "rb") as f:
+                variants[encoding] = f.read()
+        except OSError:
+            continue
+    return variants
+
+def read_current(directory=SNAPSHOT_DIR):
+    """(pointer, data, variants) of the current version, or None if unpublished"""
+    pointer = read_pointer(directory)
+    if pointer is None:
+        return None
+    variants = read_variants(pointer, directory)
+    if "identity" not in variants:
+        return None
+    return pointer, json.loads(variants["identity"]), variants
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# snapshot_index.py
+"""
+Query indexes over one announcements snapshot.
+
+Built once when a snapshot is installed, so paging, date filters,
+attachment filters and field projection on /api/ktu/announcements cost
+O(log n + limit) per request instead of a scan over the whole list.
+"""
+
+from bisect import bisect_left, bisect_right
+from announcement_store import fingerprint, parse_date
+
+FIELDS = ("fingerprint", "title", "link", "date", "date_iso", "message_html", "message_text", "attachments")
+
+class View:
+    """Announcements ordered newest first, with the lookups needed to slice them"""
+
+    def __init__(self, records):
+        # records: (date_iso or "", original position, record); undated sort last
+        ordered = sorted(records, key=lambda r: (r[0], -r[1]), reverse=True)
+        self.items = [r[2] for r in ordered]
+        self.asc_dates = [r[0] for r in reversed(ordered)]
+        self.undated = sum(1 for r in ordered if not r[0])
+        self.position = {item["fingerprint"]: i for i, item in enumerate(self.items)}
+
+    def date_range(self, since=None, until=None):
+        """[start, end) of the items dated within since..until (inclusive)"""
+        n = len(self.items)
+        start, end = 0, n
+        if until:
+            start = n - bisect_right(self.asc_dates, until)
+        if since:
+            end = n - bisect_left(self.asc_dates, since)
+        if since or until:
+            end = min(end, n - self.undated)
+        return start, max(start, end)
+
+class SnapshotIndex:
+    def __init__(self, announcements):
+        records = []
+        for pos, item in enumerate(announcements):
+            record = dict(item)
+            record.setdefault("fingerprint", fingerprint(item))
+            record["date_iso"] = parse_date(item.get("date"))
+            records.append((record["date_iso"] or "", pos, record))
+
+        self.views = {
+            None: View(records),
+            True: View([r for r in records if r[2].get("attachments")]),
+            False: View([r for r in records if not r[2].get("attachments")])
+        }
+
+    def query(self, limit, cursor=None, since=None, until=None, has_attachment=None, fields=None):
+        """Return (page, total, next_cursor); raises KeyError for an unknown cursor"""
+        view = self.views[has_attachment]
+        start, end = view.date_range(since, until)
+        total = end - start
+        if cursor:
+            start = max(start, view.position[cursor] + 1)
+        page = view.items[start:min(start + limit, end)]
+        next_cursor = page[-1]["fingerprint"] if page and start + len(page) < end else None
+        if fields:
+            page = [{f: item.get(f) for f in fields} for item in page]
+        return page, total, next_cursor
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# sources.py
+"""
+Registry of the KTU listings this service scrapes.
+
+"announcements" is built in: it is the listing ktu_scrape_site.py scrapes,
+with incremental runs, the adaptive schedule, the change feed, webhooks and
+the archive. Further listings (exam notifications, timetables, results...)
+are declared in SOURCES_FILE, a JSON list of objects:
+
+  name              URL-safe id, served at /api/ktu/sources/<name>
+  title             human-readable name (defaults to name)
+  url               listing page, rendered in Chrome
+  api_path          JSON API path under KTU_API_BASE, shaped like the
+                    announcements API; fetched without a browser when set
+  pagination        "next_link" (click rel=next up to max_pages) or "single"
+  parser            "announcements" (KTU's card layout) or "table" (one item
+                    per table row)
+  item_selector     CSS selector of an item's title, waited for after every
+                    page load (defaults to the parser's)
+  max_pages         pages to scrape per run (default 1)
+  interval_minutes  time between runs (default 60)
+
+Every source is scraped on the leader's scraper worker, on the same warm
+browser and HTTP session as the announcements and one job at a time, and
+is published like a snapshot into its own subdirectory of SNAPSHOT_DIR,
+so the server keeps an independent cache per source.
+
+Run one source by hand (or from SCRAPER_MODE=subprocess):
+  python sources.py <name>
+"""
+
+import json
+import os
+import re
+import sys
+from datetime import datetime
+from urllib.parse import urljoin
+import snapshot_files
+from announcement_store import fingerprint, parse_date
+
+SOURCES_FILE = os.getenv("SOURCES_FILE", "sources.json")
+ANNOUNCEMENTS = "announcements"
+NAME_RE = re.compile(r"^[a-z0-9][a-z0-9-]{0,39}$")
+PAGINATIONS = ("next_link", "single")
+# CSS selector of the first item's title per parser ("announcements" is page_ready.TITLE_SELECTOR)
+PARSER_SELECTORS = {
+    "announcements": "div.row.m-b-25 h6.f-w-bold",
+    "table": "table tr td",
+}
+NEXT_XPATH = "//li[@class='next']/a[@rel='next']"
+
+class Source:
+    """One listing: where it is, how to page through it and how to parse it"""
+
+    def __init__(self, name, title=None, url=None, api_path=None, pagination="next_link",
+                 parser="announcements", item_selector=None, max_pages=1, interval_minutes=60):
+        if not NAME_RE.match(str(name)):
+            raise ValueError(f"name {name!r} must be lowercase letters, digits and dashes")
+        if not url and not api_path:
+            raise ValueError(f"source {name!r} needs a url or an api_path")
+        if pagination not in PAGINATIONS:
+            raise ValueError(f"source {name!r}: pagination must be one of {', '.join(PAGINATIONS)}")
+        if parser not in PARSER_SELECTORS:
+            raise ValueError(f"source {name!r}: parser must be one of {', '.join(PARSER_SELECTORS)}")
+        if name != ANNOUNCEMENTS:  # the built-in source runs on the adaptive schedule instead
+            try:
+                interval_minutes = float(interval_minutes)
+            except (TypeError, ValueError):
+                interval_minutes = None
+            if interval_minutes is None or not 0 < interval_minutes < float("inf"):
+                raise ValueError(f"source {name!r}: interval_minutes must be a number of minutes above 0")
+        self.name = name
+        self.title = title or name
+        self.url = url
+        self.api_path = api_path
+        self.pagination = pagination
+        self.parser = parser
+        self.item_selector = item_selector or PARSER_SELECTORS[parser]
+        self.max_pages = max(1, int(max_pages))
+        self.interval_minutes = interval_minutes
+        self.snapshot_dir = snapshot_files.SNAPSHOT_DIR if name == ANNOUNCEMENTS \
+            else os.path.join(snapshot_files.SNAPSHOT_DIR, name)
+
+    def describe(self):
+        return {
+            "name": self.name,
+            "title": self.title,
+            "url": self.url,
+            "api_path": self.api_path,
+            "pagination": self.pagination,
+            "parser": self.parser,
+            "max_pages": self.max_pages,
+            "interval_minutes": self.interval_minutes  # None: the adaptive schedule (announcements)
+        }
+
+def builtin():
+    """The announcements listing, as configured for ktu_scrape_site.py"""
+    return Source(
+        ANNOUNCEMENTS,
+        title="Announcements",
+        url=os.getenv("KTU_URL", "https://ktu.edu.in/Menu/announcements"),
+        api_path="/announcemnts",
+        max_pages=int(os.getenv("MAX_PAGES", "3")),
+        interval_minutes=None
+    )
+
+def load(path=SOURCES_FILE):
+    """{name: Source} - the built-in source plus every valid entry of the sources file"""
+    registry = {ANNOUNCEMENTS: builtin()}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        return registry
+    except (OSError, ValueError) as e:
+        print(f"Could not read {path}: {e} - only serving {ANNOUNCEMENTS}")
+        return registry
+    for entry in entries if isinstance(entries, list) else []:
+        try:
+            source = Source(**entry)
+        except (TypeError, ValueError) as e:
+            print(f"Skipping source in {path}: {e}")
+            continue
+        if source.name in registry:
+            print(f"Skipping source in {path}: {source.name!r} is already registered")
+            continue
+        registry[source.name] = source
+    return registry
+
+SOURCES = load()
+
+def get(name):
+    return SOURCES.get(name)
+
+def extra():
+    """Every registered source except the built-in announcements"""
+    return [source for name, source in SOURCES.items() if name != ANNOUNCEMENTS]
+
+def parse_table(page_source):
+    """One record per table row with cells (header rows only have <th>)
+
+    The title is the first cell that is neither a date nor a bare serial
+    number, the date the first cell that parses as one, and every link in
+    the row is an attachment.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+    from ktu_scrape_site import HTML_PARSER
+
+    soup = BeautifulSoup(page_source, HTML_PARSER, parse_only=SoupStrainer("tr"))
+    records = []
+    for row in soup.find_all("tr"):
+        cells = [td.get_text(" ", strip=True) for td in row.find_all("td")]
+        if not any(cells):
+            continue
+        title = next((c for c in cells if c and not c.isdigit() and not parse_date(c)), "")
+        date = next((c for c in cells if parse_date(c)), "")
+        links = [a for a in row.find_all("a", href=True) if not a["href"].startswith("javascript:")]
+        records.append({
+            "title": title,
+            "link": links[0]["href"] if links else "",
+            "date": date,
+            "message_html": "".join(str(td) for td in row.find_all("td")),
+            "message_text": "\n".join(c for c in cells if c),
+            "attachments": [
+                {"title": a.get_text(strip=True) or os.path.basename(a["href"]), "href": a["href"]}
+                for a in links
+            ]
+        })
+    return [r for r in records if r["title"]]
+
+def parser_for(source):
+    if source.parser == "table":
+        return parse_table
+    from ktu_scrape_site import parse_announcements
+    return parse_announcements
+
+def fetch_api(source, session=None):
+    """Up to max_pages pages from the source's JSON API"""
+    import ktu_api_client
+
+    own_session = session is None
+    if own_session:
+        session = ktu_api_client.make_session()
+    records = []
+    try:
+        for page_num in range(source.max_pages):
+            page = ktu_api_client.fetch_page(session, page_num, path=source.api_path)
+            items = ktu_api_client.page_items(page)
+            print(f"[{source.name}] Found {len(items)} items on API page {page_num + 1}")
+            records.extend(ktu_api_client.map_announcement(item) for item in items)
+            last = page.get("last") if isinstance(page, dict) else None
+            if not items or last or source.pagination == "single":
+                break
+    finally:
+        if own_session:
+            session.close()
+    return [r for r in records if r["title"]]
+
+def absolute_links(record, base_url):
+    """Resolve a parsed record's relative links against the page URL (#attachment-<id> refs stay)"""
+    if record["link"] and not record["link"].startswith("#"):
+        record["link"] = urljoin(base_url, record["link"])
+    for att in record["attachments"]:
+        if not att["href"].startswith("#"):
+            att["href"] = urljoin(base_url, att["href"])
+    return record
+
+def fetch_browser(source, driver_factory=None):
+    """Render the listing in Chrome and parse up to max_pages pages"""
+    import ktu_scrape_site
+    import lean_page
+    import page_ready
+    from selenium.webdriver.common.by import By
+
+    own_driver = driver_factory is None
+    driver = ktu_scrape_site.make_driver(headless=ktu_scrape_site.HEADLESS) if own_driver else driver_factory()
+    parse = parser_for(source)
+    records = []
+    try:
+        print(f"[{source.name}] Loading: {source.url}")
+        with ktu_scrape_site.timed("page_load"):
+            driver.get(source.url)
+            rendered = page_ready.wait_for_first_block(driver, ktu_scrape_site.WAIT_SECONDS, source.item_selector)
+        if not rendered:
+            print(f"[{source.name}] Listing did not render in time - parsing what is there")
+        for page_num in range(1, source.max_pages + 1):
+            with ktu_scrape_site.timed("parse"):
+                page = [absolute_links(record, driver.current_url) for record in parse(driver.page_source)]
+            print(f"[{source.name}] Found {len(page)} items on page {page_num}")
+            records.extend(page)
+            if source.pagination == "single" or page_num == source.max_pages:
+                break
+            next_links = driver.find_elements(By.XPATH, NEXT_XPATH)
+            if not next_links:
+                break
+            with ktu_scrape_site.timed("page_load"):
+                mark = page_ready.mark_page(driver, source.item_selector)
+                next_links[0].click()
+                if not page_ready.wait_for_page_change(
+                        driver, mark, ktu_scrape_site.PAGE_WAIT_SECONDS, source.item_selector):
+                    print(f"[{source.name}] Next page did not load - stopping")
+                    break
+    finally:
+        lean_page.collect(driver)
+        if own_driver:
+            driver.quit()
+    return records
+
+def scrape(source, driver_factory=None, session=None):
+    """Fetch one extra source and return the result dict (without saving it)
+
+    Sources with an api_path are fetched through the API, falling back to
+    the browser (when they have a url) unless SCRAPER_ENGINE=api.
+    """
+    import ktu_scrape_site
+
+    ktu_scrape_site.reset_run_stats()
+    records = None
+    if source.api_path and ktu_scrape_site.SCRAPER_ENGINE != "selenium":
+        try:
+            with ktu_scrape_site.timed("api_fetch"):
+                records = fetch_api(source, session)
+        except Exception as e:
+            if not source.url or ktu_scrape_site.SCRAPER_ENGINE == "api":
+                raise
+            print(f"[{source.name}] API fetch failed ({e}) - falling back to Selenium")
+    if records is None:
+        records = fetch_browser(source, driver_factory)
+
+    items = []
+    seen = set()
+    for item in records:
+        fp = fingerprint(item)
+        if fp not in seen:
+            seen.add(fp)
+            items.append(dict(item, fingerprint=fp))
+    print(f"[{source.name}] Total items scraped: {len(items)}")
+    return {
+        "source": source.name,
+        "fetched_at": datetime.utcnow().isoformat() + "Z",
+        "count": len(items),
+        "announcements": items  # same record format (and key) as the announcements snapshot
+    }
+
+def save(source, result):
+    """Publish a source's result into its snapshot directory; returns the pointer
+
+    An unchanged listing is not published again: the current version's
+    pointer is touched instead, which marks it as confirmed up to date.
+    """
+    import ktu_scrape_site
+
+    with ktu_scrape_site.timed("save"):
+        current = snapshot_files.read_current(source.snapshot_dir)
+        if current is not None and current[1].get("announcements") == result["announcements"]:
+            snapshot_files.touch_pointer(source.snapshot_dir)
+            print(f"[{source.name}] Unchanged since snapshot v{current[0]['version']}")
+            return current[0]
+        pointer = snapshot_files.publish(result, source.snapshot_dir)
+    print(f"[{source.name}] Saved snapshot v{pointer['version']} in {source.snapshot_dir}/")
+    return pointer
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in SOURCES or sys.argv[1] == ANNOUNCEMENTS:
+        sys.exit(f"usage: python sources.py <{'|'.join(s.name for s in extra()) or 'name'}>")
+    source = get(sys.argv[1])
+    save(source, scrape(source))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# webhooks.py
+"""
+Webhook delivery of new announcements through a persistent outbox.
+
+Publishing a snapshot only appends its new announcements to the outbox
+table in the SQLite store (one row per fingerprint, so an announcement is
+never queued twice); the scrape never waits for a subscriber. The leader's
+Dispatcher delivers the outbox on its own thread:
+
+- each subscriber has a cursor (the last outbox seq it acknowledged), so a
+  restart or a new leader resumes exactly where delivery stopped,
+- up to WEBHOOK_BATCH_SIZE announcements go in one POST, at most one batch
+  in flight per subscriber, WEBHOOK_WORKERS subscribers in parallel,
+- one keep-alive requests.Session per host,
+- a failed batch (non-2xx, timeout) is retried with exponential backoff
+  and jitter, capped at WEBHOOK_MAX_BACKOFF_SECONDS.
+
+Every request carries X-KTU-Delivery (subscriber id and seq range) so a
+receiver can drop the batch that may be sent twice if the leader dies
+between the receiver's 2xx and the cursor update, and X-KTU-Signature
+(HMAC-SHA256 of the body) when the subscriber has a secret.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+import announcement_store
+from announcement_store import fingerprint
+
+WEBHOOK_URLS = [u.strip() for u in os.getenv("WEBHOOK_URLS", "").split(",") if u.strip()]
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "20"))
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "10"))  # seconds per POST
+WEBHOOK_BACKOFF_SECONDS = float(os.getenv("WEBHOOK_BACKOFF_SECONDS", "5"))  # first retry
+WEBHOOK_MAX_BACKOFF_SECONDS = float(os.getenv("WEBHOOK_MAX_BACKOFF_SECONDS", "3600"))
+OUTBOX_RETENTION_DAYS = 30
+PRUNE_SECONDS = 3600
+POLL_SECONDS = 5  # how often the dispatcher looks for due subscribers without being woken
+USER_AGENT = "ktu-announcements-webhooks/1.0"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    fingerprint TEXT NOT NULL UNIQUE,
+    created_at REAL NOT NULL,
+    announcement TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS webhook_subscribers (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    secret TEXT,
+    cursor INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    delivered INTEGER NOT NULL DEFAULT 0,
+    last_delivered_at REAL
+);
+"""
+
+def connect():
+    conn = announcement_store.connect()
+    conn.executescript(SCHEMA)
+    return conn
+
+def latest_seq(conn):
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM outbox").fetchone()[0]
+
+def enqueue(announcements):
+    """Append announcements to the outbox (ones already queued are ignored); returns how many were new"""
+    now = time.time()
+    rows = []
+    for item in announcements:
+        fp = item.get("fingerprint") or fingerprint(item)
+        rows.append((fp, now, json.dumps(dict(item, fingerprint=fp), ensure_ascii=False)))
+    conn = connect()
+    try:
+        with conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO outbox (fingerprint, created_at, announcement) VALUES (?, ?, ?)", rows
+            )
+            return conn.total_changes - before
+    finally:
+        conn.close()
+
+def isoformat(ts):
+    return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+def subscriber_dict(row, latest):
+    return {
+        "id": row["id"],
+        "url": row["url"],
+        "signed": bool(row["secret"]),
+        "cursor": row["cursor"],
+        "pending": max(latest - row["cursor"], 0),
+        "delivered": row["delivered"],
+        "failures": row["failures"],
+        "next_attempt_at": isoformat(row["next_attempt_at"]),
+        "last_error": row["last_error"],
+        "last_delivered_at": isoformat(row["last_delivered_at"])
+    }
+
+def subscribe(url, secret=None):
+    """Register a webhook URL; it receives announcements queued from now on. Returns (subscriber, created)"""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        raise ValueError("url must be an absolute http(s) URL")
+    conn = connect()
+    try:
+        with conn:
+            row = conn.execute("SELECT * FROM webhook_subscribers WHERE url = ?", (url,)).fetchone()
+            created = row is None
+            if created:
+                conn.execute(
+                    "INSERT INTO webhook_subscribers (id, url, secret, cursor, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (uuid.uuid4().hex[:12], url, secret, latest_seq(conn), time.time())
+                )
+                row = conn.execute("SELECT * FROM webhook_subscribers WHERE url = ?", (url,)).fetchone()
+            return subscriber_dict(row, latest_seq(conn)), created
+    finally:
+        conn.close()
+
+def unsubscribe(subscriber_id):
+    conn = connect()
+    try:
+        with conn:
+            return conn.execute("DELETE FROM webhook_subscribers WHERE id = ?", (subscriber_id,)).rowcount > 0
+    finally:
+        conn.close()
+
+def subscribers():
+    conn = connect()
+    try:
+        latest = latest_seq(conn)
+        rows = conn.execute("SELECT * FROM webhook_subscribers ORDER BY created_at").fetchall()
+    finally:
+        conn.close()
+    return [subscriber_dict(row, latest) for row in rows]
+
+def prune(conn):
+    """Drop old outbox rows every subscriber has acknowledged (all subscribers, or none exist)
+
+    Acknowledged rows are kept for OUTBOX_RETENTION_DAYS so the UNIQUE
+    fingerprint still stops an announcement that drops out of the scraped
+    pages and comes back from being queued again.
+    """
+    low = conn.execute("SELECT MIN(cursor) FROM webhook_subscribers").fetchone()[0]
+    if low is None:
+        low = latest_seq(conn)
+    conn.execute(
+        "DELETE FROM outbox WHERE seq <= ? AND created_at < ?",
+        (low, time.time() - OUTBOX_RETENTION_DAYS * 86400)
+    )
+
+def sign(secret, body):
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+def backoff_seconds(failures):
+    delay = min(WEBHOOK_BACKOFF_SECONDS * 2 ** min(failures - 1, 20), WEBHOOK_MAX_BACKOFF_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+class Dispatcher:
+    """Delivers the outbox to every subscriber on a bounded worker pool (leader only)"""
+
+    def __init__(self, on_delivery=None):
+        self.on_delivery = on_delivery  # callback(subscriber_id, ok, announcements, seconds)
+        self.pool = ThreadPoolExecutor(max_workers=WEBHOOK_WORKERS, thread_name_prefix="webhook")
+        self.sessions = {}  # "scheme://host" -> keep-alive Session
+        self.in_flight = set()  # subscriber ids with a batch being delivered
+        self.pruned_at = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def start(self):
+        for url in WEBHOOK_URLS:
+            subscribe(url)
+        threading.Thread(target=self._loop, daemon=True).start()
+        return self
+
+    def wake(self):
+        """Deliver new outbox rows now instead of on the next poll"""
+        self._wake.set()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(POLL_SECONDS)
+            self._wake.clear()
+            try:
+                self.dispatch_due()
+            except Exception as e:
+                print(f"Webhook dispatcher error: {e}")
+
+    def dispatch_due(self):
+        """Start a delivery for every subscriber with pending rows whose backoff has passed"""
+        conn = connect()
+        try:
+            latest = latest_seq(conn)
+            due = conn.execute(
+                "SELECT id FROM webhook_subscribers WHERE cursor < ? AND next_attempt_at <= ?",
+                (latest, time.time())
+            ).fetchall()
+            if time.time() - self.pruned_at > PRUNE_SECONDS:
+                with conn:
+                    prune(conn)
+                self.pruned_at = time.time()
+        finally:
+            conn.close()
+        for row in due:
+            with self._lock:
+                if row["id"] in self.in_flight:
+                    continue
+                self.in_flight.add(row["id"])
+            self.pool.submit(self._deliver_all, row["id"])
+
+    def session_for(self, url):
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            session = self.sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=WEBHOOK_WORKERS)
+                session.mount(key, adapter)
+                session.headers.update({"User-Agent": USER_AGENT, "Content-Type": "application/json"})
+                self.sessions[key] = session
+        return session
+
+    def _deliver_all(self, subscriber_id):
+        """Send batches to one subscriber until it is caught up or a batch fails"""
+        try:
+            while self.deliver_batch(subscriber_id):
+                pass
+        except Exception as e:
+            print(f"Webhook delivery to {subscriber_id} failed: {e}")
+        finally:
+            with self._lock:
+                self.in_flight.discard(subscriber_id)
+
+    def deliver_batch(self, subscriber_id):
+        """POST the next batch; returns True if it was acknowledged and more may be pending"""
+        conn = connect()
+        try:
+            sub = conn.execute("SELECT * FROM webhook_subscribers WHERE id = ?", (subscriber_id,)).fetchone()
+            if sub is None:
+                return False  # unsubscribed meanwhile
+            rows = conn.execute(
+                "SELECT seq, announcement FROM outbox WHERE seq > ? ORDER BY seq LIMIT ?",
+                (sub["cursor"], WEBHOOK_BATCH_SIZE)
+            ).fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            return False
+
+        first, last = rows[0]["seq"], rows[-1]["seq"]
+        body = json.dumps({
+            "event": "announcements.new",
+            "delivery": f"{subscriber_id}:{first}-{last}",
+            "announcements": [json.loads(row["announcement"]) for row in rows]
+        }, ensure_ascii=False).encode("utf-8")
+        headers = {"X-KTU-Delivery": f"{subscriber_id}:{first}-{last}"}
+        if sub["secret"]:
+            headers["X-KTU-Signature"] = sign(sub["secret"], body)
+
+        started = time.perf_counter()
+        error = None
+        try:
+            resp = self.session_for(sub["url"]).post(sub["url"], data=body, headers=headers, timeout=WEBHOOK_TIMEOUT)
+            if not 200 <= resp.status_code < 300:
+                error = f"HTTP {resp.status_code}"
+        except requests.RequestException as e:
+            error = str(e) or type(e).__name__
+        seconds = time.perf_counter() - started
+
+        conn = connect()
+        try:
+            with conn:
+                if error is None:
+                    conn.execute(
+                        "UPDATE webhook_subscribers SET cursor = ?, failures = 0, next_attempt_at = 0, "
+                        "last_error = NULL, delivered = delivered + ?, last_delivered_at = ? "
+                        "WHERE id = ? AND cursor < ?",
+                        (last, len(rows), time.time(), subscriber_id, last)
+                    )
+                else:
+                    failures = sub["failures"] + 1
+                    conn.execute(
+                        "UPDATE webhook_subscribers SET failures = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                        (failures, time.time() + backoff_seconds(failures), error, subscriber_id)
+                    )
+        finally:
+            conn.close()
+        if error is not None:
+            print(f"Webhook {sub['url']}: batch {first}-{last} failed ({error}), retry #{sub['failures'] + 1} scheduled")
+        if self.on_delivery:
+            self.on_delivery(subscriber_id, error is None, len(rows), seconds)
+        return error is None